@@ -1,26 +1,70 @@
-from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from typing import Any, Callable, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Body
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import os
+import asyncio
+import contextvars
+import hashlib
 import json
 import logging
 import re
-from datetime import date
-import httpx
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta, timezone
 
 try:
     from huggingface_hub import InferenceClient
 except ImportError:  # Provide a graceful message if dependency missing
     InferenceClient = None  # type: ignore
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app import crud, schemas
 from app.api import deps
 from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.user import UserRole
+from app.schemas.notification import NotificationCreate
+from app.utils import hf_client
+from app.utils.improvement_metrics import (
+    improvement_metrics,
+    improvement_metrics_by_student,
+    metric_rows,
+    progress_stats_metrics,
+)
+from app.utils.job_queue import JobQueueFull, submit_job
+from app.utils.llm_cache import llm_cache
+from app.utils.single_flight import SingleFlight
+from app.utils.summary_chunks import ReportChunk, chunk_cache_key, chunk_reports
+from app.utils.therapy_sections import (
+    SECTION_MATCHERS,
+    THERAPY_SECTIONS,
+    ReportGoals,
+    SectionIndex,
+    SectionMatcher,
+    ensure_section_index,
+)
+from app.utils.timing import (
+    RequestTimings,
+    activate,
+    record,
+    record_fallback,
+    record_usage,
+    section_scope,
+    span,
+    timed,
+    track_request,
+)
+from app.utils.token_budget import PromptBudget, prompt_token_budgets, token_counter
 
 router = APIRouter()
 
+# Identical summary requests that arrive while one is being generated share its result.
+summary_flights = SingleFlight("ai-summary")
+
 
 class TherapyAISummaryRequest(BaseModel):
     student_id: str  # Changed to str to accept "STU2025001" format
@@ -32,6 +76,11 @@ class TherapyAISummaryRequest(BaseModel):
     max_length: int = 500
     min_length: int = 100
     use_text_generation: bool = True  # Enable advanced text generation for current status
+    bypass_cache: bool = False  # Skip cached LLM responses and regenerate (fresh results are still cached)
+    incremental: bool = True  # Update the stored summary with only the reports added since it was generated
+    map_reduce: Optional[bool] = None  # Summarize in chunks then merge; None = automatic for long histories
+    single_shot: Optional[bool] = None  # All sections from one JSON completion; None = AI_SINGLE_SHOT_ANALYSIS
+    include_timings: bool = False  # Add per-stage timings and token usage to the response
 
 
 class TherapyAISummaryResponse(BaseModel):
@@ -46,8 +95,35 @@ class TherapyAISummaryResponse(BaseModel):
     improvement_metrics: dict
     recommendations: str
     date_range: dict
+    fallback_sections: List[str] = []  # Sections that used data-driven fallbacks instead of AI output
+    timings: Optional[dict] = None  # Per-stage timings of this request (only with include_timings)
+
+
+class TherapyAIBatchSummaryRequest(BaseModel):
+    student_ids: Optional[List[str]] = None  # "STU2025001" format; takes precedence over class_name
+    class_name: Optional[str] = None
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+    therapy_type: Optional[str] = None
+    model: Optional[str] = "meta-llama/Llama-3.3-70B-Instruct"
+    bypass_cache: bool = False
+    incremental: bool = True
+    create_notifications: bool = False  # Send each generated summary to the student's parent account
+
 
+class SummaryJobResponse(BaseModel):
+    job_id: str
+    status: str  # queued | running | succeeded | failed
+    student_id: str
+    progress: Optional[dict] = None
+    result: Optional[TherapyAISummaryResponse] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
+
+@timed("db_fetch")
 def _get_filtered_reports_for_payload(db: Session, payload: TherapyAISummaryRequest):
     """Resolve student and filter reports by optional date/type filters."""
     from app.crud.student import student as crud_student
@@ -56,27 +132,305 @@ def _get_filtered_reports_for_payload(db: Session, payload: TherapyAISummaryRequ
     if not db_student:
         raise HTTPException(status_code=404, detail=f"Student with ID {payload.student_id} not found.")
 
-    reports = crud.therapy_report.get_by_student(db, student_id=db_student.id)
-    if not reports:
-        raise HTTPException(status_code=404, detail="No therapy reports found for student.")
-
-    filtered = []
-    for r in reports:
-        if payload.from_date and r.report_date < payload.from_date:
-            continue
-        if payload.to_date and r.report_date > payload.to_date:
-            continue
-        if payload.therapy_type and (not r.therapy_type or r.therapy_type != payload.therapy_type):
-            continue
-        filtered.append(r)
-
+    filtered = crud.therapy_report.get_by_student_filtered(
+        db,
+        db_student.id,
+        from_date=payload.from_date,
+        to_date=payload.to_date,
+        therapy_type=payload.therapy_type,
+    )
     if not filtered:
+        if not crud.therapy_report.has_reports(db, db_student.id):
+            raise HTTPException(status_code=404, detail="No therapy reports found for student.")
         raise HTTPException(status_code=404, detail="No therapy reports matched the provided filters.")
 
-    filtered.sort(key=lambda r: r.report_date)
     return db_student, filtered
 
 
+def _report_order_key(report):
+    """Chronological order with the report id as a tie-breaker for same-day sessions."""
+    return (report.report_date, report.id)
+
+
+def _summary_flight_key(kind: str, payload: TherapyAISummaryRequest, student, reports) -> str:
+    """Coalescing key: the normalized request plus the ids and edit times of its reports.
+
+    `include_timings` only decorates the response, so requests differing in it share one generation.
+    """
+    request = payload.model_dump(mode="json", exclude={"student_id", "include_timings"})
+    request["model"] = payload.model or "meta-llama/Llama-3.3-70B-Instruct"
+    report_set = [[r.id, str(getattr(r, "updated_at", None) or "")] for r in reports]
+    raw = json.dumps([kind, student.id, request, report_set], sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _summary_scope_key(payload: TherapyAISummaryRequest) -> str:
+    """Requests with the same therapy type, start date and model can extend the same stored summary."""
+    return "|".join([
+        payload.therapy_type or "*",
+        payload.from_date.isoformat() if payload.from_date else "*",
+        payload.model or "meta-llama/Llama-3.3-70B-Instruct",
+    ])
+
+
+@timed("db_fetch")
+def _load_summary_state(db: Session, student, reports, payload: TherapyAISummaryRequest):
+    """Find a stored analysis that covers a prefix of `reports`.
+
+    Returns `(state, new_reports)`. `state` is None when there is nothing reusable (no
+    stored state, bypass requested, or covered reports were edited/deleted/back-dated),
+    in which case every report must be processed. Edits are detected by report
+    `updated_at` times later than the stored state's.
+    """
+    if payload.bypass_cache or not payload.incremental:
+        return None, reports
+    state = crud.summary_state.get(db, student_id=student.id, scope_key=_summary_scope_key(payload))
+    return _match_summary_state(state, student, reports)
+
+
+def _match_summary_state(state, student, reports):
+    """Split `reports` into the prefix covered by an already loaded `state` and the newer ones."""
+    if state is None or state.last_report_id is None:
+        return None, reports
+
+    covered_key = (state.last_report_date, state.last_report_id)
+    covered = [r for r in reports if _report_order_key(r) <= covered_key]
+    stored_at = getattr(state, "updated_at", None)
+    # A covered report saved after the state was stored has been edited since.
+    edited = stored_at is not None and any(
+        (getattr(r, "updated_at", None) or stored_at) > stored_at for r in covered
+    )
+    if edited or len(covered) != state.report_count or not covered or covered[-1].id != state.last_report_id:
+        logging.info(f"Stored summary for student {student.id} no longer matches its reports; regenerating in full")
+        return None, reports
+    return state, reports[len(covered):]
+
+
+@timed("db_save")
+def _save_summary_state(
+    db: Session, student, reports, payload: TherapyAISummaryRequest, analysis, state=None, new_reports=None, section_index=None
+):
+    """Persist the analysis so the next request only has to process newer reports."""
+    if not payload.incremental:
+        return
+    if analysis.fallback_sections:
+        # Don't pin data-driven fallbacks; the next request should retry the model.
+        logging.info(f"Not storing summary state; sections fell back: {analysis.fallback_sections}")
+        return
+    if state is not None and new_reports is not None:
+        section_notes = _collect_latest_section_notes(new_reports, state.section_notes, section_index=section_index)
+    else:
+        section_notes = _collect_latest_section_notes(reports, section_index=section_index)
+    try:
+        crud.summary_state.upsert(
+            db,
+            student_id=student.id,
+            scope_key=_summary_scope_key(payload),
+            last_report_id=reports[-1].id,
+            last_report_date=reports[-1].report_date,
+            report_count=len(reports),
+            section_notes=section_notes,
+            analysis=jsonable_encoder(analysis),
+        )
+    except Exception as e:
+        db.rollback()
+        logging.warning(f"Could not store summary state for student {student.id}: {e}")
+
+
+def _generate_analysis_with_state(db: Session, reports, student, payload: TherapyAISummaryRequest):
+    """Generate the analysis, reusing the stored summary and only processing new reports when possible."""
+    state, new_reports = _load_summary_state(db, student, reports, payload)
+    if state is not None and not new_reports:
+        logging.info(f"No new reports for student {student.id} since last summary; returning stored analysis")
+        return TherapyAISummaryResponse(**state.analysis)
+
+    with span("section_index"):
+        section_index = SectionIndex(reports)
+    progress_stats = crud.progress_stats.get(db, student_id=student.id)
+    analysis = _generate_analysis_from_state(
+        reports, student, payload, state, new_reports, section_index, progress_stats=progress_stats
+    )
+    _save_summary_state(db, student, reports, payload, analysis, state, new_reports, section_index=section_index)
+    return analysis
+
+
+def _generate_analysis_from_state(
+    reports,
+    student,
+    payload: TherapyAISummaryRequest,
+    state,
+    new_reports,
+    section_index,
+    on_section_done=None,
+    progress_stats=None,
+):
+    """Run the model calls for a full or incremental analysis. Does not touch the database."""
+    if state is not None:
+        logging.info(f"Updating stored summary for student {student.id} with {len(new_reports)} new report(s)")
+    return _generate_comprehensive_analysis(
+        reports,
+        student,
+        payload,
+        previous_state=state,
+        new_reports=new_reports if state is not None else None,
+        section_index=section_index,
+        on_section_done=on_section_done,
+        progress_stats=progress_stats,
+    )
+
+
+# ============================================================================
+# BACKGROUND SUMMARY JOBS
+# ============================================================================
+
+def _update_summary_job(update, job_id: str, *args):
+    """Apply a crud.summary_job update in its own short-lived session."""
+    db = SessionLocal()
+    try:
+        update(db, job_id, *args)
+    except Exception as e:
+        db.rollback()
+        logging.warning(f"Could not update summary job {job_id}: {e}")
+    finally:
+        db.close()
+
+
+def _run_summary_job(job_id: str):
+    """Generate the analysis of a queued summary job on a background worker.
+
+    A database session is only held while loading the inputs and while storing the
+    result, never during the model calls.
+    """
+    db = SessionLocal()
+    try:
+        job = crud.summary_job.get(db, job_id)
+        if job is None:
+            logging.warning(f"Summary job {job_id} no longer exists; skipping")
+            return
+        payload = TherapyAISummaryRequest(**job.request)
+        crud.summary_job.mark_running(db, job_id)
+        db_student, reports = _get_filtered_reports_for_payload(db, payload)
+        state, new_reports = _load_summary_state(db, db_student, reports, payload)
+        progress_stats = crud.progress_stats.get(db, student_id=db_student.id)
+        # Detach the loaded rows so they stay readable after the session is closed.
+        db.expunge_all()
+    except Exception as e:
+        db.rollback()
+        error = e.detail if isinstance(e, HTTPException) else str(e)
+        logging.warning(f"Summary job {job_id} could not load its reports: {error}")
+        _update_summary_job(crud.summary_job.mark_failed, job_id, str(error))
+        return
+    finally:
+        db.close()
+
+    try:
+        if state is not None and not new_reports:
+            logging.info(f"Summary job {job_id}: no new reports since last summary; returning stored analysis")
+            analysis = TherapyAISummaryResponse(**state.analysis)
+        else:
+            def _on_section_done(completed_sections, total_sections):
+                _update_summary_job(
+                    crud.summary_job.update_progress,
+                    job_id,
+                    {"completed_sections": completed_sections, "total_sections": total_sections},
+                )
+
+            with span("section_index"):
+                section_index = SectionIndex(reports)
+            analysis = _generate_analysis_from_state(
+                reports,
+                db_student,
+                payload,
+                state,
+                new_reports,
+                section_index,
+                on_section_done=_on_section_done,
+                progress_stats=progress_stats,
+            )
+            db = SessionLocal()
+            try:
+                _save_summary_state(
+                    db, db_student, reports, payload, analysis, state, new_reports, section_index=section_index
+                )
+            finally:
+                db.close()
+    except Exception as e:
+        logging.exception(f"Summary job {job_id} failed")
+        _update_summary_job(crud.summary_job.mark_failed, job_id, str(e))
+        return
+
+    _update_summary_job(crud.summary_job.mark_succeeded, job_id, jsonable_encoder(analysis))
+
+
+def _summary_job_response(job) -> SummaryJobResponse:
+    return SummaryJobResponse(
+        job_id=job.id,
+        status=job.status,
+        student_id=str((job.request or {}).get("student_id", "")),
+        progress=job.progress,
+        result=TherapyAISummaryResponse(**job.result) if job.result else None,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+def _find_summary_job(db: Session, job_id: str):
+    """The job row; one left unfinished for longer than SUMMARY_JOB_TIMEOUT is marked failed first.
+
+    Jobs dropped at shutdown, orphaned by a restart or whose final update could not be
+    written would otherwise stay queued/running and keep their pollers waiting forever.
+    """
+    job = crud.summary_job.get(db, job_id)
+    if job is not None and job.status in crud.summary_job.UNFINISHED_STATUSES:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.SUMMARY_JOB_TIMEOUT)
+        if crud.summary_job.fail_unfinished(db, "Summary job timed out.", job_id=job_id, created_before=cutoff):
+            db.refresh(job)
+    return job
+
+
+def _can_read_summary_job(job, user) -> bool:
+    """Job results hold a student's clinical analysis: only the requester, admins and therapists see them."""
+    if user.is_superuser or user.role in [UserRole.ADMIN, UserRole.THERAPIST, "admin", "therapist"]:
+        return True
+    return job.requested_by_user_id is not None and job.requested_by_user_id == user.id
+
+
+def _get_summary_job_for_user(db: Session, job_id: str, user):
+    job = _find_summary_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Summary job not found.")
+    if not _can_read_summary_job(job, user):
+        raise HTTPException(status_code=403, detail="The user doesn't have enough privileges")
+    return job
+
+
+def _load_summary_job(job_id: str, user) -> SummaryJobResponse:
+    db = SessionLocal()
+    try:
+        return _summary_job_response(_get_summary_job_for_user(db, job_id, user))
+    finally:
+        db.close()
+
+
+def fail_orphaned_summary_jobs() -> None:
+    """Mark jobs left queued/running by a previous process failed (called at app startup).
+
+    Jobs run on an in-process worker pool, so nothing will ever finish them after a restart.
+    """
+    db = SessionLocal()
+    try:
+        count = crud.summary_job.fail_unfinished(db, "Summary job was interrupted by a server restart.")
+        if count:
+            logging.warning(f"Marked {count} orphaned summary job(s) failed")
+    except Exception as e:
+        db.rollback()
+        logging.warning(f"Could not sweep orphaned summary jobs: {e}")
+    finally:
+        db.close()
+
+
 
 @router.post("/", response_model=schemas.therapy_report.TherapyReport)
 def create_report(
@@ -128,6 +482,80 @@ def list_reports_for_student(
     return crud.therapy_report.get_by_student(db, student_id=student_id)
 
 
+@router.get("/metrics")
+def list_improvement_metrics(
+    class_name: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    therapy_type: Optional[str] = None,
+    db: Session = Depends(deps.get_db),
+    current_user: schemas.user.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """Improvement metrics of every student (or every student of a class) for dashboards.
+
+    Without filters the metrics come from the students' progress stats rows. For the
+    other students, and whenever a date or therapy type filter is given, only the
+    date/level/type columns of their reports are read and the metrics of all of them
+    are computed in one pass.
+    """
+    from app.models.student import Student
+
+    query = db.query(Student.id, Student.student_id, Student.name)
+    if class_name:
+        query = query.filter(Student.class_name == class_name)
+    students = query.order_by(Student.name).all()
+    metrics = {}
+    if not (from_date or to_date or therapy_type):
+        stats = crud.progress_stats.get_many(db, student_ids=[s.id for s in students])
+        metrics = {student_id: progress_stats_metrics(row) for student_id, row in stats.items()}
+    rows = crud.therapy_report.get_metric_columns(
+        db,
+        [s.id for s in students if s.id not in metrics],
+        from_date=from_date,
+        to_date=to_date,
+        therapy_type=therapy_type,
+    )
+    metrics.update(improvement_metrics_by_student(rows))
+    return [
+        {
+            "student_id": s.student_id,
+            "name": s.name,
+            "improvement_metrics": metrics.get(s.id) or improvement_metrics([]),
+        }
+        for s in students
+    ]
+
+
+@router.get("/stats/{student_id}")
+def get_progress_stats(
+    student_id: str,
+    db: Session = Depends(deps.get_db),
+    current_user: schemas.user.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """Running progress statistics of a student, read from student_progress_stats without
+    touching the reports. The row is built from the reports on first request."""
+    from app.models.student import Student
+
+    db_student = db.query(Student.id, Student.student_id).filter(Student.student_id == student_id).first()
+    if not db_student:
+        raise HTTPException(status_code=404, detail=f"Student with ID {student_id} not found.")
+    stats = crud.progress_stats.get(db, student_id=db_student.id)
+    if stats is None:
+        stats = crud.progress_stats.rebuild(db, student_id=db_student.id)
+        db.commit()
+    return {
+        "student_id": db_student.student_id,
+        "report_count": stats.report_count,
+        "first_report_date": stats.first_report_date,
+        "last_report_date": stats.last_report_date,
+        "recent_levels": stats.recent_levels,
+        "interval_mean_days": round(stats.interval_mean, 3),
+        "interval_variance": round(stats.interval_m2 / stats.interval_count, 3) if stats.interval_count else 0.0,
+        "improvement_metrics": progress_stats_metrics(stats),
+        "updated_at": stats.updated_at,
+    }
+
+
 @router.post("/summary/ai/test", response_model=TherapyAISummaryResponse)
 def ai_summarize_reports_test(
     payload: TherapyAISummaryRequest = Body(...),
@@ -142,12 +570,13 @@ def ai_summarize_reports_test(
         raise HTTPException(status_code=503, detail="HUGGINGFACE_API_TOKEN environment variable not set on server.")
 
     db_student, filtered = _get_filtered_reports_for_payload(db, payload)
-    analysis = _generate_comprehensive_analysis(filtered, db_student, payload)
+    analysis = _generate_analysis_with_state(db, filtered, db_student, payload)
     return analysis
 
 
 @router.post("/summary/ai", response_model=TherapyAISummaryResponse)
 def ai_summarize_reports(
+    response: Response,
     payload: TherapyAISummaryRequest = Body(...),
     db: Session = Depends(deps.get_db),
     current_user: schemas.user.User = Depends(deps.get_current_active_user),
@@ -159,61 +588,160 @@ def ai_summarize_reports(
       - If huggingface_hub not installed, returns 503
       - Applies optional filtering by date range and therapy type
       - Provides detailed analysis including start/end comparisons and improvement metrics
+      - Per-stage timings are returned in the Server-Timing header, and in `timings`
+        when `include_timings` is set
     """
     if not settings.HUGGINGFACE_API_TOKEN:
         raise HTTPException(status_code=503, detail="HUGGINGFACE_API_TOKEN environment variable not set on server.")
-    
-    # Debug: Log the token being used (first 15 chars only for security)
-    token_prefix = settings.HUGGINGFACE_API_TOKEN[:15] if settings.HUGGINGFACE_API_TOKEN else "NONE"
-    print(f"\n{'='*60}")
-    print(f"AI SUMMARY REQUEST - Token prefix: {token_prefix}...")
-    print(f"Student: {payload.student_id}, Model: {payload.model}")
-    print(f"{'='*60}\n")
 
-    db_student, filtered = _get_filtered_reports_for_payload(db, payload)
-    
-    # Generate comprehensive analysis based on actual data
-    analysis = _generate_comprehensive_analysis(filtered, db_student, payload)
+    logging.info(f"AI summary request: student {payload.student_id}, model {payload.model}")
+    with track_request("summary") as timings:
+        db_student, filtered = _get_filtered_reports_for_payload(db, payload)
+
+        # Generate comprehensive analysis based on actual data; identical concurrent
+        # requests (double clicks, several staff on one student) wait for one generation.
+        # A request that joins another one's generation only records its wait.
+        # bypass_cache asks for a fresh generation, so it never joins another one.
+        with span("generate"):
+            if payload.bypass_cache:
+                analysis = _generate_analysis_with_state(db, filtered, db_student, payload)
+            else:
+                analysis = summary_flights.do(
+                    _summary_flight_key("summary", payload, db_student, filtered),
+                    lambda: _generate_analysis_with_state(db, filtered, db_student, payload),
+                )
+    response.headers["Server-Timing"] = timings.server_timing()
+    if payload.include_timings:
+        analysis = analysis.model_copy(update={"timings": timings.summary()})
     return analysis
 
 
+def _without_timings(events):
+    """Drop the timings from the final event of a summary stream."""
+    prefix = "event: complete\ndata: "
+    for event in events:
+        if event.startswith(prefix):
+            analysis_payload = json.loads(event[len(prefix):])
+            analysis_payload.pop("timings", None)
+            event = f"{prefix}{json.dumps(analysis_payload)}\n\n"
+        yield event
+
+
 @router.post("/summary/ai/stream")
 def ai_summarize_reports_stream(
     payload: TherapyAISummaryRequest = Body(...),
     db: Session = Depends(deps.get_db),
     current_user: schemas.user.User = Depends(deps.get_current_active_user),
 ) -> Any:
-    """Stream main summary progressively, then return full AI analysis as final event."""
+    """Stream main summary progressively, then return full AI analysis as final event.
+
+    Identical concurrent requests attach to the stream already in flight and receive
+    all of its events from the start (`bypass_cache` requests always start their own).
+    With `include_timings`, the final event carries the per-stage timings of the
+    stream that produced it.
+    """
     if not settings.HUGGINGFACE_API_TOKEN:
         raise HTTPException(status_code=503, detail="HUGGINGFACE_API_TOKEN environment variable not set on server.")
 
-    db_student, filtered = _get_filtered_reports_for_payload(db, payload)
+    timings = RequestTimings("stream")
+    with activate(timings):
+        db_student, filtered = _get_filtered_reports_for_payload(db, payload)
+    flight_key = _summary_flight_key("stream", payload, db_student, filtered)
+    # The stream is produced in a background thread with its own session.
+    db.close()
 
-    def event_stream():
+    def produce_events():
+        db = SessionLocal()
         try:
             # `client` is kept for backward-compat function signatures.
             # We now call HF Router directly in `_run_model_completion`.
             client = None
             model_name = payload.model or "meta-llama/Llama-3.3-70B-Instruct"
-            main_summary_prompt = _build_main_summary_prompt_with_fewshot(filtered, db_student)
 
-            streamed_summary_parts = []
-            for chunk in _stream_model_completion(
-                client=client,
-                prompt=main_summary_prompt,
-                model=model_name,
-                max_tokens=2000,
-                temperature=0.25,
-            ):
-                if not chunk:
-                    continue
-                streamed_summary_parts.append(chunk)
-                yield f"event: summary\ndata: {json.dumps({'chunk': chunk})}\n\n"
-
-            main_summary = "".join(streamed_summary_parts).strip()
+            state, new_reports = _load_summary_state(db, db_student, filtered, payload)
+            if state is not None and not new_reports:
+                # Nothing new since the stored summary: replay it.
+                stored = TherapyAISummaryResponse(**state.analysis)
+                for chunk in _chunk_text_for_streaming(stored.summary):
+                    yield f"event: summary\ndata: {json.dumps({'chunk': chunk})}\n\n"
+                yield f"event: complete\ndata: {json.dumps(jsonable_encoder(stored))}\n\n"
+                return
+
+            # goals_achieved of every report is parsed once and shared by all prompt builders.
+            with span("section_index"):
+                section_index = SectionIndex(filtered)
+            prompt_budget = PromptBudget(model_name)
+            main_summary = ""
+            chunks_fell_back = False
+            if not hf_client.router_breaker.allows_calls():
+                # Skip the model; the structured summary below is sent instead.
+                logging.warning("Model router circuit is open; sending the structured summary")
+            else:
+                if state is not None:
+                    main_summary_prompt = _build_incremental_summary_prompt(
+                        state.analysis.get("summary", ""),
+                        state.section_notes,
+                        new_reports,
+                        filtered,
+                        db_student,
+                        section_index=section_index,
+                        prompt_budget=prompt_budget,
+                    )
+                elif _use_map_reduce(filtered, payload):
+                    # Chunk summaries are generated up front; the merge is what gets streamed.
+                    main_summary_prompt, chunks_fell_back = _build_map_reduce_summary_prompt(
+                        filtered, db_student, model_name, section_index, prompt_budget, use_cache=not payload.bypass_cache
+                    )
+                else:
+                    main_summary_prompt = _build_main_summary_prompt_with_fewshot(
+                        filtered, db_student, section_index=section_index, prompt_budget=prompt_budget
+                    )
+
+                streamed_summary_parts = []
+                try:
+                    for chunk in _stream_model_completion(
+                        client=client,
+                        prompt=main_summary_prompt,
+                        model=model_name,
+                        max_tokens=2000,
+                        temperature=0.25,
+                        use_cache=not payload.bypass_cache,
+                        validate=_is_usable_summary,
+                    ):
+                        if not chunk:
+                            continue
+                        streamed_summary_parts.append(chunk)
+                        yield f"event: summary\ndata: {json.dumps({'chunk': chunk})}\n\n"
+                    main_summary = "".join(streamed_summary_parts).strip()
+                except Exception as stream_error:
+                    # The upstream stream broke after partial output; regenerate in one
+                    # request and replace what the client has shown so far.
+                    logging.warning(f"Summary stream interrupted, regenerating without streaming: {stream_error}")
+                    try:
+                        main_result = _run_model_completion(
+                            client=client,
+                            prompt=main_summary_prompt,
+                            model=model_name,
+                            max_tokens=2000,
+                            temperature=0.25,
+                            use_cache=False,
+                            validate=_is_usable_summary,
+                        )
+                        main_summary = _extract_generated_text(main_result)
+                    except Exception as regenerate_error:
+                        logging.warning(f"Summary regeneration failed: {regenerate_error}")
+                        main_summary = ""
+                    if not _is_low_quality_summary(main_summary):
+                        yield f"event: summary_replace\ndata: {json.dumps({'summary': main_summary})}\n\n"
+
+            # A merge of partly structured chunk notes is shown, but not stored as the summary state.
+            summary_fell_back = chunks_fell_back
             if _is_low_quality_summary(main_summary):
                 logging.warning("Streamed main summary quality check failed; using structured fallback formatter")
-                main_summary = _build_structured_summary_fallback(filtered, db_student)
+                with span("fallback", section="summary"):
+                    main_summary = _build_structured_summary_fallback(filtered, db_student, section_index=section_index)
+                record_fallback("summary")
+                summary_fell_back = True
                 yield f"event: summary_replace\ndata: {json.dumps({'summary': main_summary})}\n\n"
 
             analysis = _generate_comprehensive_analysis(
@@ -221,13 +749,316 @@ def ai_summarize_reports_stream(
                 db_student,
                 payload,
                 precomputed_main_summary=main_summary,
+                previous_state=state,
+                new_reports=new_reports if state is not None else None,
+                section_index=section_index,
+                prompt_budget=prompt_budget,
+                progress_stats=crud.progress_stats.get(db, student_id=db_student.id),
+            )
+            if summary_fell_back:
+                analysis.fallback_sections.append("summary")
+            _save_summary_state(
+                db, db_student, filtered, payload, analysis, state, new_reports, section_index=section_index
             )
 
-            analysis_payload = analysis.dict() if hasattr(analysis, "dict") else analysis
+            analysis_payload = jsonable_encoder(analysis)
+            # Always attached: subscribers of a shared stream may differ in include_timings,
+            # and the ones that did not ask have them removed (_without_timings).
+            analysis_payload["timings"] = timings.summary()
             yield f"event: complete\ndata: {json.dumps(analysis_payload)}\n\n"
         except Exception as e:
             logging.exception("AI summary stream failed")
             yield f"event: error\ndata: {json.dumps({'message': str(e)})}\n\n"
+        finally:
+            db.close()
+
+    def event_stream():
+        # Spans recorded while producing the stream belong to this request.
+        try:
+            with activate(timings):
+                yield from produce_events()
+        finally:
+            timings.finish()
+
+    # bypass_cache asks for a fresh generation, so it never attaches to another stream.
+    events = event_stream() if payload.bypass_cache else summary_flights.stream(flight_key, event_stream)
+    if not payload.include_timings:
+        events = _without_timings(events)
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.post("/summary/ai/batch")
+def ai_summarize_batch(
+    payload: TherapyAIBatchSummaryRequest = Body(...),
+    db: Session = Depends(deps.get_db),
+    current_user: schemas.user.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """Generate AI analyses for a list of students or a whole class, streaming each one as it finishes.
+
+    Students and all their reports are loaded with one query each; generation runs for up to
+    AI_BATCH_MAX_CONCURRENT_STUDENTS students at once, and model calls share the global router
+    limits. Events: `student` per finished analysis, `student_error` per student that could not
+    be summarized, then `complete` with totals. With `create_notifications`, every generated
+    summary is sent to the parent in a single bulk insert at the end.
+    """
+    if not settings.HUGGINGFACE_API_TOKEN:
+        raise HTTPException(status_code=503, detail="HUGGINGFACE_API_TOKEN environment variable not set on server.")
+    if payload.create_notifications and current_user.role not in [
+        UserRole.ADMIN, UserRole.TEACHER, UserRole.THERAPIST, "admin", "teacher", "therapist"
+    ]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin, teacher, or therapist can send reports to parents",
+        )
+
+    from app.crud.student import student as crud_student
+
+    if payload.student_ids:
+        requested_ids = list(dict.fromkeys(payload.student_ids))
+        students = crud_student.get_by_student_ids(db, student_ids=requested_ids)
+        found_ids = {s.student_id for s in students}
+        missing_ids = [sid for sid in requested_ids if sid not in found_ids]
+    elif payload.class_name:
+        students = crud_student.get_by_class_name(db, class_name=payload.class_name)
+        missing_ids = []
+    else:
+        raise HTTPException(status_code=422, detail="Provide student_ids or class_name.")
+    if not students:
+        raise HTTPException(status_code=404, detail="No students found.")
+    if len(students) > settings.AI_BATCH_MAX_STUDENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.AI_BATCH_MAX_STUDENTS} students can be summarized in one batch.",
+        )
+
+    request_fields = payload.model_dump(exclude={"student_ids", "class_name", "create_notifications"})
+    student_payloads = {s.id: TherapyAISummaryRequest(student_id=s.student_id, **request_fields) for s in students}
+    reports_by_student = crud.therapy_report.get_by_students_filtered(
+        db,
+        [s.id for s in students],
+        from_date=payload.from_date,
+        to_date=payload.to_date,
+        therapy_type=payload.therapy_type,
+    )
+    states = {}
+    if payload.incremental and not payload.bypass_cache:
+        scope_key = _summary_scope_key(next(iter(student_payloads.values())))
+        states = crud.summary_state.get_many(db, student_ids=[s.id for s in students], scope_key=scope_key)
+    progress_stats = crud.progress_stats.get_many(db, student_ids=[s.id for s in students])
+
+    sender = {
+        "sent_by_user_id": current_user.id,
+        "sent_by_name": current_user.username,
+        "sent_by_role": current_user.role if isinstance(current_user.role, str) else current_user.role.value,
+    }
+    # Everything is loaded; keep the rows readable but give the connection back before the model calls.
+    db.expunge_all()
+    db.close()
+
+    def _summarize_student(db_student):
+        student_payload = student_payloads[db_student.id]
+        reports = reports_by_student[db_student.id]
+        state, new_reports = _match_summary_state(states.get(db_student.id), db_student, reports)
+        if state is not None and not new_reports:
+            return TherapyAISummaryResponse(**state.analysis)
+        section_index = SectionIndex(reports)
+        analysis = _generate_analysis_from_state(
+            reports,
+            db_student,
+            student_payload,
+            state,
+            new_reports,
+            section_index,
+            progress_stats=progress_stats.get(db_student.id),
+        )
+        session = SessionLocal()
+        try:
+            _save_summary_state(
+                session, db_student, reports, student_payload, analysis, state, new_reports, section_index=section_index
+            )
+        finally:
+            session.close()
+        return analysis
+
+    def event_stream():
+        failed = 0
+        generated = []
+        for student_id in missing_ids:
+            failed += 1
+            yield f"event: student_error\ndata: {json.dumps({'student_id': student_id, 'message': 'Student not found.'})}\n\n"
+        pending = []
+        for db_student in students:
+            if reports_by_student.get(db_student.id):
+                pending.append(db_student)
+            else:
+                failed += 1
+                error = {'student_id': db_student.student_id, 'name': db_student.name, 'message': 'No therapy reports matched the provided filters.'}
+                yield f"event: student_error\ndata: {json.dumps(error)}\n\n"
+
+        if pending:
+            pool = ThreadPoolExecutor(
+                max_workers=min(len(pending), max(1, settings.AI_BATCH_MAX_CONCURRENT_STUDENTS)),
+                thread_name_prefix="ai-batch",
+            )
+            try:
+                futures = {pool.submit(_summarize_student, db_student): db_student for db_student in pending}
+                for future in as_completed(futures):
+                    db_student = futures[future]
+                    try:
+                        analysis = future.result()
+                    except Exception as e:
+                        logging.exception(f"Batch summary failed for student {db_student.student_id}")
+                        failed += 1
+                        error = {'student_id': db_student.student_id, 'name': db_student.name, 'message': str(e)}
+                        yield f"event: student_error\ndata: {json.dumps(error)}\n\n"
+                        continue
+                    generated.append((db_student, analysis))
+                    result = {'student_id': db_student.student_id, 'name': db_student.name, 'analysis': jsonable_encoder(analysis)}
+                    yield f"event: student\ndata: {json.dumps(result)}\n\n"
+            finally:
+                # If the client disconnected, don't start the students still waiting.
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        notifications_created = 0
+        if payload.create_notifications and generated:
+            notifications = [
+                NotificationCreate(
+                    student_id=db_student.student_id,
+                    title=f"Progress Summary - {db_student.name or db_student.student_id}",
+                    message="A new AI-generated progress summary is available for your child.",
+                    report_summary=analysis.summary,
+                    report_from_date=payload.from_date.isoformat() if payload.from_date else None,
+                    report_to_date=payload.to_date.isoformat() if payload.to_date else None,
+                    therapy_type=payload.therapy_type,
+                )
+                for db_student, analysis in generated
+            ]
+            session = SessionLocal()
+            try:
+                notifications_created = len(crud.notification.create_many(session, objs_in=notifications, **sender))
+            except Exception as e:
+                session.rollback()
+                logging.error(f"Could not create batch summary notifications: {e}")
+            finally:
+                session.close()
+
+        totals = {
+            'requested': len(students) + len(missing_ids),
+            'succeeded': len(generated),
+            'failed': failed,
+            'notifications_created': notifications_created,
+        }
+        yield f"event: complete\ndata: {json.dumps(totals)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.post("/summary/ai/jobs", response_model=SummaryJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_ai_summary_job(
+    payload: TherapyAISummaryRequest = Body(...),
+    db: Session = Depends(deps.get_db),
+    current_user: schemas.user.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """Queue an AI analysis and return its job id right away.
+
+    The analysis is generated by a background worker; poll `GET /summary/ai/jobs/{job_id}`
+    or follow `GET /summary/ai/jobs/{job_id}/events` for progress and the result.
+    """
+    if not settings.HUGGINGFACE_API_TOKEN:
+        raise HTTPException(status_code=503, detail="HUGGINGFACE_API_TOKEN environment variable not set on server.")
+
+    # Fail fast on unknown students / empty filters instead of queueing a job that can't succeed.
+    db_student, _ = _get_filtered_reports_for_payload(db, payload)
+    job = crud.summary_job.create(
+        db,
+        student_id=db_student.id,
+        request=jsonable_encoder(payload),
+        requested_by_user_id=getattr(current_user, "id", None),
+    )
+    try:
+        submit_job(_run_summary_job, job.id)
+    except JobQueueFull as e:
+        logging.warning(f"Rejecting summary job for student {db_student.id}: {e}")
+        crud.summary_job.remove(db, job.id)
+        raise HTTPException(
+            status_code=503,
+            detail="Too many AI summaries are being generated; please try again shortly.",
+            headers={"Retry-After": "30"},
+        )
+    return _summary_job_response(job)
+
+
+@router.get("/summary/ai/jobs/{job_id}", response_model=SummaryJobResponse)
+def get_ai_summary_job(
+    job_id: str,
+    db: Session = Depends(deps.get_db),
+    current_user: schemas.user.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """Status, progress and (once finished) result of a summary job.
+
+    Only the user who queued the job, admins and therapists can read it.
+    """
+    return _summary_job_response(_get_summary_job_for_user(db, job_id, current_user))
+
+
+@router.get("/summary/ai/jobs/{job_id}/events")
+async def stream_ai_summary_job(
+    job_id: str,
+    db: Session = Depends(deps.get_db),
+    current_user: schemas.user.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """Server-sent events for a summary job: `progress` while it runs, then `complete` or `error`.
+
+    Only the user who queued the job, admins and therapists can follow it. The stream
+    ends with `error` once the job has been unfinished for SUMMARY_JOB_TIMEOUT seconds.
+    """
+    # `db` is the session the auth dependency used; return its connection to the pool now
+    # instead of holding it until the stream ends. Session calls block, so every one of
+    # them (closing included) runs in the threadpool, never on the event loop.
+    await run_in_threadpool(db.close)
+    job = await run_in_threadpool(_load_summary_job, job_id, current_user)
+
+    async def event_stream():
+        snapshot = job
+        last_sent = None
+        deadline = time.monotonic() + settings.SUMMARY_JOB_TIMEOUT
+        while True:
+            if snapshot.status == crud.summary_job.SUCCEEDED:
+                yield f"event: complete\ndata: {json.dumps(jsonable_encoder(snapshot.result))}\n\n"
+                return
+            if snapshot.status == crud.summary_job.FAILED:
+                yield f"event: error\ndata: {json.dumps({'message': snapshot.error or 'Summary job failed.'})}\n\n"
+                return
+            current = {"status": snapshot.status, "progress": snapshot.progress}
+            if current != last_sent:
+                last_sent = current
+                yield f"event: progress\ndata: {json.dumps(current)}\n\n"
+            if time.monotonic() >= deadline:
+                yield f"event: error\ndata: {json.dumps({'message': 'Summary job timed out.'})}\n\n"
+                return
+            # Poll with short-lived sessions; nothing is held between checks.
+            await asyncio.sleep(settings.SUMMARY_JOB_POLL_INTERVAL)
+            try:
+                snapshot = await run_in_threadpool(_load_summary_job, job_id, current_user)
+            except HTTPException as e:
+                yield f"event: error\ndata: {json.dumps({'message': e.detail})}\n\n"
+                return
 
     return StreamingResponse(
         event_stream(),
@@ -240,12 +1071,52 @@ def ai_summarize_reports_stream(
     )
 
 
-def _generate_comprehensive_analysis(reports, student, payload, precomputed_main_summary: Optional[str] = None):
-    """Generate a comprehensive AI-powered analysis based on actual therapy report data."""
+@router.get("/summary/ai/cache")
+def ai_summary_cache_stats(
+    current_user: schemas.user.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """Hit/miss counters and size of the LLM response cache, and coalesced summary requests."""
+    return {**llm_cache.stats(), "single_flight": summary_flights.stats()}
+
+
+@router.get("/summary/ai/token-budget")
+def ai_summary_token_budget(
+    current_user: schemas.user.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """Prompt token budget per model ("default" for unlisted models) and how tokens are counted."""
+    return {"budgets": prompt_token_budgets(), "token_counter": token_counter()}
+
+
+def _generate_comprehensive_analysis(
+    reports,
+    student,
+    payload,
+    precomputed_main_summary: Optional[str] = None,
+    previous_state=None,
+    new_reports=None,
+    section_index: Optional[SectionIndex] = None,
+    on_section_done: Optional[Callable[[List[str], int], None]] = None,
+    prompt_budget: Optional[PromptBudget] = None,
+    progress_stats=None,
+):
+    """Generate a comprehensive AI-powered analysis based on actual therapy report data.
+
+    When `previous_state` (a stored StudentSummaryState) and `new_reports` are given, the
+    main summary is produced by updating the stored summary with only the new reports,
+    and the baseline start analysis is reused when its first sessions are unchanged.
+    `section_index` lets the caller share the reports' parsed goals with this call, and
+    `on_section_done(completed_sections, total_sections)` is called as sections finish.
+    Prompts are fitted to `prompt_budget` (the model's budget by default); whether any
+    note had to be dropped or shortened is reported in `truncated`. The improvement
+    metrics are read from `progress_stats` (the student's StudentProgressStats) when
+    it covers exactly these reports.
+    """
     client = None
+    section_index = ensure_section_index(section_index, reports)
     
     # Calculate real improvement metrics from actual data
-    improvement_metrics = _calculate_improvement_metrics(reports)
+    with span("metrics"):
+        improvement_metrics = _calculate_improvement_metrics(reports, progress_stats)
     
     # Date range info
     date_range = {
@@ -260,92 +1131,429 @@ def _generate_comprehensive_analysis(reports, student, payload, precomputed_main
     
     # Build a data-driven baseline once; use it for per-section fallback instead of
     # downgrading the entire response when a single AI call fails.
-    baseline = _generate_fallback_analysis(reports, student, payload, improvement_metrics, date_range)
+    with span("baseline"):
+        baseline = _generate_fallback_analysis(
+            reports, student, payload, improvement_metrics, date_range, section_index=section_index
+        )
 
     model_name = payload.model or "meta-llama/Llama-3.3-70B-Instruct"
-
-    # 1. Brief Overview - AI analyzes all reports for general progress
-    try:
-        overview_prompt = _build_overview_prompt_with_fewshot(reports, student)
+    use_cache = not getattr(payload, "bypass_cache", False)
+    if prompt_budget is None:
+        prompt_budget = PromptBudget(model_name)
+
+    # Sections served from model output that was itself partly a fallback.
+    degraded_sections = []
+
+    # Each section is independent of the others, so they are generated as separate
+    # tasks. A task either returns the section text or raises, in which case only
+    # that section falls back to its baseline value.
+    def _overview_section():
+        overview_prompt = _build_overview_prompt_with_fewshot(
+            reports, student, section_index=section_index, prompt_budget=prompt_budget
+        )
         overview_result = _run_model_completion(
             client=client,
             prompt=overview_prompt,
             model=model_name,
             max_tokens=300,
-            temperature=0.7
+            temperature=0.7,
+            use_cache=use_cache,
         )
-        brief_overview = _extract_generated_text(overview_result)
-    except Exception as e:
-        logging.warning(f"Brief overview generation failed, using baseline: {e}")
-        brief_overview = baseline.brief_overview
+        return _extract_generated_text(overview_result)
 
-    # 2. Start Date Analysis - AI analyzes initial reports
-    try:
-        start_prompt = _build_start_analysis_prompt_with_fewshot(start_reports, student)
+    def _start_section():
+        start_prompt = _build_start_analysis_prompt_with_fewshot(start_reports, student, section_index=section_index)
         start_result = _run_model_completion(
             client=client,
             prompt=start_prompt,
             model=model_name,
             max_tokens=350,
-            temperature=0.7
+            temperature=0.7,
+            use_cache=use_cache,
         )
-        start_analysis = _extract_generated_text(start_result)
-    except Exception as e:
-        logging.warning(f"Start-date analysis generation failed, using baseline: {e}")
-        start_analysis = baseline.start_date_analysis
+        return _extract_generated_text(start_result)
 
-    # 3. Current Status Analysis - Enhanced with text generation for detailed insights
-    end_analysis = _generate_enhanced_current_status_llama(client, end_reports, student, payload)
+    def _current_status_section():
+        return _generate_enhanced_current_status_llama(
+            client, end_reports, student, payload, section_index=section_index
+        )
 
-    # 4. Recommendations - AI generates based on progress patterns
-    try:
-        recommendations_prompt = _build_recommendations_prompt_with_fewshot(reports, improvement_metrics, student)
+    def _recommendations_section():
+        recommendations_prompt = _build_recommendations_prompt_with_fewshot(
+            reports, improvement_metrics, student, prompt_budget=prompt_budget
+        )
         rec_result = _run_model_completion(
             client=client,
             prompt=recommendations_prompt,
             model=model_name,
             max_tokens=400,
-            temperature=0.7
+            temperature=0.7,
+            use_cache=use_cache,
+        )
+        return _extract_generated_text(rec_result)
+
+    def _incremental_summary_section():
+        update_prompt = _build_incremental_summary_prompt(
+            previous_state.analysis.get("summary", ""),
+            previous_state.section_notes,
+            new_reports,
+            reports,
+            student,
+            section_index=section_index,
+            prompt_budget=prompt_budget,
+        )
+        update_result = _run_model_completion(
+            client=client,
+            prompt=update_prompt,
+            model=model_name,
+            max_tokens=2000,
+            temperature=0.25,
+            use_cache=use_cache,
+            validate=_is_usable_summary,
+        )
+        main_summary = _extract_generated_text(update_result)
+        if _is_low_quality_summary(main_summary):
+            logging.warning("Incremental summary quality check failed; regenerating from all reports")
+            return _main_summary_section()
+        return main_summary
+
+    def _main_summary_section():
+        if _use_map_reduce(reports, payload):
+            main_summary_prompt, chunks_fell_back = _build_map_reduce_summary_prompt(
+                reports, student, model_name, section_index, prompt_budget, use_cache=use_cache
+            )
+            if chunks_fell_back:
+                # Merged from partly structured notes: served, but not pinned as the stored summary.
+                degraded_sections.append("summary")
+        else:
+            main_summary_prompt = _build_main_summary_prompt_with_fewshot(
+                reports, student, section_index=section_index, prompt_budget=prompt_budget
+            )
+        main_result = _run_model_completion(
+            client=client,
+            prompt=main_summary_prompt,
+            model=model_name,
+            max_tokens=2000,  # Large enough for detailed clinical paragraphs per section
+            temperature=0.25,  # Low temperature for faithful, data-grounded output
+            use_cache=use_cache,
+            validate=_is_usable_summary,
+        )
+        main_summary = _extract_generated_text(main_result)
+        if _is_low_quality_summary(main_summary):
+            # Raising hands over to the structured fallback formatter for this section.
+            raise ValueError("main summary quality check failed")
+        return main_summary
+
+    # section name -> (task, fallback)
+    sections = {
+        # 1. Brief Overview - AI analyzes all reports for general progress
+        "brief_overview": (_overview_section, lambda: baseline.brief_overview),
+        # 2. Start Date Analysis - AI analyzes initial reports
+        "start_date_analysis": (_start_section, lambda: baseline.start_date_analysis),
+        # 3. Current Status Analysis - Enhanced with text generation for detailed insights
+        "end_date_analysis": (_current_status_section, lambda: _build_basic_current_status(end_reports, student)),
+        # 4. Recommendations - AI generates based on progress patterns
+        "recommendations": (_recommendations_section, lambda: baseline.recommendations),
+    }
+    incremental = previous_state is not None and new_reports is not None
+    previous_analysis = previous_state.analysis if incremental else {}
+    if incremental and previous_state.report_count >= len(start_reports) and previous_analysis.get("start_date_analysis"):
+        # The baseline sessions are already covered by the stored analysis.
+        start_analysis = previous_analysis["start_date_analysis"]
+        sections.pop("start_date_analysis")
+    else:
+        start_analysis = None
+
+    # 5. Main Summary - AI analyzes all report content (or only new reports when updating)
+    if not precomputed_main_summary:
+        summary_task = _incremental_summary_section if incremental else _main_summary_section
+        sections["summary"] = (
+            summary_task,
+            lambda: _build_structured_summary_fallback(reports, student, section_index=section_index),
         )
-        recommendations = _extract_generated_text(rec_result)
-    except Exception as e:
-        logging.warning(f"Recommendations generation failed, using baseline: {e}")
-        recommendations = baseline.recommendations
 
-    # 5. Main Summary - AI analyzes all report content
-    if precomputed_main_summary:
-        main_summary = precomputed_main_summary
+    if not hf_client.router_breaker.allows_calls():
+        # The router keeps failing: serve the data-driven sections now instead of
+        # letting every section call fail on its own.
+        logging.warning("Model router circuit is open; using fallback analysis for all sections")
+        results = {}
+        for name, (_, fallback) in sections.items():
+            with section_scope(name), span("fallback"):
+                results[name] = fallback()
+            record_fallback(name)
+        fallback_sections = list(sections)
+        if on_section_done is not None:
+            on_section_done(list(sections), len(sections))
     else:
-        try:
-            main_summary_prompt = _build_main_summary_prompt_with_fewshot(reports, student)
-            main_result = _run_model_completion(
-                client=client,
-                prompt=main_summary_prompt,
-                model=model_name,
-                max_tokens=2000,  # Large enough for detailed clinical paragraphs per section
-                temperature=0.25  # Low temperature for faithful, data-grounded output
-            )
-            main_summary = _extract_generated_text(main_result)
-            if _is_low_quality_summary(main_summary):
-                logging.warning("Main summary quality check failed; using structured fallback formatter")
-                main_summary = _build_structured_summary_fallback(reports, student)
-        except Exception as e:
-            logging.warning(f"Main summary generation failed, using structured report-based fallback: {e}")
-            main_summary = _build_structured_summary_fallback(reports, student)
+        # Optionally generate the sections from one JSON completion; only the sections it
+        # did not return are generated by their own calls below.
+        single_shot_results = {}
+        single_shot_fields = [name for name in SINGLE_SHOT_SECTIONS if name in sections]
+        if "summary" in single_shot_fields and (incremental or _use_map_reduce(reports, payload)):
+            single_shot_fields.remove("summary")
+        if _use_single_shot(payload) and single_shot_fields:
+            with section_scope("single_shot"), span("section"):
+                single_shot_results = _generate_single_shot_sections(
+                    single_shot_fields, reports, start_reports, end_reports, improvement_metrics, student,
+                    section_index, prompt_budget, model_name, use_cache,
+                )
+            for name in single_shot_results:
+                sections.pop(name)
+            if on_section_done is not None and single_shot_results:
+                report_progress = on_section_done
+                done_early = list(single_shot_results)
+
+                def on_section_done(completed, total):
+                    report_progress(done_early + completed, total + len(done_early))
+
+                report_progress(list(done_early), len(done_early) + len(sections))
+
+        results, timings, fallback_sections = _run_analysis_sections(sections, on_section_done=on_section_done)
+        results.update(single_shot_results)
+        fallback_sections += [name for name in degraded_sections if name not in fallback_sections]
+    main_summary = precomputed_main_summary or results["summary"]
+    if start_analysis is None:
+        start_analysis = results["start_date_analysis"]
     
     return TherapyAISummaryResponse(
         student_id=payload.student_id,
         model=payload.model or "meta-llama/Llama-3.3-70B-Instruct",
         used_reports=len(reports),
-        truncated=False,
+        truncated=prompt_budget.truncated,
         summary=main_summary,
-        brief_overview=brief_overview,
+        brief_overview=results["brief_overview"],
         start_date_analysis=start_analysis,
-        end_date_analysis=end_analysis,
+        end_date_analysis=results["end_date_analysis"],
         improvement_metrics=improvement_metrics,
-        recommendations=recommendations,
-        date_range=date_range
+        recommendations=results["recommendations"],
+        date_range=date_range,
+        fallback_sections=fallback_sections,
+    )
+
+
+# Section name -> (what the single-shot prompt asks for, completion tokens it needs)
+SINGLE_SHOT_SECTIONS = {
+    "brief_overview": (
+        "A PROGRESS SUMMARY overview: one opening sentence, then 2-3 sentences per section title listed below describing current abilities",
+        300,
+    ),
+    "start_date_analysis": (
+        "4-5 sentences describing the baseline condition and challenges from the EARLY session notes only",
+        350,
+    ),
+    "end_date_analysis": (
+        "4-5 sentences describing current abilities and functioning level from the RECENT session notes only",
+        350,
+    ),
+    "recommendations": (
+        "4-5 sentences of specific, actionable recommendations and next steps based on the progress shown",
+        400,
+    ),
+    "summary": (
+        "The full progress summary: first line '{therapy_label} – Progress Summary', then each section title below in bold "
+        "(**Title**) followed by 2-3 bullet points (•) of 2-3 complete past-tense sentences using ONLY that section's notes. "
+        "No recommendations in this field",
+        2000,
+    ),
+}
+
+
+def _use_single_shot(payload) -> bool:
+    requested = getattr(payload, "single_shot", None)
+    return settings.AI_SINGLE_SHOT_ANALYSIS if requested is None else bool(requested)
+
+
+@timed("prompt_build")
+def _build_single_shot_analysis_prompt(
+    fields, reports, start_reports, end_reports, metrics, student, section_index: SectionIndex, prompt_budget: PromptBudget
+):
+    """One prompt asking for every section in `fields` as a single JSON object.
+
+    The student context (section notes, early and recent sessions, metrics) is sent
+    once instead of once per section.
+    """
+    student_name = getattr(student, 'name', 'Student')
+    therapy_type, section_titles, matcher = _resolve_summary_sections(reports, section_index)
+    therapy_label = therapy_type or "Therapy"
+
+    prompt = f"""You are an objective clinical therapist writing a {therapy_label} progress report for {student_name} based STRICTLY on the session notes provided ({len(reports)} session(s)).
+
+Return ONLY a JSON object (no markdown fences, no text before or after it) with these string fields:
+"""
+    for name in fields:
+        description = SINGLE_SHOT_SECTIONS[name][0].format(therapy_label=therapy_label)
+        prompt += f'- "{name}": {description}\n'
+
+    prompt += f"""
+RULES FOR EVERY FIELD:
+- Use ONLY information in the notes below - NEVER fabricate techniques, tools, observations, ages or grades
+- Use the section titles EXACTLY as written; do not invent, rename or merge sections
+- Match the tone of the notes: uncertain or uneven notes must stay uncertain or uneven - do NOT reframe them as improvement
+- NO dates, NO session numbers
+- Professional, therapist-friendly language; escape line breaks inside strings as \\n
+
+SECTION TITLES:
+"""
+    for title in section_titles:
+        prompt += f"  - {title}\n"
+
+    closing = "\nRespond with the JSON object now:\n"
+    data_tokens = prompt_budget.available(prompt, closing)
+
+    # Section notes carry most of the report; early and recent sessions share the rest.
+    section_notes_map = section_index.notes_by_section(reports, matcher)
+    active_sections = [t for t in section_titles if section_notes_map.get(t)]
+    if active_sections:
+        prompt += "\nSESSION NOTES BY SECTION (oldest first):\n"
+        per_section_tokens = (data_tokens * 3 // 5) // len(active_sections)
+        for title in active_sections:
+            notes = [note[:250] for note in section_notes_map[title]]
+            if len(notes) > 3:
+                notes = [notes[0], notes[len(notes) // 2], notes[-1]]
+            prompt += f"\n{title}:\n"
+            for note_idx in prompt_budget.select_notes(notes, per_section_tokens, keep_first=True):
+                prompt += f"  - {prompt_budget.clip(notes[note_idx], per_section_tokens)}\n"
+
+    period_tokens = data_tokens // 5 if active_sections else data_tokens // 2
+    for heading, period_reports in (("EARLY SESSIONS (baseline)", start_reports), ("RECENT SESSIONS (current status)", end_reports)):
+        blocks = []
+        for report in period_reports:
+            block = ""
+            if report.progress_notes:
+                block += f"  - {report.progress_notes[:200]}\n"
+            goals_text = section_index.readable_text(report, 200)
+            if goals_text:
+                block += f"    Observations: {goals_text}\n"
+            if block:
+                blocks.append(block)
+        if blocks:
+            prompt += f"\n{heading}:\n"
+            for block_idx in prompt_budget.select_notes(blocks, period_tokens):
+                prompt += blocks[block_idx]
+
+    prompt += "\nPROGRESS DATA:\n"
+    for key in ("total_sessions", "progress_distribution", "improvement_trend", "consistency_score"):
+        if key in metrics:
+            prompt += f"- {key}: {metrics[key]}\n"
+
+    prompt += closing
+    return prompt
+
+
+def _parse_single_shot_sections(text, fields):
+    """Sections from a single-shot reply that are present and usable; others are left out."""
+    if not text:
+        return {}
+    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    start, end = cleaned.find("{"), cleaned.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        parsed = json.loads(cleaned[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(parsed, dict):
+        return {}
+
+    sections = {}
+    for name in fields:
+        value = parsed.get(name)
+        if isinstance(value, list) and all(isinstance(item, str) for item in value):
+            value = "\n".join(value)
+        if not isinstance(value, str) or not value.strip():
+            continue
+        if name == "summary" and _is_low_quality_summary(value):
+            continue
+        sections[name] = value.strip()
+    return sections
+
+
+def _generate_single_shot_sections(
+    fields, reports, start_reports, end_reports, metrics, student, section_index, prompt_budget, model_name, use_cache
+):
+    """Generate `fields` with one JSON completion. Returns only the sections that came back valid."""
+    prompt = _build_single_shot_analysis_prompt(
+        fields, reports, start_reports, end_reports, metrics, student, section_index, prompt_budget
     )
+    try:
+        result = _run_model_completion(
+            client=None,
+            prompt=prompt,
+            model=model_name,
+            max_tokens=sum(SINGLE_SHOT_SECTIONS[name][1] for name in fields),
+            temperature=0.3,
+            use_cache=use_cache,
+            # A response missing sections is regenerated next time rather than replayed.
+            validate=lambda text: len(_parse_single_shot_sections(text, fields)) == len(fields),
+        )
+    except Exception as e:
+        logging.warning(f"Single-shot analysis failed, generating sections separately: {e}")
+        return {}
+    sections = _parse_single_shot_sections(_extract_generated_text(result), fields)
+    missing = [name for name in fields if name not in sections]
+    if missing:
+        logging.warning(f"Single-shot analysis missing or invalid sections {missing}; generating them separately")
+    return sections
+
+
+def _run_analysis_sections(sections, on_section_done=None):
+    """Run independent analysis sections and apply each section's own fallback on failure.
+
+    `sections` maps a section name to a `(task, fallback)` pair of callables. With
+    `AI_CONCURRENT_SECTIONS` enabled the tasks are fanned out on a bounded thread pool,
+    so wall-clock latency is roughly that of the slowest model call instead of the sum.
+    Returns `(results, timings, fallback_sections)` where timings are per-section durations
+    in seconds and fallback_sections lists sections whose task failed. `on_section_done`
+    is called with the names of the finished sections and the section count after each one.
+    """
+    results = {}
+    timings = {}
+    fallback_sections = []
+    completed_sections = []
+    progress_lock = threading.Lock()
+
+    def _timed(name, task, fallback):
+        section_start = time.perf_counter()
+        with section_scope(name), span("section"):
+            try:
+                value = task()
+            except Exception as e:
+                logging.warning(f"Section '{name}' generation failed, using baseline: {e}")
+                fallback_sections.append(name)
+                record_fallback(name)
+                with span("fallback"):
+                    value = fallback()
+        timings[name] = round(time.perf_counter() - section_start, 3)
+        if on_section_done is not None:
+            with progress_lock:
+                completed_sections.append(name)
+                try:
+                    on_section_done(list(completed_sections), len(sections))
+                except Exception as e:
+                    logging.warning(f"Section progress callback failed: {e}")
+        return value
+
+    overall_start = time.perf_counter()
+    max_workers = min(len(sections), max(1, settings.AI_SECTION_MAX_WORKERS))
+    if settings.AI_CONCURRENT_SECTIONS and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai-section") as pool:
+            # Each task runs in a copy of this context so its spans reach the current request.
+            futures = {
+                name: pool.submit(contextvars.copy_context().run, _timed, name, task, fallback)
+                for name, (task, fallback) in sections.items()
+            }
+            for name, future in futures.items():
+                results[name] = future.result()
+    else:
+        for name, (task, fallback) in sections.items():
+            results[name] = _timed(name, task, fallback)
+
+    timings["total"] = round(time.perf_counter() - overall_start, 3)
+    logging.info(
+        "AI analysis section timings (s): "
+        + ", ".join(f"{name}={seconds}" for name, seconds in timings.items())
+    )
+    return results, timings, fallback_sections
 
 
 def _extract_summary_text(result):
@@ -394,25 +1602,36 @@ def _extract_generated_text(result):
     return str(result)[:1000]
 
 
-def _run_model_completion(client, prompt, model, max_tokens, temperature):
+def _is_cacheable_completion(result, validate=None):
+    """Only non-empty completions that pass `validate` are cached or replayed from the cache."""
+    text = _extract_generated_text(result)
+    return bool(text and text.strip()) and (validate is None or validate(text))
+
+
+def _is_usable_summary(text):
+    return not _is_low_quality_summary(text)
+
+
+def _run_model_completion(client, prompt, model, max_tokens, temperature, use_cache=True, validate=None):
     """Run chat completion via Hugging Face Router (OpenAI-compatible endpoint).
 
     Why: `huggingface_hub` <=0.24.x still targets `api-inference.huggingface.co` for model calls,
     which now returns 410 Gone. The router endpoint is the supported replacement.
-    """
 
-    base = getattr(settings, "HUGGINGFACE_BASE_URL", "https://router.huggingface.co") or "https://router.huggingface.co"
-    base = base.rstrip("/")
-    if base.endswith("/v1"):
-        v1_base = base
-    else:
-        v1_base = f"{base}/v1"
+    Responses are cached by (model, prompt, max_tokens, temperature); `use_cache=False`
+    skips the lookup but still stores the fresh response. Empty responses, and ones whose
+    text fails `validate` (e.g. a low-quality summary), are not cached, so a repeat
+    request generates again instead of replaying them. Router calls go through the
+    shared circuit breaker (CircuitOpenError while it is open) and retry 429/5xx.
+    Each router call is recorded as a `model_call` span with its token usage.
+    """
+    cache_key = llm_cache.make_key(model, prompt, max_tokens, temperature)
+    if use_cache:
+        cached = llm_cache.get(cache_key)
+        if cached is not None and _is_cacheable_completion(cached, validate):
+            record("model_cache_hit", 0.0, model=model)
+            return cached
 
-    url = f"{v1_base}/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {settings.HUGGINGFACE_API_TOKEN}",
-        "Content-Type": "application/json",
-    }
     body = {
         "model": model,
         "messages": [{"role": "user", "content": prompt}],
@@ -421,32 +1640,108 @@ def _run_model_completion(client, prompt, model, max_tokens, temperature):
         "stream": False,
     }
 
-    # Keep timeouts bounded so API failures degrade gracefully to fallbacks.
-    timeout = httpx.Timeout(60.0, connect=10.0)
-    with httpx.Client(timeout=timeout) as http_client:
-        resp = http_client.post(url, headers=headers, json=body)
-        resp.raise_for_status()
-        return resp.json()
+    # Reuse the application-wide pooled client; keep timeouts bounded so API
+    # failures degrade gracefully to fallbacks.
+    with span("model_call", model=model):
+        result = hf_client.post_chat_completion(body)
+    if isinstance(result, dict):
+        record_usage(model, result.get("usage"))
+    if _is_cacheable_completion(result, validate):
+        llm_cache.set(cache_key, result)
+    return result
 
 
-def _stream_model_completion(client, prompt, model, max_tokens, temperature):
+def _stream_model_completion(client, prompt, model, max_tokens, temperature, use_cache=True, validate=None):
     """Yield text chunks for progressive UI updates.
 
-    Router streaming is possible, but to keep things robust and dependency-free,
-    we do a single completion request and chunk the result.
+    Consumes the router's OpenAI-compatible server-sent-event stream (`stream: true`)
+    and forwards each delta as it arrives. If the stream cannot be opened or breaks
+    before any text was produced, falls back to a single completion request whose
+    result is chunked. A failure after text has already been yielded is re-raised so
+    the caller can replace the partial output. Cached completions are replayed in chunks;
+    like `_run_model_completion`, only non-empty text passing `validate` is cached.
     """
+    cache_key = llm_cache.make_key(model, prompt, max_tokens, temperature)
+    if use_cache:
+        cached = llm_cache.get(cache_key)
+        if cached is not None and _is_cacheable_completion(cached, validate):
+            for piece in _chunk_text_for_streaming(_extract_generated_text(cached)):
+                yield piece
+            return
+
+    streamed_parts = []
+    try:
+        for piece in _iter_router_stream(prompt, model, max_tokens, temperature):
+            streamed_parts.append(piece)
+            yield piece
+        if streamed_parts:
+            streamed = {"choices": [{"message": {"role": "assistant", "content": "".join(streamed_parts)}}]}
+            if _is_cacheable_completion(streamed, validate):
+                llm_cache.set(cache_key, streamed)
+            return
+        logging.warning("Router stream returned no content, falling back to single completion")
+    except Exception as e:
+        if streamed_parts:
+            raise
+        logging.warning(f"Router streaming failed, falling back to single completion: {e}")
+
     result = _run_model_completion(
         client=client,
         prompt=prompt,
         model=model,
         max_tokens=max_tokens,
         temperature=temperature,
+        use_cache=False,
+        validate=validate,
     )
     full_text = _extract_generated_text(result)
     for piece in _chunk_text_for_streaming(full_text):
         yield piece
 
 
+def _iter_router_stream(prompt, model, max_tokens, temperature):
+    """Yield content deltas from a streaming chat completion on the HF router."""
+    body = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "stream": True,
+    }
+    request_start = time.perf_counter()
+    first_token_logged = False
+    with span("model_stream", model=model), hf_client.call_slot(), hf_client.router_breaker.stream_call(hf_client.is_router_failure) as first_chunk, hf_client.get_hf_client().stream(
+        "POST",
+        hf_client.chat_completions_url(),
+        headers={**hf_client.auth_headers(), "Accept": "text/event-stream"},
+        json=body,
+        timeout=hf_client.stream_timeout(),
+    ) as resp:
+        resp.raise_for_status()
+        for line in resp.iter_lines():
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            if isinstance(chunk, dict) and chunk.get("error"):
+                raise RuntimeError(f"Router stream error: {chunk['error']}")
+            # The breaker judges the router by how fast it starts answering, not by generation length.
+            first_chunk()
+            if isinstance(chunk, dict) and chunk.get("usage"):
+                record_usage(model, chunk["usage"])
+            text = _extract_stream_chunk_text(chunk)
+            if not text:
+                continue
+            if not first_token_logged:
+                first_token_logged = True
+                first_token_seconds = time.perf_counter() - request_start
+                record("model_first_token", first_token_seconds, model=model)
+                logging.info(f"Router stream first token after {first_token_seconds:.2f}s")
+            yield text
+
+
 def _extract_stream_chunk_text(chunk):
     """Extract incremental text from HF stream chunk object/dict shapes."""
     try:
@@ -480,6 +1775,7 @@ def _chunk_text_for_streaming(text: str, chunk_size: int = 28):
         yield text[i:i + chunk_size]
 
 
+@timed("quality_check")
 def _is_low_quality_summary(text):
     """Detect summaries that look like raw note dumps or malformed model output."""
     if not text or len(text.strip()) < 120:
@@ -502,48 +1798,11 @@ def _is_low_quality_summary(text):
     return False
 
 
-def _build_structured_summary_fallback(reports, student):
+def _build_structured_summary_fallback(reports, student, section_index: Optional[SectionIndex] = None):
     """Build a section-based clinical summary from report content when AI main summary fails."""
+    section_index = ensure_section_index(section_index, reports)
     therapy_label = reports[0].therapy_type if reports and reports[0].therapy_type else "Therapy"
 
-    therapy_sections = {
-        "Speech Therapy": [
-            "Receptive Language Skills (Comprehension)",
-            "Expressive Language Skills",
-            "Oral Motor & Oral Placement Therapy (OPT) Goals",
-            "Pragmatic Language Skills (Social Communication)",
-            "Narrative Skills",
-        ],
-        "Behavioral Therapy": [
-            "Behavior Regulation & Self-Control",
-            "Attention, Compliance & Task Engagement",
-            "Emotional Regulation Skills",
-            "Social Behavior & Interaction Skills",
-            "Adaptive Behavior & Functional Skills",
-        ],
-        "Cognitive Therapy": [
-            "Attention & Concentration Skills",
-            "Memory & Recall Skills",
-            "Problem Solving & Reasoning Skills",
-            "Executive Functioning Skills",
-            "Cognitive Flexibility & Processing Skills",
-        ],
-        "Occupational Therapy": [
-            "Fine Motor Skills",
-            "Sensory Processing & Integration",
-            "Visual-Motor Integration Skills",
-            "Activities of Daily Living (ADL)",
-            "Handwriting & Pre-Academic Skills",
-        ],
-        "Physical Therapy": [
-            "Gross Motor Skills",
-            "Balance & Postural Control",
-            "Strength & Endurance",
-            "Coordination & Motor Planning",
-            "Functional Mobility Skills",
-        ],
-    }
-
     def _clean_text(text):
         if not text:
             return ""
@@ -581,8 +1840,8 @@ def _build_structured_summary_fallback(reports, student):
 
         return sentence_1
 
-    ordered_titles = therapy_sections.get(therapy_label, [])
-    extracted_titles = _extract_section_titles(reports)
+    ordered_titles = THERAPY_SECTIONS.get(therapy_label, [])
+    extracted_titles = _extract_section_titles(reports, section_index=section_index)
     if not ordered_titles:
         ordered_titles = extracted_titles
     else:
@@ -597,7 +1856,7 @@ def _build_structured_summary_fallback(reports, student):
         for title in ordered_titles:
             section_notes = []
             for report in reports:
-                note = _extract_section_content(report, title)
+                note = section_index.section_content(report, title)
                 note = _clean_text(note)
                 if note:
                     section_notes.append(note)
@@ -964,114 +2223,15 @@ def _build_main_summary_prompt(reports, student):
     return prompt
 
 
-def _calculate_improvement_metrics(reports):
-    """Calculate quantitative improvement metrics from actual report data."""
-    from collections import Counter
-    
-    if not reports:
-        return {"error": "No reports available for analysis"}
-    
-    # Analyze progress levels over time
-    progress_levels = [r.progress_level for r in reports if r.progress_level]
-    progress_counter = Counter(progress_levels)
-    
-    # Therapy type analysis  
-    therapy_types = [r.therapy_type for r in reports if r.therapy_type]
-    therapy_counter = Counter(therapy_types)
-    
-    # Calculate actual session frequency
-    if len(reports) > 1:
-        dates = [r.report_date for r in reports]
-        dates.sort()
-        total_days = (dates[-1] - dates[0]).days
-        avg_frequency = total_days / (len(reports) - 1) if len(reports) > 1 else 0
-        frequency_desc = f"{avg_frequency:.1f} days between sessions"
-    else:
-        frequency_desc = "Single session only"
-    
-    # Analyze actual improvement trend
-    improvement_trend = _analyze_actual_improvement_trend(reports)
-    
-    # Calculate consistency from actual data
-    consistency = _calculate_actual_consistency(reports)
-    
-    return {
-        "total_sessions": len(reports),
-        "therapy_types_count": len(therapy_counter),
-        "most_common_therapy": therapy_counter.most_common(1)[0] if therapy_counter else ("None", 0),
-        "progress_distribution": dict(progress_counter),
-        "session_frequency": frequency_desc,
-        "consistency_score": consistency,
-        "improvement_trend": improvement_trend,
-        "date_span_days": (reports[-1].report_date - reports[0].report_date).days if len(reports) > 1 else 0
-    }
-
-
-def _analyze_actual_improvement_trend(reports):
-    """Analyze improvement trend from actual progress level data."""
-    if len(reports) < 2:
-        return "Insufficient data for trend analysis"
-    
-    # Map progress levels to numbers for calculation
-    level_map = {
-        "Poor": 1, "Below Average": 2, "Average": 3, 
-        "Good": 4, "Very Good": 5, "Excellent": 6
-    }
-    
-    # Get numerical scores for reports with progress levels
-    scores = []
-    for report in reports:
-        if report.progress_level and report.progress_level in level_map:
-            scores.append(level_map[report.progress_level])
-    
-    if len(scores) < 2:
-        return "No progress levels available for comparison"
-    
-    # Calculate actual trend
-    start_avg = sum(scores[:len(scores)//3]) / len(scores[:len(scores)//3]) if len(scores) >= 3 else scores[0]
-    end_avg = sum(scores[-len(scores)//3:]) / len(scores[-len(scores)//3:]) if len(scores) >= 3 else scores[-1]
-    
-    improvement = end_avg - start_avg
-    
-    if improvement > 1.5:
-        return "Significant improvement demonstrated"
-    elif improvement > 0.5:
-        return "Moderate improvement shown"
-    elif improvement > 0:
-        return "Slight improvement noted"
-    elif improvement == 0:
-        return "Stable performance maintained"
-    else:
-        return "Performance decline noted - needs attention"
-
+def _calculate_improvement_metrics(reports, progress_stats=None):
+    """Calculate quantitative improvement metrics from actual report data.
 
-def _calculate_actual_consistency(reports):
-    """Calculate therapy consistency from actual attendance data."""
-    if len(reports) < 3:
-        return "Need more sessions for consistency analysis"
-    
-    dates = [r.report_date for r in reports]
-    dates.sort()
-    
-    # Calculate intervals between sessions
-    intervals = [(dates[i+1] - dates[i]).days for i in range(len(dates)-1)]
-    
-    if not intervals:
-        return "Cannot calculate consistency"
-    
-    avg_interval = sum(intervals) / len(intervals)
-    
-    # Calculate standard deviation
-    variance = sum((x - avg_interval) ** 2 for x in intervals) / len(intervals)
-    std_dev = variance ** 0.5
-    
-    # Consistency scoring based on actual data
-    if std_dev <= 3:
-        return "Highly consistent attendance"
-    elif std_dev <= 7:
-        return "Moderately consistent attendance" 
-    else:
-        return "Variable attendance pattern"
+    Uses the student's running aggregates when they cover exactly `reports` (no
+    date or therapy type filter), otherwise computes them from the reports.
+    """
+    if crud.progress_stats.covers(progress_stats, reports):
+        return progress_stats_metrics(progress_stats)
+    return improvement_metrics(metric_rows(reports))
 
 
 def _extract_student_strengths(reports):
@@ -1171,8 +2331,9 @@ def _analyze_progress_journey(reports):
     return f"Progress tracked from {progress_levels[0]} to {progress_levels[-1]}"
 
 
-def _generate_fallback_analysis(reports, student, payload, metrics, date_range):
+def _generate_fallback_analysis(reports, student, payload, metrics, date_range, section_index: Optional[SectionIndex] = None):
     """Generate data-driven analysis when AI is unavailable."""
+    section_index = ensure_section_index(section_index, reports)
     student_name = getattr(student, 'name', 'Student')
     
     # Create analysis based on actual data without AI
@@ -1209,8 +2370,9 @@ def _generate_fallback_analysis(reports, student, payload, metrics, date_range):
     # Recent achievements
     recent_achievements = []
     for report in recent_reports:
-        if report.goals_achieved and len(report.goals_achieved) > 10:
-            recent_achievements.append(report.goals_achieved[:50] + "...")
+        goals_text = section_index.readable_text(report)
+        if len(goals_text) > 10:
+            recent_achievements.append(goals_text[:50] + "...")
     
     if recent_achievements:
         end_analysis += f"Recent progress includes: {'; '.join(recent_achievements[-2:])}. "
@@ -1247,117 +2409,40 @@ def _generate_fallback_analysis(reports, student, payload, metrics, date_range):
 def _goals_to_readable_text(goals_achieved, max_length=500):
     """Convert goals_achieved (dict or JSON string) into readable text for prompts.
     Returns a string like 'Behavioral Management: notes here; Emotional Regulation: notes here'
-    instead of dumping raw dict/JSON."""
-    parsed = _parse_goals_achieved(goals_achieved)
-    if parsed is None:
-        if isinstance(goals_achieved, str) and goals_achieved.strip():
-            return goals_achieved.strip()[:max_length]
-        return ""
-    
-    parts = []
-    for key, value in parsed.items():
-        if isinstance(value, dict):
-            label = value.get('label', key)
-            notes = value.get('notes', '').strip()
-            if notes:
-                parts.append(f"{label}: {notes}")
-        elif isinstance(value, str) and value.strip():
-            parts.append(f"{key}: {value.strip()}")
-    
-    if not parts:
-        return ""
-    return "; ".join(parts)[:max_length]
+    instead of dumping raw dict/JSON. Prompt builders with a SectionIndex use
+    `section_index.readable_text(report)` instead, which parses each report only once."""
+    return ReportGoals(goals_achieved).readable_text(max_length)
 
 
-# ============================================================================
-# HELPER: Parse goals_achieved (may be JSON string or dict)
-# ============================================================================
-
-def _parse_goals_achieved(goals_achieved):
-    """Parse goals_achieved field which may be a JSON string, dict, or None.
-    Returns a dict or None."""
-    if goals_achieved is None:
-        return None
-    if isinstance(goals_achieved, dict):
-        return goals_achieved
-    if isinstance(goals_achieved, str):
-        try:
-            parsed = json.loads(goals_achieved)
-            if isinstance(parsed, dict):
-                return parsed
-        except (json.JSONDecodeError, TypeError):
-            logging.warning(f"Could not parse goals_achieved JSON string: {goals_achieved[:100]}")
-    return None
-
 # ============================================================================
 # FEW-SHOT PROMPT BUILDERS WITH PROFESSIONAL EXAMPLES
 # ============================================================================
 
-def _extract_section_titles(reports):
+def _extract_section_titles(reports, section_index: Optional[SectionIndex] = None):
     """Extract unique section titles from therapy reports' goals_achieved field."""
-    section_titles = set()
-    
-    for report in reports:
-        if report.goals_achieved:
-            parsed = _parse_goals_achieved(report.goals_achieved)
-            if isinstance(parsed, dict):
-                # Get section labels from the parsed dict values
-                for key, value in parsed.items():
-                    if isinstance(value, dict) and value.get('label'):
-                        section_titles.add(value['label'])
-                    else:
-                        section_titles.add(key)
-            elif isinstance(report.goals_achieved, str):
-                # Fallback: try to parse common section patterns from raw text
-                import re
-                matches = re.findall(r'^([A-Z][A-Za-z\s&(),]+(?:\s+and\s+[A-Z]+)?[A-Za-z\s]*):', report.goals_achieved, re.MULTILINE)
-                section_titles.update([m.strip() for m in matches if m.strip()])
-    
-    # Return as sorted list for consistency
-    return sorted(list(section_titles)) if section_titles else []
-
-
-def _extract_section_content(report, section_name):
+    return ensure_section_index(section_index, reports).section_titles(reports)
+
+
+def _extract_section_content(report, section_name, section_index: Optional[SectionIndex] = None):
     """Extract content for a specific section from a report - ONLY from matching section."""
-    if not report.goals_achieved:
-        return ""
-    
-    parsed = _parse_goals_achieved(report.goals_achieved)
-    
-    if isinstance(parsed, dict):
-        # Try matching by label first (new format), then by key
-        for key, value in parsed.items():
-            if isinstance(value, dict):
-                label = value.get('label', '')
-                notes = value.get('notes', '')
-                if (label == section_name or key == section_name) and notes and notes.strip():
-                    return notes.strip()[:300]
-            elif isinstance(value, str) and value.strip():
-                if key == section_name:
-                    return value.strip()[:300]
-        return ""
-    
-    # If goals_achieved is a raw string (not JSON), try regex extraction
-    if isinstance(report.goals_achieved, str):
-        import re
-        pattern = rf"^{re.escape(section_name)}:\s*(.*?)(?=\n[A-Z][A-Za-z\s&(),]+(?:\s+and\s+[A-Z]+)?[A-Za-z\s]*:|$)"
-        match = re.search(pattern, report.goals_achieved, re.DOTALL | re.MULTILINE)
-        if match:
-            return match.group(1).strip()[:300]
-    
-    return ""
+    return ensure_section_index(section_index, [report]).section_content(report, section_name)
 
 
 # ============================================================================
 # FEW-SHOT PROMPT BUILDERS WITH PROFESSIONAL EXAMPLES
 # ============================================================================
 
-def _build_overview_prompt_with_fewshot(reports, student):
+@timed("prompt_build")
+def _build_overview_prompt_with_fewshot(
+    reports, student, section_index: Optional[SectionIndex] = None, prompt_budget: Optional[PromptBudget] = None
+):
     """Build overview prompt with few-shot examples for better quality output."""
     student_name = getattr(student, 'name', 'Student')
+    section_index = ensure_section_index(section_index, reports)
+    prompt_budget = prompt_budget or PromptBudget()
     
     # Extract actual section titles from goals_achieved field
-    section_titles = _extract_section_titles(reports)
+    section_titles = section_index.section_titles(reports)
     
     # Few-shot examples matching the desired format
     prompt = """You are a clinical report summarization assistant for SPEECH THERAPY.
@@ -1419,9 +2504,14 @@ NOW GENERATE FOR THIS STUDENT:
         for title in section_titles:
             prompt += f"  - {title}\n"
     
+    closing = f"\nGenerate a consolidated PROGRESS SUMMARY using the exact section titles listed above. Start with 'PROGRESS SUMMARY' as the heading, then list each section with a description of the child's current abilities and progress:\n"
+    
     # Provide session data organized by sections
     prompt += f"\nSession Data by Section:\n"
-    for section in section_titles if section_titles else ["General Progress"]:
+    data_sections = section_titles if section_titles else ["General Progress"]
+    # Early and recent notes share each section's slice of the budget.
+    per_section_tokens = prompt_budget.available(prompt, closing) // len(data_sections)
+    for section in data_sections:
         prompt += f"\n{section}:\n"
         
         # Extract notes related to this section from early and recent sessions
@@ -1429,28 +2519,32 @@ NOW GENERATE FOR THIS STUDENT:
         recent_notes = []
         
         for report in reports[:min(3, len(reports))]:  # Early sessions
-            note = _extract_section_content(report, section)
+            note = section_index.section_content(report, section)
             if note:
                 early_notes.append(note)
         
         for report in reports[-min(3, len(reports)):]:  # Recent sessions
-            note = _extract_section_content(report, section)
+            note = section_index.section_content(report, section)
             if note:
                 recent_notes.append(note)
         
         if early_notes:
-            prompt += f"  Early sessions: {' '.join(early_notes[:2])}\n"
+            early_text = prompt_budget.clip(' '.join(early_notes[:2]), per_section_tokens // 2)
+            prompt += f"  Early sessions: {early_text}\n"
         if recent_notes:
-            prompt += f"  Recent sessions: {' '.join(recent_notes[:2])}\n"
+            recent_text = prompt_budget.clip(' '.join(recent_notes[:2]), per_section_tokens // 2)
+            prompt += f"  Recent sessions: {recent_text}\n"
     
-    prompt += f"\nGenerate a consolidated PROGRESS SUMMARY using the exact section titles listed above. Start with 'PROGRESS SUMMARY' as the heading, then list each section with a description of the child's current abilities and progress:\n"
+    prompt += closing
     
     return prompt
 
 
-def _build_start_analysis_prompt_with_fewshot(start_reports, student):
+@timed("prompt_build")
+def _build_start_analysis_prompt_with_fewshot(start_reports, student, section_index: Optional[SectionIndex] = None):
     """Build start analysis prompt with few-shot examples."""
     student_name = getattr(student, 'name', 'Student')
+    section_index = ensure_section_index(section_index, start_reports)
     
     prompt = """You are a clinical report summarization assistant.
 
@@ -1482,7 +2576,7 @@ NOW ANALYZE THIS STUDENT'S BASELINE:
     for i, report in enumerate(start_reports, 1):
         if report.progress_notes:
             prompt += f"- {report.progress_notes[:200]}\n"
-        goals_text = _goals_to_readable_text(report.goals_achieved, 200)
+        goals_text = section_index.readable_text(report, 200)
         if goals_text:
             prompt += f"  Goals: {goals_text}\n"
     
@@ -1491,9 +2585,13 @@ NOW ANALYZE THIS STUDENT'S BASELINE:
     return prompt
 
 
-def _generate_enhanced_current_status_llama(client, end_reports, student, payload):
-    """Generate current status using Llama with few-shot examples."""
+def _generate_enhanced_current_status_llama(client, end_reports, student, payload, section_index: Optional[SectionIndex] = None):
+    """Generate current status using Llama with few-shot examples.
+
+    Model errors propagate so the caller records the section as a fallback.
+    """
     student_name = getattr(student, 'name', 'Student')
+    section_index = ensure_section_index(section_index, end_reports)
     
     prompt = """You are a clinical report summarization assistant.
 
@@ -1525,29 +2623,28 @@ NOW ANALYZE THIS STUDENT'S CURRENT STATUS:
     for report in end_reports:
         if report.progress_notes:
             prompt += f"- {report.progress_notes[:200]}\n"
-        goals_text = _goals_to_readable_text(report.goals_achieved, 200)
+        goals_text = section_index.readable_text(report, 200)
         if goals_text:
             prompt += f"  Observations: {goals_text}\n"
     
     prompt += f"\nDescribe {student_name}'s current abilities and functioning level based on the notes above. Only describe what the notes say - do not invent details:\n"
     
-    try:
-        result = _run_model_completion(
-            client=client,
-            prompt=prompt,
-            model=payload.model or "meta-llama/Llama-3.3-70B-Instruct",
-            max_tokens=350,
-            temperature=0.3
-        )
-        return _extract_generated_text(result)
-    except Exception as e:
-        logging.warning(f"Llama current status failed: {e}, using fallback")
-        return _build_basic_current_status(end_reports, student)
+    result = _run_model_completion(
+        client=client,
+        prompt=prompt,
+        model=payload.model or "meta-llama/Llama-3.3-70B-Instruct",
+        max_tokens=350,
+        temperature=0.3,
+        use_cache=not getattr(payload, "bypass_cache", False),
+    )
+    return _extract_generated_text(result)
 
 
-def _build_recommendations_prompt_with_fewshot(reports, metrics, student):
+@timed("prompt_build")
+def _build_recommendations_prompt_with_fewshot(reports, metrics, student, prompt_budget: Optional[PromptBudget] = None):
     """Build recommendations prompt with few-shot examples."""
     student_name = getattr(student, 'name', 'Student')
+    prompt_budget = prompt_budget or PromptBudget()
     
     prompt = """You are a clinical report summarization assistant.
 
@@ -1573,164 +2670,78 @@ NOW GENERATE RECOMMENDATIONS FOR:
     prompt += f"Student Name: {student_name}\n"
     prompt += f"Total Sessions Completed: {len(reports)}\n"
     
+    closing = f"\nGenerate professional recommendations for {student_name} based on the progress shown:\n"
+    
     # Add early to later progression narrative
     if len(reports) >= 2:
+        # At most two early and two recent notes.
+        per_note_tokens = prompt_budget.available(prompt, closing) // 4
         prompt += f"\nEarly Sessions Context:\n"
         for report in reports[:min(2, len(reports))]:
             if report.progress_notes:
-                prompt += f"- {report.progress_notes[:150]}\n"
+                prompt += f"- {prompt_budget.clip(report.progress_notes[:150], per_note_tokens)}\n"
         
         prompt += f"\nRecent Sessions Context:\n"
         for report in reports[-min(2, len(reports)):]:
             if report.progress_notes:
-                prompt += f"- {report.progress_notes[:150]}\n"
+                prompt += f"- {prompt_budget.clip(report.progress_notes[:150], per_note_tokens)}\n"
     
-    prompt += f"\nGenerate professional recommendations for {student_name} based on the progress shown:\n"
+    prompt += closing
     
     return prompt
 
 
-def _build_main_summary_prompt_with_fewshot(reports, student):
-    """Build main summary prompt with section-based bullet point format."""
-    import logging
-    
-    student_name = getattr(student, 'name', 'Student')
-    
+def _resolve_summary_sections(reports, section_index: SectionIndex):
+    """Therapy type, section titles and section matcher used to group the reports' notes."""
     # Detect therapy type from reports
     therapy_type = None
     if reports and reports[0].therapy_type:
         therapy_type = reports[0].therapy_type
     
-    # Define exact 5 sections for each therapy type (matching frontend)
-    therapy_sections = {
-        "Speech Therapy": [
-            "Receptive Language Skills (Comprehension)",
-            "Expressive Language Skills",
-            "Oral Motor & Oral Placement Therapy (OPT) Goals",
-            "Pragmatic Language Skills (Social Communication)",
-            "Narrative Skills"
-        ],
-        "Behavioral Therapy": [
-            "Behavior Regulation & Self-Control",
-            "Attention, Compliance & Task Engagement",
-            "Emotional Regulation Skills",
-            "Social Behavior & Interaction Skills",
-            "Adaptive Behavior & Functional Skills"
-        ],
-        "Cognitive Therapy": [
-            "Attention & Concentration Skills",
-            "Memory & Recall Skills",
-            "Problem Solving & Reasoning Skills",
-            "Executive Functioning Skills",
-            "Cognitive Flexibility & Processing Skills"
-        ],
-        "Occupational Therapy": [
-            "Fine Motor Skills",
-            "Sensory Processing & Integration",
-            "Visual-Motor Integration Skills",
-            "Activities of Daily Living (ADL)",
-            "Handwriting & Pre-Academic Skills"
-        ],
-        "Physical Therapy": [
-            "Gross Motor Skills",
-            "Balance & Postural Control",
-            "Strength & Endurance",
-            "Coordination & Motor Planning",
-            "Functional Mobility Skills"
-        ]
-    }
-    
-    # Get the 5 sections for this therapy type
-    predefined_sections = therapy_sections.get(therapy_type, therapy_sections["Speech Therapy"])
-    
-    # CRITICAL: Build mappings from old/alternate labels AND keys to standard sections
-    # This handles reports saved with getGoalsForTherapyType() (old labels) and key variations
-    label_aliases = {
-        # Behavioral Therapy aliases (getGoalsForTherapyType used different labels)
-        "Behavioral Management": "Behavior Regulation & Self-Control",
-        "Emotional Regulation": "Emotional Regulation Skills",
-        "Social Skills": "Social Behavior & Interaction Skills",
-        "Coping Strategies": "Adaptive Behavior & Functional Skills",
-        # Occupational Therapy aliases
-        "Fine Motor Skills": "Fine Motor Skills",
-        "Gross Motor Skills": "Gross Motor Skills",  
-        "Daily Living Activities": "Activities of Daily Living (ADL)",
-        "Sensory Integration": "Sensory Processing & Integration",
-        # Physical Therapy aliases
-        "Strength & Endurance": "Strength & Endurance",
-        "Flexibility & Range of Motion": "Coordination & Motor Planning",
-        "Balance & Coordination": "Balance & Postural Control",
-        "Mobility & Gait": "Functional Mobility Skills",
-    }
-    
-    # Key-based aliases: map JSON keys to standard section titles
-    key_aliases = {
-        # Behavioral Therapy keys
-        "behavior_regulation": "Behavior Regulation & Self-Control",
-        "behavioral_management": "Behavior Regulation & Self-Control",
-        "attention_compliance": "Attention, Compliance & Task Engagement",
-        "emotional_regulation": "Emotional Regulation Skills",
-        "social_behavior": "Social Behavior & Interaction Skills",
-        "social_skills": "Social Behavior & Interaction Skills",
-        "adaptive_behavior": "Adaptive Behavior & Functional Skills",
-        "coping_strategies": "Adaptive Behavior & Functional Skills",
-    }
+    # Get the 5 sections for this therapy type; their alias/keyword matchers are prebuilt
+    # (old labels from getGoalsForTherapyType() and JSON key variations included).
+    if therapy_type in SECTION_MATCHERS:
+        matcher = SECTION_MATCHERS[therapy_type]
+    else:
+        matcher = SECTION_MATCHERS["Speech Therapy"]
+    predefined_sections = list(matcher.titles)
     
     # First, detect what labels actually exist in the reports
-    actual_labels_in_reports = set()
-    actual_keys_in_reports = set()
-    for report in reports:
-        parsed = _parse_goals_achieved(report.goals_achieved)
-        if isinstance(parsed, dict):
-            for key, value in parsed.items():
-                actual_keys_in_reports.add(key)
-                if isinstance(value, dict):
-                    label = value.get('label', '').strip()
-                    if label:
-                        actual_labels_in_reports.add(label)
-    
-    logging.info(f"="*60)
-    logging.info(f"AI SUMMARY EXTRACTION DEBUG INFO:")
-    logging.info(f"Actual labels in reports: {actual_labels_in_reports}")
-    logging.info(f"Actual keys in reports: {actual_keys_in_reports}")
-    logging.info(f"Predefined sections for {therapy_type}: {predefined_sections}")
-    logging.info(f"="*60)
-    
-    # Build reverse lookup: for each predefined section, which labels/keys should match?
-    section_to_aliases = {}
-    section_to_key_aliases = {}
-    for section in predefined_sections:
-        # Label aliases
-        aliases = {section, section.lower()}
-        for old_label, mapped_section in label_aliases.items():
-            if mapped_section == section:
-                aliases.add(old_label)
-                aliases.add(old_label.lower())
-        section_to_aliases[section] = aliases
-        
-        # Key aliases
-        key_alias_set = set()
-        for key, mapped_section in key_aliases.items():
-            if mapped_section == section:
-                key_alias_set.add(key)
-                key_alias_set.add(key.lower())
-        section_to_key_aliases[section] = key_alias_set
+    actual_labels_in_reports, actual_keys_in_reports = section_index.labels_and_keys(reports)
+    
+    logging.debug(f"Actual labels in reports: {actual_labels_in_reports}")
+    logging.debug(f"Actual keys in reports: {actual_keys_in_reports}")
+    logging.debug(f"Predefined sections for {therapy_type}: {predefined_sections}")
     
     # Check if ANY predefined section matches any report label
-    any_match = False
-    for section in predefined_sections:
-        for actual_label in actual_labels_in_reports:
-            if actual_label in section_to_aliases.get(section, set()) or actual_label == section:
-                any_match = True
-                break
+    any_match = any(matcher.has_alias(label) for label in actual_labels_in_reports)
     
     # If no predefined sections match, use the actual labels from reports instead
     if not any_match and actual_labels_in_reports:
         logging.warning(f"No predefined sections matched report labels. Using actual labels from reports.")
         section_titles = sorted(list(actual_labels_in_reports))
+        matcher = SectionMatcher(section_titles)
     else:
         section_titles = predefined_sections
     
+    return therapy_type, section_titles, matcher
+
+
+@timed("prompt_build")
+def _build_main_summary_prompt_with_fewshot(
+    reports, student, section_index: Optional[SectionIndex] = None, prompt_budget: Optional[PromptBudget] = None
+):
+    """Build main summary prompt with section-based bullet point format.
+
+    Session notes are fitted to `prompt_budget`: each active section gets an equal
+    share of the tokens left after the instructions, and the most recent and most
+    informative notes are kept when a section's notes do not fit.
+    """
+    student_name = getattr(student, 'name', 'Student')
+    section_index = ensure_section_index(section_index, reports)
+    prompt_budget = prompt_budget or PromptBudget()
+    therapy_type, section_titles, matcher = _resolve_summary_sections(reports, section_index)
+    
     # Build prompt with therapy-specific context
     therapy_label = therapy_type if therapy_type else "Therapy"
     
@@ -1838,104 +2849,9 @@ REQUIRED SECTIONS (Use these EXACT titles in this EXACT order, with ** bold mark
 """
     
     # ── PRE-COLLECT notes per section so we know which sections have data ──
-    section_notes_map = {}  # title -> list of notes
+    section_notes_map = section_index.notes_by_section(reports, matcher)
     for title in section_titles:
-        all_notes = []
-        title_lower = title.lower().strip()
-        aliases = section_to_aliases.get(title, {title, title_lower})
-        title_clean = re.sub(r'[^a-z0-9\s]', ' ', title_lower)
-        title_keywords = set(title_clean.split()) - {'and', 'the', 'of', 'for', 'in', 'skills', 'a', ''}
-        
-        logging.info(f"\n--- Searching for section: '{title}' ---")
-        logging.info(f"  Title keywords: {title_keywords}")
-        logging.info(f"  Known aliases: {aliases}")
-        logging.info(f"  Key aliases: {section_to_key_aliases.get(title, set())}")
-        
-        for report in reports:
-            parsed = _parse_goals_achieved(report.goals_achieved)
-            if isinstance(parsed, dict):
-                logging.info(f"Processing report ID={report.id} for section '{title}': keys={list(parsed.keys())}")
-                
-                for key, value in parsed.items():
-                    if isinstance(value, dict):
-                        label = value.get('label', '').strip()
-                        notes = value.get('notes', '')
-                        has_notes = notes and notes.strip()
-                        
-                        if not has_notes:
-                            continue
-                        
-                        label_match = False
-                        match_reason = None
-                        
-                        key_normalized = key.lower().replace('_', ' ').strip()
-                        key_clean = re.sub(r'[^a-z0-9\\s]', ' ', key_normalized)
-                        key_words = set(key_clean.split()) - {'and', 'the', 'of', 'for', 'in', 'skills', 'a', ''}
-                        
-                        if label == title:
-                            label_match = True
-                            match_reason = "exact label match"
-                        
-                        if not label_match and (label in aliases or label.lower() in aliases):
-                            label_match = True
-                            match_reason = "alias match"
-                        
-                        if not label_match and label and label.lower().strip() == title_lower:
-                            label_match = True
-                            match_reason = "case-insensitive exact match"
-                        
-                        if not label_match:
-                            key_lower = key.lower().strip()
-                            if key_lower in section_to_key_aliases.get(title, set()):
-                                label_match = True
-                                match_reason = "explicit key alias"
-                        
-                        if not label_match and key_words:
-                            matching_words = key_words & title_keywords
-                            if len(matching_words) >= 2:
-                                label_match = True
-                                match_reason = f"keyword match (2+ words): {matching_words}"
-                            elif len(key_words) == 1 and key_words.issubset(title_keywords):
-                                label_match = True
-                                match_reason = f"single keyword match: {key_words}"
-                        
-                        if not label_match:
-                            for alias in aliases:
-                                alias_clean = re.sub(r'[^a-z0-9\s]', ' ', alias.lower())
-                                alias_keywords = set(alias_clean.split()) - {'and', 'the', 'of', 'for', 'in', 'skills', 'a', ''}
-                                if key_words and alias_keywords:
-                                    matching = key_words & alias_keywords
-                                    if len(matching) >= 2 or (len(key_words) == 1 and key_words.issubset(alias_keywords)):
-                                        label_match = True
-                                        match_reason = f"alias keyword match via '{alias}': {matching}"
-                                        break
-                        
-                        if not label_match and label:
-                            label_cleaned = re.sub(r'[^a-z0-9\s]', ' ', label.lower())
-                            title_cleaned = re.sub(r'[^a-z0-9\s]', ' ', title_lower)
-                            label_words = set(label_cleaned.split()) - {'and', 'the', 'of', 'for', 'in', 'skills', 'a', ''}
-                            title_words_full = set(title_cleaned.split()) - {'and', 'the', 'of', 'for', 'in', 'skills', 'a', ''}
-                            if label_words and title_words_full:
-                                overlap = label_words & title_words_full
-                                min_words = min(len(label_words), len(title_words_full))
-                                required_matches = max(2, int(0.8 * min_words))
-                                if len(overlap) >= required_matches:
-                                    label_match = True
-                                    match_reason = f"substring/overlap match ({len(overlap)}/{min_words} words): {overlap}"
-                        
-                        if label_match:
-                            logging.info(f"  ✓ MATCH - Key='{key}', Label='{label}', Reason={match_reason}")
-                            all_notes.append(notes.strip())
-                        else:
-                            logging.debug(f"  ✗ No match - Key='{key}', Label='{label}'")
-                    elif isinstance(value, str) and value.strip():
-                        if title.lower().replace(' ', '_').startswith(key.lower().replace(' ', '_')[:10]):
-                            all_notes.append(value)
-            else:
-                logging.warning(f"Report ID={report.id}: goals_achieved could not be parsed (type={type(report.goals_achieved)})")
-        
-        logging.info(f"Section '{title}': Found {len(all_notes)} notes")
-        section_notes_map[title] = all_notes
+        logging.debug(f"Section '{title}': Found {len(section_notes_map[title])} notes")
     
     # ── Filter to only sections that have notes ──
     active_sections = [t for t in section_titles if section_notes_map.get(t)]
@@ -1951,76 +2867,348 @@ REQUIRED SECTIONS (Use these EXACT titles in this EXACT order, with ** bold mark
     prompt += f"\nSession Notes by Section:\n"
     prompt += f"⚠️ CRITICAL RULE: For EACH section below, use ONLY the notes listed under that section's heading. DO NOT move notes between sections. ⚠️\n"
     
+    reminders = f"\nIMPORTANT REMINDERS:\n"
+    reminders += f"- Write 2-3 sentences per bullet point (• symbol) based ONLY on the session notes above\n"
+    reminders += f"- ONLY generate the {len(active_sections)} sections listed above — do NOT add extra sections or write 'No documented data'\n"
+    reminders += f"- For each section: paraphrase and synthesize the notes faithfully — do NOT add information not in the notes\n"
+    reminders += f"- SECTION ISOLATION: each section's bullets must ONLY use notes from THAT section — never borrow notes from other sections\n"
+    if is_single_session:
+        reminders += f"- SINGLE SESSION: Do NOT use improvement/progression language. Use: 'demonstrated', 'attempted', 'practiced', 'worked on', 'with support', 'emerging', 'during the session'\n"
+        reminders += f"- SINGLE SESSION: Goals listed in notes are targets that were WORKED ON — do not claim they were achieved or improved\n"
+    reminders += f"- If notes describe inconsistent or uneven progress, your summary MUST reflect that - do NOT reframe as improvement\n"
+    reminders += f"- NEVER fabricate specific techniques, tools, or strategies not mentioned in the notes\n"
+    reminders += f"\n**ABSOLUTE BAN ON RECOMMENDATIONS:**\n"
+    reminders += f"- DO NOT write: 'support is needed', 'further work is indicated', 'continued practice', 'therapist should', 'it is recommended', 'would benefit from'\n"
+    
+    reminders += f"\n🔒 FINAL REMINDER - SECTION ISOLATION:\n"
+    reminders += f"Each section is separated by ━━━ dividers above. When writing bullets for 'Behavior Regulation & Self-Control', use ONLY notes under that heading.\n"
+    reminders += f"Do NOT copy notes from 'Emotional Regulation Skills' into 'Behavior Regulation & Self-Control' even if they mention similar topics.\n"
+    reminders += f"If a note appears under Section A's heading, it belongs ONLY in Section A's output - NEVER in Section B, C, D, or E.\n"
+    reminders += f"- ONLY describe what WAS observed or attempted — past tense, descriptive language ONLY\n"
+    reminders += f"- This is a progress SUMMARY (describing what happened), NOT a treatment plan\n"
+    reminders += f"\n- Match the EXACT tone of the notes: uncertain notes = uncertain summary, negative notes = honest summary\n"
+    reminders += f"- Use bold **section titles** for each section\n"
+    reminders += f"\nSTART YOUR RESPONSE WITH: '{therapy_label} – Progress Summary'\n"
+    
+    section_headers = {
+        title: f"\n━━━ {title} ━━━\n(Write 2-3 bullets using ONLY the notes below)\n" for title in active_sections
+    }
+    notes_budget = prompt_budget.available(prompt, reminders, *section_headers.values())
+    per_section_tokens = notes_budget // max(1, len(active_sections))
+    
     # Provide section data — only sections that have notes
     for title in active_sections:
         all_notes = section_notes_map[title]
-        prompt += f"\n━━━ {title} ━━━\n"
-        prompt += f"(Write 2-3 bullets using ONLY the notes below)\n"
+        prompt += section_headers[title]
         
         if len(reports) == 1:
-            for idx, note in enumerate(all_notes, 1):
-                prompt += f"  [{idx}] {note[:300]}\n"
+            notes = [note[:300] for note in all_notes]
+            kept = prompt_budget.select_notes(notes, per_section_tokens)
+            for idx, note_idx in enumerate(kept, 1):
+                prompt += f"  [{idx}] {prompt_budget.clip(notes[note_idx], per_section_tokens)}\n"
         elif len(all_notes) >= 3:
-            prompt += f"  [1] Session 1: {all_notes[0][:250]}\n"
-            prompt += f"  [2] Mid-point: {all_notes[len(all_notes)//2][:250]}\n"
-            prompt += f"  [3] Latest: {all_notes[-1][:250]}\n"
+            per_note_tokens = per_section_tokens // 3
+            prompt += f"  [1] Session 1: {prompt_budget.clip(all_notes[0][:250], per_note_tokens)}\n"
+            prompt += f"  [2] Mid-point: {prompt_budget.clip(all_notes[len(all_notes)//2][:250], per_note_tokens)}\n"
+            prompt += f"  [3] Latest: {prompt_budget.clip(all_notes[-1][:250], per_note_tokens)}\n"
         elif len(all_notes) == 2:
-            prompt += f"  [1] First: {all_notes[0][:250]}\n"
-            prompt += f"  [2] Second: {all_notes[-1][:250]}\n"
+            per_note_tokens = per_section_tokens // 2
+            prompt += f"  [1] First: {prompt_budget.clip(all_notes[0][:250], per_note_tokens)}\n"
+            prompt += f"  [2] Second: {prompt_budget.clip(all_notes[-1][:250], per_note_tokens)}\n"
         else:
-            prompt += f"  [1] {all_notes[0][:250]}\n"
+            prompt += f"  [1] {prompt_budget.clip(all_notes[0][:250], per_section_tokens)}\n"
     
     # SAFETY NET: If ALL sections have no notes, include raw progress_notes as general context
     # This handles cases where goals_achieved labels don't match any section
-    all_sections_empty = True
-    for title in section_titles:
-        # Re-check quickly
-        for report in reports:
-            parsed = _parse_goals_achieved(report.goals_achieved)
-            if isinstance(parsed, dict):
-                for key, value in parsed.items():
-                    if isinstance(value, dict) and value.get('notes', '').strip():
-                        # There ARE notes in the data, they just didn't match sections
-                        all_sections_empty = False
-                        break
-            if not all_sections_empty:
-                break
-        if not all_sections_empty:
-            break
+    all_sections_empty = not section_index.has_any_notes(reports)
     
     if all_sections_empty:
-        # Dump ALL available notes as general context
-        prompt += f"\n--- ADDITIONAL CONTEXT (notes from reports that did not match specific sections) ---\n"
+        # Dump available notes as general context, latest and most informative first when over budget
+        context_blocks = []
         for report in reports:
+            block = ""
             if report.progress_notes and report.progress_notes.strip():
-                prompt += f"  Progress notes: {report.progress_notes.strip()[:300]}\n"
-            goals_text = _goals_to_readable_text(report.goals_achieved, 400)
+                block += f"  Progress notes: {report.progress_notes.strip()[:300]}\n"
+            goals_text = section_index.readable_text(report, 400)
             if goals_text:
-                prompt += f"  Goal notes: {goals_text}\n"
-        prompt += f"--- END ADDITIONAL CONTEXT ---\n"
-        prompt += f"\nNOTE: The above notes did not match the predefined section titles. Distribute the information across the most relevant sections. Do NOT leave sections marked 'No documented data' if relevant notes exist above.\n"
-    
-    prompt += f"\nIMPORTANT REMINDERS:\n"
-    prompt += f"- Write 2-3 sentences per bullet point (• symbol) based ONLY on the session notes above\n"
-    prompt += f"- ONLY generate the {len(active_sections)} sections listed above — do NOT add extra sections or write 'No documented data'\n"
-    prompt += f"- For each section: paraphrase and synthesize the notes faithfully — do NOT add information not in the notes\n"
-    prompt += f"- SECTION ISOLATION: each section's bullets must ONLY use notes from THAT section — never borrow notes from other sections\n"
-    if is_single_session:
-        prompt += f"- SINGLE SESSION: Do NOT use improvement/progression language. Use: 'demonstrated', 'attempted', 'practiced', 'worked on', 'with support', 'emerging', 'during the session'\n"
-        prompt += f"- SINGLE SESSION: Goals listed in notes are targets that were WORKED ON — do not claim they were achieved or improved\n"
-    prompt += f"- If notes describe inconsistent or uneven progress, your summary MUST reflect that - do NOT reframe as improvement\n"
-    prompt += f"- NEVER fabricate specific techniques, tools, or strategies not mentioned in the notes\n"
-    prompt += f"\n**ABSOLUTE BAN ON RECOMMENDATIONS:**\n"
-    prompt += f"- DO NOT write: 'support is needed', 'further work is indicated', 'continued practice', 'therapist should', 'it is recommended', 'would benefit from'\n"
-    
-    prompt += f"\n🔒 FINAL REMINDER - SECTION ISOLATION:\n"
-    prompt += f"Each section is separated by ━━━ dividers above. When writing bullets for 'Behavior Regulation & Self-Control', use ONLY notes under that heading.\n"
-    prompt += f"Do NOT copy notes from 'Emotional Regulation Skills' into 'Behavior Regulation & Self-Control' even if they mention similar topics.\n"
-    prompt += f"If a note appears under Section A's heading, it belongs ONLY in Section A's output - NEVER in Section B, C, D, or E.\n"
-    prompt += f"- ONLY describe what WAS observed or attempted — past tense, descriptive language ONLY\n"
-    prompt += f"- This is a progress SUMMARY (describing what happened), NOT a treatment plan\n"
-    prompt += f"\n- Match the EXACT tone of the notes: uncertain notes = uncertain summary, negative notes = honest summary\n"
-    prompt += f"- Use bold **section titles** for each section\n"
-    prompt += f"\nSTART YOUR RESPONSE WITH: '{therapy_label} – Progress Summary'\n"
-    
-    return prompt
\ No newline at end of file
+                block += f"  Goal notes: {goals_text}\n"
+            if block:
+                context_blocks.append(block)
+        context_header = f"\n--- ADDITIONAL CONTEXT (notes from reports that did not match specific sections) ---\n"
+        context_footer = f"--- END ADDITIONAL CONTEXT ---\n"
+        context_footer += f"\nNOTE: The above notes did not match the predefined section titles. Distribute the information across the most relevant sections. Do NOT leave sections marked 'No documented data' if relevant notes exist above.\n"
+        context_tokens = prompt_budget.available(prompt, reminders, context_header, context_footer)
+        prompt += context_header
+        for block_idx in prompt_budget.select_notes(context_blocks, context_tokens):
+            prompt += context_blocks[block_idx]
+        prompt += context_footer
+    
+    prompt += reminders
+    
+    return prompt
+
+
+def _collect_latest_section_notes(reports, section_notes=None, keep=3, section_index: Optional[SectionIndex] = None):
+    """Merge the latest `keep` notes per section label from `reports` into `section_notes`."""
+    section_index = ensure_section_index(section_index, reports)
+    merged = {label: list(notes) for label, notes in (section_notes or {}).items()}
+    for report in reports:
+        for entry in section_index.goals(report).entries:
+            if not entry.notes:
+                continue
+            if entry.is_dict:
+                label = entry.title.strip()
+            elif isinstance(entry.raw_value, str):
+                label = entry.key
+            else:
+                continue
+            label_notes = merged.setdefault(label, [])
+            label_notes.append(entry.notes[:300])
+            del label_notes[:-keep]
+    return merged
+
+
+@timed("prompt_build")
+def _build_incremental_summary_prompt(
+    previous_summary,
+    previous_section_notes,
+    new_reports,
+    reports,
+    student,
+    section_index: Optional[SectionIndex] = None,
+    prompt_budget: Optional[PromptBudget] = None,
+):
+    """Build a prompt that updates an existing progress summary with only the newly added sessions.
+
+    When the new sessions do not fit `prompt_budget`, the latest and most informative
+    ones are kept.
+    """
+    student_name = getattr(student, 'name', 'Student')
+    section_index = ensure_section_index(section_index, new_reports)
+    prompt_budget = prompt_budget or PromptBudget()
+    therapy_label = reports[0].therapy_type if reports and reports[0].therapy_type else "Therapy"
+    previous_count = len(reports) - len(new_reports)
+
+    prompt = f"""You are an objective clinical therapist updating an existing progress summary based STRICTLY on session notes.
+
+Below is the {therapy_label} Progress Summary previously written from {previous_count} session(s), followed by the notes from {len(new_reports)} NEW session(s).
+Rewrite the summary so it covers all {len(reports)} sessions.
+
+RULES:
+- Keep the same format: title "{therapy_label} – Progress Summary", bold **section titles**, 2-3 bullets (•) per section, each bullet 2-3 complete sentences
+- Keep the existing section titles EXACTLY as written; add a section only if the new notes contain a section that is not in the previous summary
+- Keep previous statements that the new notes do not contradict
+- Update a section only where the new notes add or change information; describe change only if the new notes actually show it
+- If new notes describe inconsistent, uneven or declining performance, say so directly - do NOT reframe it as improvement
+- Each section's bullets must ONLY use notes from THAT section - never move notes between sections
+- NEVER fabricate techniques, tools or observations that are not in the previous summary or the new notes
+- NO dates, NO session numbers, NO recommendations or advice
+
+PREVIOUS PROGRESS SUMMARY:
+{previous_summary.strip()}
+"""
+
+    if previous_section_notes:
+        prompt += "\nMOST RECENT NOTES BEFORE THE NEW SESSIONS (for comparison only):\n"
+        for label, notes in previous_section_notes.items():
+            if notes:
+                prompt += f"  {label}: {notes[-1][:250]}\n"
+
+    prompt += f"\nNEW SESSION NOTES FOR {student_name}:\n"
+    closing = f"\nSTART YOUR RESPONSE WITH: '{therapy_label} – Progress Summary'\n"
+    session_blocks = []
+    for report in new_reports:
+        block = f"Progress Level: {report.progress_level or 'Not rated'}\n"
+        goals_text = section_index.readable_text(report, 1200)
+        if goals_text:
+            block += f"Section Notes: {goals_text}\n"
+        if report.progress_notes and report.progress_notes.strip():
+            block += f"Progress Notes: {report.progress_notes.strip()[:300]}\n"
+        session_blocks.append(block)
+    kept = prompt_budget.select_notes(session_blocks, prompt_budget.available(prompt, closing))
+    for i, block_idx in enumerate(kept, 1):
+        prompt += f"\nNew Session {i}:\n"
+        prompt += session_blocks[block_idx]
+
+    prompt += closing
+    return prompt
+
+
+def _use_map_reduce(reports, payload) -> bool:
+    """Whether the main summary is built map-reduce style (explicit request or history length)."""
+    requested = getattr(payload, "map_reduce", None)
+    if requested is not None:
+        return bool(requested) and len(reports) > 1
+    threshold = settings.AI_MAP_REDUCE_MIN_REPORTS
+    return threshold > 0 and len(reports) >= threshold
+
+
+@timed("prompt_build")
+def _build_chunk_summary_prompt(
+    chunk: ReportChunk, therapy_label, section_titles, matcher, section_index: SectionIndex, prompt_budget: PromptBudget
+):
+    """Map step: condense the sessions of one chunk section by section."""
+    reports = chunk.reports
+    section_notes_map = section_index.notes_by_section(reports, matcher)
+    active_sections = [t for t in section_titles if section_notes_map.get(t)]
+
+    prompt = f"""You are an objective clinical therapist condensing {len(reports)} {therapy_label} session(s) from {chunk.label} into short notes for a later progress summary.
+
+RULES:
+- For each section below, write 2-3 sentences describing ONLY what its notes state, including any change within this period
+- Start each section with its title EXACTLY as written, in bold: **Section Title**
+- Keep uncertain, uneven or negative observations as they are - do NOT reframe them as improvement
+- NEVER add techniques, tools or observations that are not in the notes
+- NO dates, NO session numbers, NO recommendations
+"""
+    closing = "\nWrite the condensed notes now, in the order the sections are listed:\n"
+
+    if active_sections:
+        section_headers = {title: f"\n{title}:\n" for title in active_sections}
+        per_section_tokens = prompt_budget.available(prompt, closing, *section_headers.values()) // len(active_sections)
+        for title in active_sections:
+            notes = [note[:300] for note in section_notes_map[title]]
+            prompt += section_headers[title]
+            for note_idx in prompt_budget.select_notes(notes, per_section_tokens):
+                prompt += f"  - {prompt_budget.clip(notes[note_idx], per_section_tokens)}\n"
+    else:
+        # Labels did not match any section: hand over the raw session notes instead.
+        session_blocks = []
+        for report in reports:
+            block = ""
+            if report.progress_notes and report.progress_notes.strip():
+                block += f"  Progress notes: {report.progress_notes.strip()[:300]}\n"
+            goals_text = section_index.readable_text(report, 400)
+            if goals_text:
+                block += f"  Goal notes: {goals_text}\n"
+            if block:
+                session_blocks.append(block)
+        header = "\nSession notes (group them under the most relevant section titles):\n"
+        for title in section_titles:
+            header += f"  - {title}\n"
+        prompt += header
+        for block_idx in prompt_budget.select_notes(session_blocks, prompt_budget.available(prompt, closing)):
+            prompt += session_blocks[block_idx]
+
+    prompt += closing
+    return prompt
+
+
+@timed("prompt_build")
+def _build_reduce_summary_prompt(chunk_summaries, reports, therapy_label, section_titles, prompt_budget: PromptBudget):
+    """Reduce step: merge the per-period summaries (oldest first) into the final progress summary.
+
+    `chunk_summaries` is a list of `(chunk, summary)` pairs. When they do not all fit
+    the budget, the first period (the baseline) and the latest one are always kept.
+    """
+    prompt = f"""You are an objective clinical therapist writing a factual progress summary based STRICTLY on the period summaries provided.
+
+Generate a {therapy_label} Progress Summary for a student covering {len(reports)} sessions. The sessions were condensed period by period, oldest first; combine them into ONE summary of the whole history.
+
+FORMAT REQUIREMENTS:
+- Title: "{therapy_label} – Progress Summary"
+- Use bold **section titles** for each section, only for the sections below that have information
+- Each section must have 2-3 bullet points (use • for bullets), each bullet 2-3 COMPLETE SENTENCES
+- NO dates, NO session numbers, NO period names
+
+SECTIONS:
+"""
+    for i, title in enumerate(section_titles, 1):
+        prompt += f"{i}. {title}\n"
+
+    reminders = f"\nIMPORTANT REMINDERS:\n"
+    reminders += f"- Describe change across periods only where the period summaries actually show it; if performance was similar, say it was consistent\n"
+    reminders += f"- If later periods show uneven or declining performance, say so directly - do NOT reframe it as improvement\n"
+    reminders += f"- SECTION ISOLATION: each section's bullets must ONLY use information given for THAT section\n"
+    reminders += f"- NEVER fabricate techniques, tools, or strategies not mentioned in the period summaries\n"
+    reminders += f"- This is a progress SUMMARY (describing what happened), NOT a treatment plan - no recommendations\n"
+    reminders += f"\nSTART YOUR RESPONSE WITH: '{therapy_label} – Progress Summary'\n"
+
+    prompt += "\nPeriod Summaries (oldest first):\n"
+    period_blocks = [
+        f"\n━━━ {chunk.label} ({len(chunk.reports)} sessions) ━━━\n{summary.strip()}\n"
+        for chunk, summary in chunk_summaries
+    ]
+    for block_idx in prompt_budget.select_notes(
+        period_blocks, prompt_budget.available(prompt, reminders), keep_first=True
+    ):
+        prompt += period_blocks[block_idx]
+
+    prompt += reminders
+    return prompt
+
+
+def _summarize_report_chunks(
+    chunks, student, model_name, therapy_type, section_titles, matcher, section_index, prompt_budget, use_cache
+):
+    """Map step: summarize chunks in parallel, reusing cached summaries of unchanged chunks.
+
+    Chunk summaries are cached by their report ids (and edit times), so across requests
+    only chunks that gained or changed reports are sent to the model. A chunk whose
+    call fails falls back to its structured notes, which are not cached.
+    Returns `(summaries, fallback_chunks)` with the labels of the chunks that fell back.
+    """
+    therapy_label = therapy_type or "Therapy"
+    fallback_chunks = []
+
+    def _summarize(chunk):
+        cache_key = chunk_cache_key(model_name, chunk, therapy_type)
+        if use_cache:
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                if cached.get("truncated"):
+                    prompt_budget.mark_truncated(f"cached summary of {chunk.label}")
+                return cached["summary"]
+
+        chunk_budget = PromptBudget(model_name, prompt_budget.total_tokens)
+        chunk_prompt = _build_chunk_summary_prompt(
+            chunk, therapy_label, section_titles, matcher, section_index, chunk_budget
+        )
+        try:
+            # Cached below under the chunk key only, not also under the prompt.
+            chunk_result = _run_model_completion(
+                client=None,
+                prompt=chunk_prompt,
+                model=model_name,
+                max_tokens=600,
+                temperature=0.2,
+                use_cache=False,
+            )
+            summary = _extract_generated_text(chunk_result)
+            if not summary:
+                raise ValueError("empty chunk summary")
+        except Exception as e:
+            logging.warning(f"Chunk summary for {chunk.label} failed, using its structured notes: {e}")
+            record_fallback("chunk_summary")
+            fallback_chunks.append(chunk.label)
+            return _build_structured_summary_fallback(chunk.reports, student, section_index=section_index)
+
+        if chunk_budget.truncated:
+            prompt_budget.mark_truncated(f"summary of {chunk.label}")
+        llm_cache.set(cache_key, {"summary": summary, "truncated": chunk_budget.truncated})
+        return summary
+
+    max_workers = min(len(chunks), max(1, settings.AI_MAP_REDUCE_MAX_WORKERS))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai-chunk") as pool:
+        futures = [pool.submit(contextvars.copy_context().run, _summarize, chunk) for chunk in chunks]
+        return [future.result() for future in futures], fallback_chunks
+
+
+def _build_map_reduce_summary_prompt(
+    reports, student, model_name, section_index: SectionIndex, prompt_budget: PromptBudget, use_cache=True
+):
+    """Summarize `reports` chunk by chunk (map) and return the prompt that merges them (reduce).
+
+    Returns `(prompt, degraded)`; `degraded` is True when a chunk summary fell back to
+    its structured notes.
+    """
+    therapy_type, section_titles, matcher = _resolve_summary_sections(reports, section_index)
+    chunks = chunk_reports(reports, settings.AI_MAP_REDUCE_CHUNK_BY, settings.AI_MAP_REDUCE_CHUNK_SIZE)
+    logging.info(f"Map-reduce summary: {len(reports)} reports in {len(chunks)} chunks")
+    summaries, fallback_chunks = _summarize_report_chunks(
+        chunks, student, model_name, therapy_type, section_titles, matcher, section_index, prompt_budget, use_cache
+    )
+    prompt = _build_reduce_summary_prompt(
+        list(zip(chunks, summaries)), reports, therapy_type or "Therapy", section_titles, prompt_budget
+    )
+    return prompt, bool(fallback_chunks)
@@ -3,11 +3,22 @@ Translation endpoint using CTranslate2 INT8 quantized NLLB-200 for Malayalam (5-
 and Helsinki-NLP for other Indian languages
 """
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional
 from app.api.deps import get_current_user
+from app.core.config import settings
 from app.models.user import User
+from app.utils.translation_batcher import MicroBatcher
+from app.utils.translation_executor import TranslationQueueFull, get_translation_executor, run_translation
+from app.utils.translation_memory import translation_memory
+import contextlib
+import functools
+import hashlib
+import json
 import logging
+import threading
 import time
 import os
 import re
@@ -22,9 +33,55 @@ _ct2_tokenizer = None
 _translation_model = None
 _tokenizer = None
 _device = None
+# CTranslate2 conversions of the Marian models: model name -> (translator, tokenizer)
+_ct2_marian_models = {}
+# Translations run on several pool threads (and the startup preload on another): each model
+# is loaded once behind its own lock, which concurrent callers wait on instead of loading again.
+_ct2_load_lock = threading.Lock()
+_marian_load_locks = {}
+_ct2_marian_load_locks = {}
+_marian_locks_lock = threading.Lock()
+# Last load error per ISO language code, for GET /translation-ready
+_load_errors = {}
+# Languages the preload skipped because their CTranslate2 model is not converted yet;
+# they load (and convert) on their first request and do not hold back readiness.
+_preload_skipped = set()
 
 # Path for converted CTranslate2 model
-CT2_MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "..", "models", "nllb-200-distilled-600M-int8")
+NLLB_MODEL_NAME = "facebook/nllb-200-distilled-600M"
+CT2_MODELS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "models")
+CT2_MODEL_PATH = os.path.join(CT2_MODELS_DIR, "nllb-200-distilled-600M-int8")
+# Map IndicTrans2 language codes to ISO codes
+LANGUAGE_CODES = {
+    "mal_Mlym": "ml",  # Malayalam
+    "hin_Deva": "hi",  # Hindi
+    "tam_Tamil": "ta",  # Tamil
+    "tel_Telu": "te",  # Telugu
+    "kan_Knda": "kn",  # Kannada
+    "ben_Beng": "bn",  # Bengali
+    "guj_Gujr": "gu",  # Gujarati
+    "mar_Deva": "mr",  # Marathi
+    "pan_Guru": "pa",  # Punjabi
+    "ory_Orya": "or",  # Odia
+}
+
+# Helsinki-NLP Marian models for each language (excluding Malayalam - uses NLLB)
+MARIAN_MODELS = {
+    "hi": "Helsinki-NLP/opus-mt-en-hi",  # Hindi
+    "bn": "Helsinki-NLP/opus-mt-en-bn",  # Bengali  
+    "ta": "Helsinki-NLP/opus-mt-en-ta",  # Tamil
+    "te": "Helsinki-NLP/opus-mt-en-te",  # Telugu
+    "mr": "Helsinki-NLP/opus-mt-en-mr",  # Marathi
+    "gu": "Helsinki-NLP/opus-mt-en-gu",  # Gujarati
+    # Fallback for others
+    "default": "Helsinki-NLP/opus-mt-en-mul"
+}
+
+# Lines longer than this are translated sentence by sentence
+MAX_SEGMENT_CHARS = 400
+
+# Model name in translation memory keys
+CT2_NLLB_MODEL_NAME = f"ct2/{os.path.basename(CT2_MODEL_PATH)}"
 
 # Standardized Malayalam terminology for clinical/therapy reporting
 MALAYALAM_CLINICAL_TERM_MAP = {
@@ -75,6 +132,11 @@ MALAYALAM_CLINICAL_TERM_MAP = {
     "സ്പോൺട്ടൻ സംസാര": "സ്വതന്ത്ര സംസാരത്തിൽ",
 }
 
+# Part of the translation memory key, so editing the glossary starts a fresh memory
+MALAYALAM_GLOSSARY_VERSION = hashlib.sha256(
+    json.dumps(MALAYALAM_CLINICAL_TERM_MAP, sort_keys=True, ensure_ascii=False).encode("utf-8")
+).hexdigest()[:12]
+
 
 def _apply_critical_clinical_phrase_fixes(text: str) -> str:
     """
@@ -176,24 +238,53 @@ def _postprocess_malayalam_clinical_text(source_text: str, translated_text: str)
     text = _apply_critical_clinical_phrase_fixes(text)
     return _validate_malayalam_translation(source_text, text)
 
+def _drop_loaded_models() -> str:
+    """Unload every model; returns the kind that was loaded.
+
+    Holds all the load locks, so no loader is half way through and the caches are
+    emptied in place. The device is kept: it does not change while the process runs.
+    """
+    global _ct2_translator, _ct2_tokenizer
+    
+    with _marian_locks_lock:
+        locks = [_ct2_load_lock, *_marian_load_locks.values(), *_ct2_marian_load_locks.values()]
+    with contextlib.ExitStack() as stack:
+        for lock in locks:
+            stack.enter_context(lock)
+        old_type = "CTranslate2" if _ct2_translator or _ct2_marian_models else ("Helsinki" if _translation_model else "None")
+        _ct2_translator = None
+        _ct2_tokenizer = None
+        _ct2_marian_models.clear()
+        for cache in (_translation_model, _tokenizer):
+            if cache is not None:
+                cache.clear()
+    return old_type
+
+
 @router.post("/clear-translation-cache")
 async def clear_translation_cache(current_user: User = Depends(get_current_user)):
-    """Force clear translation models cache - requires restart to take effect"""
-    global _ct2_translator, _ct2_tokenizer, _translation_model, _tokenizer, _device
-    
-    old_type = "CTranslate2" if _ct2_translator else ("Helsinki" if _translation_model else "None")
+    """Clear the translation memory and drop the loaded models (they reload on next request)"""
+    old_type = await run_in_threadpool(_drop_loaded_models)
     
-    _ct2_translator = None
-    _ct2_tokenizer = None
-    _translation_model = None
-    _tokenizer = None
-    _device = None
+    memory_stats = translation_memory.stats()
+    deleted = await run_in_threadpool(translation_memory.clear)
     
-    logger.info(f"Translation model cache cleared (was: {old_type})")
+    logger.info(f"Translation model cache cleared (was: {old_type}); {deleted} remembered lines deleted")
     return {
         "status": "success",
         "message": "Translation cache cleared. Models will reload on next request.",
-        "previous_model": old_type
+        "previous_model": old_type,
+        "translation_memory": {**memory_stats, "deleted_lines": deleted},
+    }
+
+
+@router.get("/translation-cache")
+async def translation_cache_stats(current_user: User = Depends(get_current_user)):
+    """Translation memory hit rate and seconds saved, plus batching and pool counters"""
+    return {
+        "translation_memory": translation_memory.stats(),
+        "batching": {target_lang: batcher.stats() for target_lang, batcher in list(_ct2_batchers.items())},
+        "executor": get_translation_executor().stats(),
     }
 
 # Translation request model
@@ -208,30 +299,72 @@ class TranslationResponse(BaseModel):
     target_language: str
 
 
-def _convert_nllb_to_ct2():
-    """Convert NLLB model to CTranslate2 INT8 format (one-time operation)"""
+def _convert_to_ct2(model_name: str, output_path: str):
+    """Convert a Hugging Face translation model to CTranslate2 INT8 format (one-time operation)
+
+    The conversion is written next to `output_path` and moved into place when complete,
+    so an interrupted conversion is never mistaken for a cached model.
+    """
     import ctranslate2
+    import shutil
     
-    logger.info("Converting NLLB-200-distilled-600M to CTranslate2 INT8 format...")
-    logger.info("This is a one-time operation and will take a few minutes...")
+    logger.info(f"Converting {model_name} to CTranslate2 INT8 format...")
+    logger.info("This is a one-time operation and can take a few minutes...")
     
     start_time = time.time()
     
     # Create models directory if it doesn't exist
-    os.makedirs(os.path.dirname(CT2_MODEL_PATH), exist_ok=True)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    partial_path = f"{output_path}.partial"
     
     # Convert using ctranslate2 converter
-    ctranslate2.converters.TransformersConverter(
-        "facebook/nllb-200-distilled-600M"
-    ).convert(
-        CT2_MODEL_PATH,
+    ctranslate2.converters.TransformersConverter(model_name).convert(
+        partial_path,
         quantization="int8",  # INT8 quantization for 4x speed + smaller size
         force=True
     )
+    if os.path.exists(output_path):
+        shutil.rmtree(output_path)
+    os.replace(partial_path, output_path)
     
     elapsed = time.time() - start_time
     logger.info(f"✓ Model converted to CTranslate2 INT8 in {elapsed:.1f}s")
-    logger.info(f"  Saved to: {CT2_MODEL_PATH}")
+    logger.info(f"  Saved to: {output_path}")
+
+
+def _ct2_model_path(model_name: str) -> str:
+    """On-disk location of the converted model, e.g. models/opus-mt-en-hi-int8"""
+    return os.path.join(CT2_MODELS_DIR, f"{model_name.split('/')[-1]}-int8")
+
+
+def _load_ct2_translator(model_path: str):
+    """CTranslate2 INT8 translator with the MAXIMUM SPEED settings shared by every model"""
+    import ctranslate2
+    import multiprocessing
+    
+    # Get optimal thread count
+    cpu_count = multiprocessing.cpu_count()
+    
+    logger.info(f"Loading CTranslate2 INT8 model {os.path.basename(model_path)} on {_device} with {cpu_count} threads...")
+    
+    return ctranslate2.Translator(
+        model_path,
+        device=_device,
+        compute_type="int8",
+        inter_threads=cpu_count,
+        intra_threads=2,  # Some intra-op parallelism helps
+    )
+
+
+@contextlib.contextmanager
+def _recording_load_errors(target_lang: str):
+    """Keep the last model load error of `target_lang` for GET /translation-ready."""
+    try:
+        yield
+    except Exception as e:
+        _load_errors[target_lang] = str(e)
+        raise
+    _load_errors.pop(target_lang, None)
 
 
 def get_ct2_nllb_model():
@@ -241,52 +374,47 @@ def get_ct2_nllb_model():
     """
     global _ct2_translator, _ct2_tokenizer, _device
     
-    if _ct2_translator is None:
-        import ctranslate2
-        from transformers import NllbTokenizerFast
-        import torch
-        import multiprocessing
-        
-        start_time = time.time()
+    # One load shared by concurrent callers; once loaded the lock is only held briefly
+    with _ct2_load_lock, _recording_load_errors("ml"):
+        if _ct2_translator is None:
+            from transformers import NllbTokenizerFast
+            import torch
         
-        # Check if converted model exists, if not convert it
-        if not os.path.exists(CT2_MODEL_PATH):
-            _convert_nllb_to_ct2()
+            start_time = time.time()
         
-        # Determine device
-        _device = "cuda" if torch.cuda.is_available() else "cpu"
+            # Check if converted model exists, if not convert it
+            if not os.path.exists(CT2_MODEL_PATH):
+                _convert_to_ct2(NLLB_MODEL_NAME, CT2_MODEL_PATH)
         
-        # Get optimal thread count
-        cpu_count = multiprocessing.cpu_count()
+            # Determine device
+            _device = "cuda" if torch.cuda.is_available() else "cpu"
         
-        logger.info(f"Loading CTranslate2 INT8 NLLB model on {_device} with {cpu_count} threads...")
+            # MAXIMUM SPEED settings
+            translator = _load_ct2_translator(CT2_MODEL_PATH)
         
-        # MAXIMUM SPEED settings
-        _ct2_translator = ctranslate2.Translator(
-            CT2_MODEL_PATH,
-            device=_device,
-            compute_type="int8",
-            inter_threads=cpu_count,
-            intra_threads=2,  # Some intra-op parallelism helps
-        )
+            # Use FAST tokenizer (2-5x faster tokenization)
+            tokenizer = NllbTokenizerFast.from_pretrained(
+                NLLB_MODEL_NAME,
+                use_fast=True
+            )
         
-        # Use FAST tokenizer (2-5x faster tokenization)
-        _ct2_tokenizer = NllbTokenizerFast.from_pretrained(
-            "facebook/nllb-200-distilled-600M",
-            use_fast=True
-        )
+            # Warm up the model (first inference is slow)
+            logger.info("Warming up model...")
+            tokenizer.src_lang = "eng_Latn"
+            warmup_tokens = tokenizer("Hello", return_tensors=None)["input_ids"]
+            warmup_tokens = tokenizer.convert_ids_to_tokens(warmup_tokens)
+            translator.translate_batch([warmup_tokens], target_prefix=[["mal_Mlym"]], beam_size=1)
         
-        # Warm up the model (first inference is slow)
-        logger.info("Warming up model...")
-        _ct2_tokenizer.src_lang = "eng_Latn"
-        warmup_tokens = _ct2_tokenizer("Hello", return_tensors=None)["input_ids"]
-        warmup_tokens = _ct2_tokenizer.convert_ids_to_tokens(warmup_tokens)
-        _ct2_translator.translate_batch([warmup_tokens], target_prefix=[["mal_Mlym"]], beam_size=1)
+            # Published only once loaded and warmed, so callers never see a half-loaded model
+            _ct2_translator, _ct2_tokenizer = translator, tokenizer
+            
+            load_time = time.time() - start_time
+            logger.info(f"✓ CTranslate2 INT8 NLLB model loaded and warmed up in {load_time:.1f}s")
         
-        load_time = time.time() - start_time
-        logger.info(f"✓ CTranslate2 INT8 NLLB model loaded and warmed up in {load_time:.1f}s")
+        # Read under the lock: clearing the cache may reset the globals right after it is released
+        translator, tokenizer = _ct2_translator, _ct2_tokenizer
     
-    return _ct2_translator, _ct2_tokenizer, _device
+    return translator, tokenizer, _device
 
 
 def get_model_for_language(target_lang):
@@ -298,45 +426,370 @@ def get_model_for_language(target_lang):
     
     global _translation_model, _tokenizer, _device
     
-    if _translation_model is None:
-        _translation_model = {}
-        _tokenizer = {}
-    
-    if _device is None:
-        _device = "cuda" if torch.cuda.is_available() else "cpu"
-    
-    # Model mapping for each language (excluding Malayalam - uses NLLB)
-    model_map = {
-        "hi": "Helsinki-NLP/opus-mt-en-hi",  # Hindi
-        "bn": "Helsinki-NLP/opus-mt-en-bn",  # Bengali  
-        "ta": "Helsinki-NLP/opus-mt-en-ta",  # Tamil
-        "te": "Helsinki-NLP/opus-mt-en-te",  # Telugu
-        "mr": "Helsinki-NLP/opus-mt-en-mr",  # Marathi
-        "gu": "Helsinki-NLP/opus-mt-en-gu",  # Gujarati
-        # Fallback for others
-        "default": "Helsinki-NLP/opus-mt-en-mul"
-    }
+    with _marian_locks_lock:
+        if _translation_model is None:
+            _translation_model = {}
+            _tokenizer = {}
+        
+        if _device is None:
+            _device = "cuda" if torch.cuda.is_available() else "cpu"
+        
+        load_lock = _marian_load_locks.setdefault(target_lang, threading.Lock())
     
-    model_name = model_map.get(target_lang, model_map["default"])
+    model_name = MARIAN_MODELS.get(target_lang, MARIAN_MODELS["default"])
     
-    # Load model if not cached
-    if target_lang not in _translation_model:
-        logger.info(f"Loading model for {target_lang}: {model_name}")
-        _tokenizer[target_lang] = MarianTokenizer.from_pretrained(model_name)
+    # Load model if not cached (one load per language shared by concurrent callers)
+    with load_lock, _recording_load_errors(target_lang):
+        if target_lang not in _translation_model:
+            logger.info(f"Loading model for {target_lang}: {model_name}")
+            tokenizer = MarianTokenizer.from_pretrained(model_name)
+        
+            use_half = _device == "cuda"
+            if use_half:
+                model = MarianMTModel.from_pretrained(
+                    model_name,
+                    torch_dtype=torch.float16
+                ).to(_device)
+            else:
+                model = MarianMTModel.from_pretrained(model_name).to(_device)
         
-        use_half = _device == "cuda"
-        if use_half:
-            _translation_model[target_lang] = MarianMTModel.from_pretrained(
-                model_name,
-                torch_dtype=torch.float16
-            ).to(_device)
-        else:
-            _translation_model[target_lang] = MarianMTModel.from_pretrained(model_name).to(_device)
+            model.eval()
+            _tokenizer[target_lang], _translation_model[target_lang] = tokenizer, model
+            logger.info(f"Model for {target_lang} loaded on {_device} (half={use_half})")
         
-        _translation_model[target_lang].eval()
-        logger.info(f"Model for {target_lang} loaded on {_device} (half={use_half})")
+        model, tokenizer = _translation_model[target_lang], _tokenizer[target_lang]
+    
+    return model, tokenizer, _device
+
+def get_ct2_marian_model(target_lang):
+    """
+    Load the CTranslate2 INT8 conversion of the Helsinki-NLP model for a language (non-Malayalam)
+    Converted once and cached under models/; languages using the same model share it
+    """
+    from transformers import MarianTokenizer
+    import torch
     
-    return _translation_model[target_lang], _tokenizer[target_lang], _device
+    global _device
+    
+    model_name = MARIAN_MODELS.get(target_lang, MARIAN_MODELS["default"])
+    with _marian_locks_lock:
+        if _device is None:
+            _device = "cuda" if torch.cuda.is_available() else "cpu"
+        
+        load_lock = _ct2_marian_load_locks.setdefault(model_name, threading.Lock())
+    
+    # One load per model shared by concurrent callers
+    with load_lock, _recording_load_errors(target_lang):
+        if model_name not in _ct2_marian_models:
+            start_time = time.time()
+            model_path = _ct2_model_path(model_name)
+            if not os.path.exists(model_path):
+                _convert_to_ct2(model_name, model_path)
+            
+            translator = _load_ct2_translator(model_path)
+            tokenizer = MarianTokenizer.from_pretrained(model_name)
+            
+            # Warm up the model (first inference is slow)
+            warmup_tokens = tokenizer.convert_ids_to_tokens(tokenizer.encode("Hello"))
+            translator.translate_batch([warmup_tokens], beam_size=1)
+            
+            _ct2_marian_models[model_name] = (translator, tokenizer)
+            logger.info(f"✓ CTranslate2 INT8 {model_name} loaded and warmed up in {time.time() - start_time:.1f}s")
+        
+        translator, tokenizer = _ct2_marian_models[model_name]
+    
+    return translator, tokenizer, _device
+
+
+def _model_state(target_lang: str) -> str:
+    if target_lang == "ml":
+        loaded, lock = _ct2_translator is not None, _ct2_load_lock
+    elif settings.TRANSLATION_MARIAN_CT2:
+        model_name = MARIAN_MODELS.get(target_lang, MARIAN_MODELS["default"])
+        loaded, lock = model_name in _ct2_marian_models, _ct2_marian_load_locks.get(model_name)
+    else:
+        loaded, lock = target_lang in (_translation_model or {}), _marian_load_locks.get(target_lang)
+    if loaded:
+        return "ready"
+    if lock is not None and lock.locked():
+        return "loading"
+    if target_lang in _load_errors:
+        return "failed"
+    return "skipped" if target_lang in _preload_skipped else "not_loaded"
+
+
+def preload_translation_models(languages) -> None:
+    """Load and warm the models of `languages` (request or ISO codes), one after another.
+
+    CTranslate2 models are converted here when missing only if TRANSLATION_PRELOAD_CONVERT
+    is set (conversion downloads the full model).
+    """
+    for language in languages:
+        target_lang = LANGUAGE_CODES.get(language, language)
+        start_time = time.time()
+        try:
+            if target_lang == "ml" or settings.TRANSLATION_MARIAN_CT2:
+                if target_lang == "ml":
+                    model_path = CT2_MODEL_PATH
+                else:
+                    model_path = _ct2_model_path(MARIAN_MODELS.get(target_lang, MARIAN_MODELS["default"]))
+                if not os.path.exists(model_path) and not settings.TRANSLATION_PRELOAD_CONVERT:
+                    logger.info(f"Skipping {target_lang} preload: CTranslate2 model not converted yet")
+                    _preload_skipped.add(target_lang)
+                    continue
+                # Both warm themselves
+                get_ct2_nllb_model() if target_lang == "ml" else get_ct2_marian_model(target_lang)
+            else:
+                import torch
+                
+                model, tokenizer, device = get_model_for_language(target_lang)
+                with torch.no_grad():
+                    model.generate(**tokenizer("Hello", return_tensors="pt").to(device), max_length=8, num_beams=1)
+            logger.info(f"Preloaded translation model for {target_lang} in {time.time() - start_time:.1f}s")
+        except Exception as e:
+            logger.error(f"Preloading translation model for {target_lang} failed: {e}")
+
+
+def start_translation_preload() -> None:
+    """Preload TRANSLATION_PRELOAD_LANGUAGES on a background thread (called at app startup)."""
+    languages = [code.strip() for code in settings.TRANSLATION_PRELOAD_LANGUAGES.split(",") if code.strip()]
+    if languages:
+        threading.Thread(
+            target=preload_translation_models, args=(languages,), name="translation-preload", daemon=True
+        ).start()
+
+
+@router.get("/translation-ready")
+async def translation_ready():
+    """Readiness of the translation models: 503 until every preloaded language is ready
+
+    Languages the preload skipped (model not converted yet) are reported as "skipped"
+    and do not block readiness; they load on their first request.
+    """
+    preload = [
+        LANGUAGE_CODES.get(code.strip(), code.strip())
+        for code in settings.TRANSLATION_PRELOAD_LANGUAGES.split(",")
+        if code.strip()
+    ]
+    loaded_marian = [
+        target_lang for target_lang in LANGUAGE_CODES.values()
+        if target_lang != "ml" and _model_state(target_lang) != "not_loaded"
+    ]
+    languages = list(dict.fromkeys(["ml", *preload, *(_translation_model or {}), *loaded_marian]))
+    models = {target_lang: {"state": _model_state(target_lang)} for target_lang in languages}
+    for target_lang, error in list(_load_errors.items()):
+        models.setdefault(target_lang, {"state": _model_state(target_lang)})["error"] = error
+    ready = all(
+        models[target_lang]["state"] == "ready" for target_lang in preload if target_lang not in _preload_skipped
+    )
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "device": _device, "preload": preload, "models": models},
+    )
+
+
+def _ct2_translate_batch(target_lang, sources):
+    """One translate_batch call over the source token lines of one or more requests.
+
+    Returns the best hypothesis (target tokens) per line.
+    """
+    if target_lang == "ml":
+        translator, _, _ = get_ct2_nllb_model()
+        target_prefix = [["mal_Mlym"]] * len(sources)
+        max_decoding_length = 400
+    else:
+        translator, _, _ = get_ct2_marian_model(target_lang)
+        target_prefix = None
+        max_decoding_length = 512
+    results = translator.translate_batch(
+        sources,
+        target_prefix=target_prefix,
+        beam_size=1,  # Greedy = fastest
+        max_decoding_length=max_decoding_length,
+        replace_unknowns=True,
+        max_batch_size=0,  # 0 = no limit, process all at once
+        batch_type="tokens",  # Batch by tokens for better GPU/CPU utilization
+    )
+    return [r.hypotheses[0] for r in results]
+
+
+# Lines of concurrent requests for the same language share translate_batch calls
+_ct2_batchers = {}
+_ct2_batchers_lock = threading.Lock()
+
+
+def _translate_ct2_tokens(target_lang, sources):
+    if not settings.TRANSLATION_BATCHING_ENABLED:
+        return _ct2_translate_batch(target_lang, sources)
+    with _ct2_batchers_lock:
+        batcher = _ct2_batchers.get(target_lang)
+        if batcher is None:
+            batcher = _ct2_batchers[target_lang] = MicroBatcher(
+                functools.partial(_ct2_translate_batch, target_lang),
+                max_wait=settings.TRANSLATION_BATCH_MAX_WAIT_MS / 1000,
+                max_tokens=settings.TRANSLATION_BATCH_MAX_TOKENS,
+                name=f"ct2-{target_lang}",
+            )
+    return batcher.translate(sources)
+
+
+def _split_long_line(line: str):
+    """Segments of one line: the line itself, or its sentences when it is too long to translate whole"""
+    if len(line) <= MAX_SEGMENT_CHARS:
+        return [line]
+    sentences = [sentence.strip() for sentence in re.split(r"(?<=[.!?])\s+", line) if sentence.strip()]
+    return sentences or [line]
+
+
+def _generate_marian_batches(target_lang, segments):
+    """PyTorch MarianMTModel.generate over segments in length-sorted, padded batches"""
+    import torch
+    
+    model, tokenizer, device = get_model_for_language(target_lang)
+    
+    # Sorting by length keeps the padding in each batch small
+    order = sorted(range(len(segments)), key=lambda i: len(segments[i]))
+    translated = [""] * len(segments)
+    batch_size = max(1, settings.TRANSLATION_MARIAN_BATCH_SIZE)
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        inputs = tokenizer(
+            [segments[i] for i in batch],
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=512
+        ).to(device)
+        
+        # OPTIMIZED: Use greedy decoding for speed
+        with torch.no_grad(), torch.cuda.amp.autocast(enabled=(device == "cuda")):
+            outputs = model.generate(
+                **inputs,
+                max_length=512,
+                num_beams=1,  # Greedy decoding - much faster
+                do_sample=False,
+                use_cache=True,
+            )
+        for i, decoded in zip(batch, tokenizer.batch_decode(outputs, skip_special_tokens=True)):
+            translated[i] = decoded
+    return translated
+
+
+def _translate_segments(target_lang, segments):
+    """Translations of distinct source segments, from the translation memory or the model.
+
+    Only the segments not remembered reach the model, all in one batch (merged with
+    concurrent requests on the CTranslate2 engines).
+    """
+    if target_lang == "ml":
+        memory_model, memory_language, glossary_version = CT2_NLLB_MODEL_NAME, "mal_Mlym", MALAYALAM_GLOSSARY_VERSION
+    else:
+        model_name = MARIAN_MODELS.get(target_lang, MARIAN_MODELS["default"])
+        engine = "ct2" if settings.TRANSLATION_MARIAN_CT2 else "torch"
+        memory_model, memory_language, glossary_version = f"{engine}/{model_name.split('/')[-1]}", target_lang, ""
+    
+    remembered = translation_memory.lookup(memory_model, memory_language, segments, glossary_version=glossary_version)
+    missing = [segment for segment in segments if segment not in remembered]
+    logger.info(f"Translation memory: {len(segments) - len(missing)} segments reused, {len(missing)} to translate")
+    if not missing:
+        return remembered
+    
+    if target_lang == "ml":
+        translator, tokenizer, device = get_ct2_nllb_model()
+        model_start = time.time()
+        
+        # Set source language for tokenizer
+        tokenizer.src_lang = "eng_Latn"
+        
+        # FAST batch tokenization using list comprehension
+        all_source_tokens = [
+            tokenizer.convert_ids_to_tokens(
+                tokenizer(segment, return_tensors=None, add_special_tokens=True)["input_ids"]
+            )
+            for segment in missing
+        ]
+        
+        # Merged with the lines of concurrent requests into one translate_batch call
+        hypotheses = _translate_ct2_tokens(target_lang, all_source_tokens)
+        
+        # Fast batch decode using list comprehension
+        translated = [
+            tokenizer.decode(
+                tokenizer.convert_tokens_to_ids(h[1:] if h and h[0] == "mal_Mlym" else h),
+                skip_special_tokens=True
+            )
+            for h in hypotheses
+        ]
+    elif settings.TRANSLATION_MARIAN_CT2:
+        translator, tokenizer, device = get_ct2_marian_model(target_lang)
+        model_start = time.time()
+        
+        all_source_tokens = [tokenizer.convert_ids_to_tokens(tokenizer.encode(segment)) for segment in missing]
+        
+        # Same engine and batching path as Malayalam
+        hypotheses = _translate_ct2_tokens(target_lang, all_source_tokens)
+        translated = [
+            tokenizer.decode(tokenizer.convert_tokens_to_ids(h), skip_special_tokens=True)
+            for h in hypotheses
+        ]
+    else:
+        model_start = time.time()
+        translated = _generate_marian_batches(target_lang, missing)
+    
+    fresh = dict(zip(missing, translated))
+    translation_memory.store(
+        memory_model,
+        memory_language,
+        fresh,
+        glossary_version=glossary_version,
+        seconds=time.time() - model_start,
+    )
+    return {**remembered, **fresh}
+
+
+def _translate_text_sync(text: str, target_lang: str) -> str:
+    """Run the blocking model inference for one request (called on the translation pool)."""
+    start_time = time.time()
+
+    # Use CTranslate2 INT8 NLLB for Malayalam, Helsinki-NLP for others
+    if target_lang == "ml":
+        logger.info("Using CTranslate2 INT8 NLLB-200 for Malayalam (ultra-fast)")
+    elif settings.TRANSLATION_MARIAN_CT2:
+        logger.info(f"Using CTranslate2 INT8 Helsinki-NLP model for translation to {target_lang}")
+    else:
+        logger.info(f"Using Helsinki-NLP model for translation to {target_lang}")
+    
+    # PRESERVE FORMATTING: Split by lines to maintain structure (headings, bullets, etc.)
+    # This is crucial for preserving markdown formatting in therapy reports
+    lines = text.strip().split('\n')
+    
+    # Filter and prepare lines (preserve structure); long lines are translated
+    # sentence by sentence instead of being truncated by the model
+    line_segments = []  # (index, segments) for non-empty lines
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped:
+            line_segments.append((i, _split_long_line(stripped)))
+    
+    if not line_segments:
+        return ""
+    
+    segments = list(dict.fromkeys(segment for _, parts in line_segments for segment in parts))
+    logger.info(f"Translating {len(line_segments)} lines, {len(segments)} distinct segments (preserving structure)")
+    translations = _translate_segments(target_lang, segments)
+    
+    # Reconstruct with original line structure
+    result_lines = [''] * len(lines)
+    for orig_idx, parts in line_segments:
+        result_lines[orig_idx] = " ".join(translations[segment] for segment in parts)
+    translated_text = '\n'.join(result_lines)
+    
+    if target_lang == "ml":
+        translated_text = _postprocess_malayalam_clinical_text(text, translated_text)
+    
+    elapsed = time.time() - start_time
+    logger.info(f"Translation to {target_lang} complete: {len(translated_text)} chars in {elapsed:.2f}s")
+    return translated_text
 
 @router.post("/translate", response_model=TranslationResponse)
 async def translate_text(
@@ -373,128 +826,17 @@ async def translate_text(
             request.text = request.text[:5000]
             logger.info("Text truncated to 5000 characters")
         
-        # Map IndicTrans2 language codes to ISO codes
-        language_map = {
-            "mal_Mlym": "ml",  # Malayalam
-            "hin_Deva": "hi",  # Hindi
-            "tam_Tamil": "ta",  # Tamil
-            "tel_Telu": "te",  # Telugu
-            "kan_Knda": "kn",  # Kannada
-            "ben_Beng": "bn",  # Bengali
-            "guj_Gujr": "gu",  # Gujarati
-            "mar_Deva": "mr",  # Marathi
-            "pan_Guru": "pa",  # Punjabi
-            "ory_Orya": "or",  # Odia
-        }
-        
-        target_lang = language_map.get(request.target_language, request.target_language)
+        target_lang = LANGUAGE_CODES.get(request.target_language, request.target_language)
         
-        # Use CTranslate2 INT8 NLLB for Malayalam, Helsinki-NLP for others
-        if target_lang == "ml":
-            logger.info("Using CTranslate2 INT8 NLLB-200 for Malayalam (ultra-fast)")
-            translator, tokenizer, device = get_ct2_nllb_model()
-            
-            # NLLB language codes
-            src_lang = "eng_Latn"
-            tgt_lang = "mal_Mlym"
-            
-            # Set source language for tokenizer
-            tokenizer.src_lang = src_lang
-            
-            text_to_translate = request.text.strip()
-            
-            # PRESERVE FORMATTING: Split by lines to maintain structure (headings, bullets, etc.)
-            # This is crucial for preserving markdown formatting in therapy reports
-            lines = text_to_translate.split('\n')
-            
-            if not lines or (len(lines) == 1 and not lines[0].strip()):
-                translated_text = ""
-            else:
-                # Filter and prepare lines (preserve structure)
-                line_map = []  # (index, content) for non-empty lines
-                for i, line in enumerate(lines):
-                    stripped = line.strip()
-                    if stripped:
-                        # Keep line as-is to preserve formatting
-                        line_map.append((i, stripped))
-                
-                if not line_map:
-                    translated_text = ""
-                else:
-                    logger.info(f"Translating {len(line_map)} lines (preserving structure)")
-                    
-                    # FAST batch tokenization using list comprehension
-                    all_source_tokens = [
-                        tokenizer.convert_ids_to_tokens(
-                            tokenizer(content, return_tensors=None, add_special_tokens=True)["input_ids"]
-                        )
-                        for _, content in line_map
-                    ]
-                    
-                    # Single optimized batch call
-                    results = translator.translate_batch(
-                        all_source_tokens,
-                        target_prefix=[[tgt_lang]] * len(line_map),
-                        beam_size=1,  # Greedy = fastest
-                        max_decoding_length=400,
-                        replace_unknowns=True,
-                        max_batch_size=0,  # 0 = no limit, process all at once
-                        batch_type="tokens",  # Batch by tokens for better GPU/CPU utilization
-                    )
-                    
-                    # Fast batch decode using list comprehension
-                    translated_lines = [
-                        tokenizer.decode(
-                            tokenizer.convert_tokens_to_ids(
-                                r.hypotheses[0][1:] if r.hypotheses[0] and r.hypotheses[0][0] == tgt_lang else r.hypotheses[0]
-                            ),
-                            skip_special_tokens=True
-                        )
-                        for r in results
-                    ]
-                    
-                    # Reconstruct with original line structure
-                    result_lines = [''] * len(lines)
-                    for idx, (orig_idx, _) in enumerate(line_map):
-                        result_lines[orig_idx] = translated_lines[idx]
-                    
-                    translated_text = '\n'.join(result_lines)
-
-                    translated_text = _postprocess_malayalam_clinical_text(request.text, translated_text)
-            
-            elapsed = time.time() - start_time
-            logger.info(f"CTranslate2 INT8 Translation complete: {len(translated_text)} chars in {elapsed:.2f}s")
-        else:
-            logger.info(f"Using Helsinki-NLP model for translation to {target_lang}")
-            import torch
-            
-            # Get language-specific Helsinki model
-            model, tokenizer, device = get_model_for_language(target_lang)
-            
-            # Tokenize input
-            inputs = tokenizer(
-                request.text,
-                return_tensors="pt",
-                padding=False,
-                truncation=True,
-                max_length=512
-            ).to(device)
-            
-            logger.info(f"Input tokens: {inputs['input_ids'].shape[1]}")
-            
-            # OPTIMIZED: Use greedy decoding for speed
-            with torch.no_grad(), torch.cuda.amp.autocast(enabled=(device == "cuda")):
-                outputs = model.generate(
-                    **inputs,
-                    max_length=512,
-                    num_beams=1,  # Greedy decoding - much faster
-                    do_sample=False,
-                    use_cache=True,
-                )
-            
-            translated_text = tokenizer.decode(outputs[0], skip_special_tokens=True)
-            elapsed = time.time() - start_time
-            logger.info(f"Helsinki Translation complete: {len(translated_text)} chars in {elapsed:.2f}s")
+        try:
+            translated_text = await run_translation(_translate_text_sync, request.text, target_lang)
+        except TranslationQueueFull as e:
+            logger.warning(f"Rejecting translation request: {e}")
+            raise HTTPException(
+                status_code=503,
+                detail="Too many translations are in progress; please try again shortly.",
+                headers={"Retry-After": "10"},
+            )
         
         logger.info(f"Translation completed successfully in {time.time() - start_time:.2f}s")
         logger.info(f"Translated text preview: {translated_text[:100]}...")
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import model_validator
-from typing import Optional
+from typing import Dict, Optional
 import os
 from pathlib import Path
 
@@ -37,6 +37,89 @@ class Settings(BaseSettings):
     # Hugging Face Inference endpoint.
     # HF deprecated `https://api-inference.huggingface.co`; use router by default.
     HUGGINGFACE_BASE_URL: str = "https://router.huggingface.co"
+    # Shared connection pool for the router (see app/utils/hf_client.py)
+    HF_HTTP2: bool = False  # requires the optional `h2` package
+    HF_POOL_MAX_CONNECTIONS: int = 50
+    HF_POOL_MAX_KEEPALIVE: int = 20
+    HF_POOL_KEEPALIVE_EXPIRY: float = 30.0
+    # Per-route timeouts (seconds)
+    HF_CONNECT_TIMEOUT: float = 10.0
+    HF_COMPLETION_TIMEOUT: float = 60.0
+    HF_STREAM_READ_TIMEOUT: float = 30.0
+    # Process-wide limits on router calls (0 disables the limit)
+    HF_MAX_CONCURRENT_REQUESTS: int = 16
+    HF_REQUESTS_PER_MINUTE: int = 0
+    # Circuit breaker around router calls: opens when at least HF_BREAKER_FAILURE_RATIO of
+    # the last HF_BREAKER_WINDOW calls failed or took HF_BREAKER_SLOW_CALL_SECONDS (0 = off).
+    # Streams are timed to their first chunk, completions end to end; keep the slow-call limit
+    # above HF_COMPLETION_TIMEOUT if enabled, or healthy long generations will open the circuit.
+    HF_BREAKER_ENABLED: bool = True
+    HF_BREAKER_WINDOW: int = 20
+    HF_BREAKER_MIN_CALLS: int = 5
+    HF_BREAKER_FAILURE_RATIO: float = 0.5
+    HF_BREAKER_SLOW_CALL_SECONDS: float = 0.0
+    HF_BREAKER_OPEN_SECONDS: float = 30.0
+    # Retries for 429/5xx and connection errors (jittered exponential backoff)
+    HF_RETRY_ATTEMPTS: int = 2
+    HF_RETRY_BACKOFF_BASE: float = 0.5
+    HF_RETRY_BACKOFF_MAX: float = 8.0
+
+    # AI summary pipeline
+    # Run the independent section prompts (overview, start, current status,
+    # recommendations, main summary) in parallel instead of one after another.
+    AI_CONCURRENT_SECTIONS: bool = True
+    AI_SECTION_MAX_WORKERS: int = 5
+    # Prompt token budgets (see app/utils/token_budget.py); per-model overrides as JSON,
+    # e.g. AI_PROMPT_TOKEN_BUDGETS='{"meta-llama/Llama-3.1-8B-Instruct": 3000}'
+    AI_PROMPT_TOKEN_BUDGET: int = 6000
+    AI_PROMPT_TOKEN_BUDGETS: Dict[str, int] = {}
+    # Optional Hugging Face tokenizer used to count prompt tokens (estimated when unset)
+    AI_PROMPT_TOKENIZER: Optional[str] = None
+    # Generate all summary sections from one JSON completion (per request: single_shot)
+    AI_SINGLE_SHOT_ANALYSIS: bool = False
+    # Map-reduce main summary for long histories (see app/utils/summary_chunks.py):
+    # chunks by calendar "month" or by "sessions"; 0 disables the automatic switch.
+    AI_MAP_REDUCE_MIN_REPORTS: int = 100
+    AI_MAP_REDUCE_CHUNK_BY: str = "month"
+    AI_MAP_REDUCE_CHUNK_SIZE: int = 20  # sessions per chunk (also the cap for one month)
+    AI_MAP_REDUCE_MAX_WORKERS: int = 4
+    # Background summary jobs (see app/utils/job_queue.py)
+    SUMMARY_JOB_BACKEND: str = "thread"
+    SUMMARY_JOB_MAX_WORKERS: int = 2  # jobs generated at once; each fans out its own sections
+    SUMMARY_JOB_MAX_PENDING: int = 20  # further jobs allowed to wait before new ones get 503
+    SUMMARY_JOB_POLL_INTERVAL: float = 1.0  # seconds between status checks of the job events stream
+    SUMMARY_JOB_TIMEOUT: float = 1800.0  # seconds a job may stay queued or running before it is reported failed
+    # Class-wide batch summaries (POST /therapy-reports/summary/ai/batch)
+    AI_BATCH_MAX_STUDENTS: int = 60
+    AI_BATCH_MAX_CONCURRENT_STUDENTS: int = 3
+
+    # Translation inference pool (see app/utils/translation_executor.py)
+    # Malayalam requests mostly wait on shared batches, so several can be in flight per batch.
+    TRANSLATION_MAX_WORKERS: int = 8  # translations run at once
+    TRANSLATION_MAX_PENDING: int = 16  # further translations allowed to wait before new ones get 503
+    # Comma-separated languages (e.g. "mal_Mlym,hin_Deva") whose models are loaded and warmed
+    # in the background at startup; GET /translation-ready reports 503 until they are ready.
+    TRANSLATION_PRELOAD_LANGUAGES: str = "mal_Mlym"
+    TRANSLATION_PRELOAD_CONVERT: bool = True  # convert NLLB to CTranslate2 at startup if missing
+    # Run the Helsinki-NLP Marian models (non-Malayalam) on CTranslate2 INT8 like NLLB,
+    # converted once into models/; false uses PyTorch MarianMTModel.generate instead.
+    TRANSLATION_MARIAN_CT2: bool = True
+    TRANSLATION_MARIAN_BATCH_SIZE: int = 16  # segments per generate call on the PyTorch path
+    # Cross-request micro-batching of CTranslate2 lines (see app/utils/translation_batcher.py)
+    TRANSLATION_BATCHING_ENABLED: bool = True
+    TRANSLATION_BATCH_MAX_WAIT_MS: float = 10.0  # how long a batch waits for more requests
+    TRANSLATION_BATCH_MAX_TOKENS: int = 4096  # source tokens per merged batch
+    # Translation memory of already translated lines (see app/utils/translation_memory.py)
+    TRANSLATION_MEMORY_ENABLED: bool = True
+    TRANSLATION_MEMORY_MAX_ENTRIES: int = 20000  # lines kept in process; all are kept in the table
+    TRANSLATION_MEMORY_PERSIST: bool = True  # back the in-process LRU with the translation_memory table
+
+    # LLM response cache (see app/utils/llm_cache.py)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 512
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    # Optional SQLite file so cached completions survive restarts
+    LLM_CACHE_PATH: Optional[str] = None
 
     class Config:
         env_file = str(ENV_FILE)
@@ -14,4 +14,7 @@ from app.crud.teacher import teacher
 from app.crud.user import user 
 from app.crud import therapy_report
 from app.crud import therapist
-from app.crud import notification
\ No newline at end of file
+from app.crud import notification
+from app.crud import summary_state
+from app.crud import summary_job
+from app.crud import progress_stats
@@ -23,6 +23,28 @@ def create(db: Session, *, obj_in: NotificationCreate, sent_by_user_id: int = No
     return db_obj
 
 
+def create_many(db: Session, *, objs_in: List[NotificationCreate], sent_by_user_id: int = None, sent_by_name: str = None, sent_by_role: str = None) -> List[Notification]:
+    """Insert several notifications with a single commit."""
+    db_objs = [
+        Notification(
+            student_id=obj_in.student_id,
+            sent_by_user_id=sent_by_user_id,
+            sent_by_name=sent_by_name,
+            sent_by_role=sent_by_role,
+            title=obj_in.title,
+            message=obj_in.message,
+            report_summary=obj_in.report_summary,
+            report_from_date=obj_in.report_from_date,
+            report_to_date=obj_in.report_to_date,
+            therapy_type=obj_in.therapy_type,
+        )
+        for obj_in in objs_in
+    ]
+    db.add_all(db_objs)
+    db.commit()
+    return db_objs
+
+
 def get_by_student_id(db: Session, student_id: str) -> List[Notification]:
     """Get all notifications for a student (by student_id string like STU2025001)."""
     return (
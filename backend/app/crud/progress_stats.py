@@ -0,0 +1,213 @@
+"""
+Maintenance of `student_progress_stats`, the running aggregates of a student's reports.
+
+`add_report` folds one newly created report into its student's row:
+- counts and first appearances of progress levels and therapy types;
+- the scored levels in report order (one digit per report);
+- the most recent levels;
+- the mean and squared deviations (Welford) of the days between sessions.
+
+A backdated report splits the interval between its neighbouring sessions: that
+interval is removed from the running mean/variance and the two new ones are added.
+`rebuild` recomputes a row from the reports, for students whose row is missing.
+"""
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.progress_stats import StudentProgressStats
+from app.models.therapy_report import TherapyReport
+from app.utils.improvement_metrics import LEVEL_SCORES
+
+# Progress levels kept in `recent_levels`
+RECENT_LEVELS = 10
+
+
+def get(db: Session, *, student_id: int) -> Optional[StudentProgressStats]:
+    return db.query(StudentProgressStats).filter(StudentProgressStats.student_id == student_id).first()
+
+
+def get_many(db: Session, *, student_ids: List[int]) -> Dict[int, StudentProgressStats]:
+    """Stats rows of several students, keyed by student id (students without a row are left out)."""
+    if not student_ids:
+        return {}
+    rows = db.query(StudentProgressStats).filter(StudentProgressStats.student_id.in_(student_ids)).all()
+    return {row.student_id: row for row in rows}
+
+
+def covers(stats: Optional[StudentProgressStats], reports) -> bool:
+    """Whether `stats` aggregates exactly `reports` (all of the student's reports, oldest first)."""
+    return (
+        stats is not None
+        and bool(reports)
+        and stats.report_count == len(reports)
+        and stats.first_report_id == reports[0].id
+        and stats.last_report_id == reports[-1].id
+    )
+
+
+def _add_interval(stats: StudentProgressStats, days: int) -> None:
+    stats.interval_count += 1
+    delta = days - stats.interval_mean
+    stats.interval_mean += delta / stats.interval_count
+    stats.interval_m2 += delta * (days - stats.interval_mean)
+
+
+def _remove_interval(stats: StudentProgressStats, days: int) -> None:
+    if stats.interval_count <= 1:
+        stats.interval_count, stats.interval_mean, stats.interval_m2 = 0, 0.0, 0.0
+        return
+    stats.interval_count -= 1
+    delta = days - stats.interval_mean
+    stats.interval_mean -= delta / stats.interval_count
+    stats.interval_m2 = max(0.0, stats.interval_m2 - delta * (days - stats.interval_mean))
+
+
+def _tally(counts: Dict[str, list], value: Optional[str], report_date, report_id: int) -> Dict[str, list]:
+    """Counts with `value` added; returns a new dict so the JSON column sees the change."""
+    counts = {key: list(entry) for key, entry in (counts or {}).items()}
+    if not value:
+        return counts
+    first_seen = [report_date.isoformat(), report_id]
+    entry = counts.get(value)
+    if entry is None:
+        counts[value] = [1] + first_seen
+    else:
+        entry[0] += 1
+        if first_seen < entry[1:]:
+            entry[1:] = first_seen
+    return counts
+
+
+def _recent_levels(db: Session, student_id: int) -> List[str]:
+    rows = (
+        db.query(TherapyReport.progress_level)
+        .filter(TherapyReport.student_id == student_id, TherapyReport.progress_level.isnot(None))
+        .filter(TherapyReport.progress_level != "")
+        .order_by(TherapyReport.report_date.desc(), TherapyReport.id.desc())
+        .limit(RECENT_LEVELS)
+        .all()
+    )
+    return [row.progress_level for row in reversed(rows)]
+
+
+def rebuild(db: Session, *, student_id: int) -> StudentProgressStats:
+    """Recompute the stats row of a student from all of their reports (flushed, not committed)."""
+    stats = get(db, student_id=student_id)
+    if stats is None:
+        stats = StudentProgressStats(student_id=student_id)
+        db.add(stats)
+    rows = (
+        db.query(TherapyReport.id, TherapyReport.report_date, TherapyReport.progress_level, TherapyReport.therapy_type)
+        .filter(TherapyReport.student_id == student_id)
+        .order_by(TherapyReport.report_date.asc(), TherapyReport.id.asc())
+        .all()
+    )
+    stats.report_count = len(rows)
+    stats.first_report_id = rows[0].id if rows else None
+    stats.first_report_date = rows[0].report_date if rows else None
+    stats.last_report_id = rows[-1].id if rows else None
+    stats.last_report_date = rows[-1].report_date if rows else None
+    stats.interval_count, stats.interval_mean, stats.interval_m2 = 0, 0.0, 0.0
+    level_counts: Dict[str, list] = {}
+    therapy_type_counts: Dict[str, list] = {}
+    scores = []
+    for i, row in enumerate(rows):
+        if i:
+            _add_interval(stats, (row.report_date - rows[i - 1].report_date).days)
+        level_counts = _tally(level_counts, row.progress_level, row.report_date, row.id)
+        therapy_type_counts = _tally(therapy_type_counts, row.therapy_type, row.report_date, row.id)
+        if row.progress_level in LEVEL_SCORES:
+            scores.append(str(LEVEL_SCORES[row.progress_level]))
+    stats.level_counts = level_counts
+    stats.therapy_type_counts = therapy_type_counts
+    stats.level_scores = "".join(scores)
+    stats.recent_levels = [row.progress_level for row in rows if row.progress_level][-RECENT_LEVELS:]
+    db.flush()
+    return stats
+
+
+def add_report(db: Session, report: TherapyReport) -> StudentProgressStats:
+    """Fold a newly created (flushed) report into its student's stats row.
+
+    The row is locked for the update so concurrent inserts for one student do not
+    overwrite each other; a missing row is rebuilt from the reports instead.
+    """
+    stats = (
+        db.query(StudentProgressStats)
+        .filter(StudentProgressStats.student_id == report.student_id)
+        .with_for_update()
+        .first()
+    )
+    if stats is None or not stats.report_count:
+        return rebuild(db, student_id=report.student_id)
+
+    report_date = report.report_date
+    # A new report has the highest id, so it follows every report of the same day.
+    appended = report_date >= stats.last_report_date
+    if appended:
+        _add_interval(stats, (report_date - stats.last_report_date).days)
+        stats.last_report_id, stats.last_report_date = report.id, report_date
+    elif report_date < stats.first_report_date:
+        _add_interval(stats, (stats.first_report_date - report_date).days)
+        stats.first_report_id, stats.first_report_date = report.id, report_date
+    else:
+        others = db.query(TherapyReport.report_date).filter(
+            TherapyReport.student_id == report.student_id, TherapyReport.id != report.id
+        )
+        previous = others.filter(TherapyReport.report_date <= report_date).order_by(
+            TherapyReport.report_date.desc()
+        ).first().report_date
+        following = others.filter(TherapyReport.report_date > report_date).order_by(
+            TherapyReport.report_date.asc()
+        ).first().report_date
+        _remove_interval(stats, (following - previous).days)
+        _add_interval(stats, (report_date - previous).days)
+        _add_interval(stats, (following - report_date).days)
+    stats.report_count += 1
+
+    stats.level_counts = _tally(stats.level_counts, report.progress_level, report_date, report.id)
+    stats.therapy_type_counts = _tally(stats.therapy_type_counts, report.therapy_type, report_date, report.id)
+    if report.progress_level in LEVEL_SCORES:
+        digit = str(LEVEL_SCORES[report.progress_level])
+        if appended:
+            stats.level_scores = (stats.level_scores or "") + digit
+        else:
+            position = (
+                db.query(TherapyReport.id)
+                .filter(
+                    TherapyReport.student_id == report.student_id,
+                    TherapyReport.id != report.id,
+                    TherapyReport.report_date <= report_date,
+                    TherapyReport.progress_level.in_(list(LEVEL_SCORES)),
+                )
+                .count()
+            )
+            stats.level_scores = stats.level_scores[:position] + digit + stats.level_scores[position:]
+    if report.progress_level:
+        if appended:
+            stats.recent_levels = (list(stats.recent_levels or []) + [report.progress_level])[-RECENT_LEVELS:]
+        else:
+            stats.recent_levels = _recent_levels(db, report.student_id)
+    db.flush()
+    return stats
+
+
+def record_report(db: Session, report: TherapyReport) -> None:
+    """Update the stats for a new report without ever failing the report insert.
+
+    On error the student's row is dropped, so it is rebuilt from the reports on next read.
+    """
+    try:
+        with db.begin_nested():
+            add_report(db, report)
+    except Exception as e:
+        logging.warning(f"Could not update progress stats for student {report.student_id}: {e}")
+        try:
+            with db.begin_nested():
+                db.query(StudentProgressStats).filter(
+                    StudentProgressStats.student_id == report.student_id
+                ).delete(synchronize_session=False)
+        except Exception as drop_error:
+            logging.warning(f"Could not drop stale progress stats of student {report.student_id}: {drop_error}")
@@ -19,6 +19,15 @@ class CRUDStudent(CRUDBase[Student, StudentCreate, StudentUpdate]):
         """Get student by their string student_id (e.g., 'STU2025001')"""
         return db.query(Student).filter(Student.student_id == student_id).first()
         
+    def get_by_student_ids(self, db: Session, *, student_ids: List[str]) -> List[Student]:
+        """Get students by their string student_ids in a single query."""
+        if not student_ids:
+            return []
+        return db.query(Student).filter(Student.student_id.in_(student_ids)).all()
+
+    def get_by_class_name(self, db: Session, *, class_name: str) -> List[Student]:
+        return db.query(Student).filter(Student.class_name == class_name).order_by(Student.name).all()
+        
     def get_filtered(
         self, 
         db: Session, 
@@ -0,0 +1,79 @@
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.models.summary_job import SummaryJob
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED_STATUSES = (SUCCEEDED, FAILED)
+UNFINISHED_STATUSES = (QUEUED, RUNNING)
+
+
+def create(db: Session, *, student_id: int, request: Dict[str, Any], requested_by_user_id: int = None) -> SummaryJob:
+    db_obj = SummaryJob(
+        id=uuid.uuid4().hex,
+        student_id=student_id,
+        requested_by_user_id=requested_by_user_id,
+        status=QUEUED,
+        request=request,
+    )
+    db.add(db_obj)
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+
+def get(db: Session, job_id: str) -> Optional[SummaryJob]:
+    return db.query(SummaryJob).filter(SummaryJob.id == job_id).first()
+
+
+def remove(db: Session, job_id: str) -> None:
+    db.query(SummaryJob).filter(SummaryJob.id == job_id).delete()
+    db.commit()
+
+
+def mark_running(db: Session, job_id: str) -> None:
+    db.query(SummaryJob).filter(SummaryJob.id == job_id).update(
+        {"status": RUNNING, "started_at": func.now()}, synchronize_session=False
+    )
+    db.commit()
+
+
+def update_progress(db: Session, job_id: str, progress: Dict[str, Any]) -> None:
+    db.query(SummaryJob).filter(SummaryJob.id == job_id).update(
+        {"progress": progress}, synchronize_session=False
+    )
+    db.commit()
+
+
+def mark_succeeded(db: Session, job_id: str, result: Dict[str, Any]) -> None:
+    db.query(SummaryJob).filter(SummaryJob.id == job_id).update(
+        {"status": SUCCEEDED, "result": result, "error": None, "finished_at": func.now()},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def mark_failed(db: Session, job_id: str, error: str) -> None:
+    db.query(SummaryJob).filter(SummaryJob.id == job_id).update(
+        {"status": FAILED, "error": error, "finished_at": func.now()}, synchronize_session=False
+    )
+    db.commit()
+
+
+def fail_unfinished(db: Session, error: str, *, job_id: str = None, created_before: datetime = None) -> int:
+    """Mark queued/running jobs failed (optionally only `job_id`, or only older ones); returns how many."""
+    query = db.query(SummaryJob).filter(SummaryJob.status.in_(UNFINISHED_STATUSES))
+    if job_id is not None:
+        query = query.filter(SummaryJob.id == job_id)
+    if created_before is not None:
+        query = query.filter(SummaryJob.created_at < created_before)
+    count = query.update(
+        {"status": FAILED, "error": error, "finished_at": func.now()}, synchronize_session=False
+    )
+    db.commit()
+    return count
@@ -0,0 +1,48 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.models.summary_state import StudentSummaryState
+
+
+def get(db: Session, *, student_id: int, scope_key: str) -> Optional[StudentSummaryState]:
+    return (
+        db.query(StudentSummaryState)
+        .filter(StudentSummaryState.student_id == student_id, StudentSummaryState.scope_key == scope_key)
+        .first()
+    )
+
+
+def get_many(db: Session, *, student_ids: List[int], scope_key: str) -> Dict[int, StudentSummaryState]:
+    """Stored states of several students for one scope, keyed by student id."""
+    if not student_ids:
+        return {}
+    states = (
+        db.query(StudentSummaryState)
+        .filter(StudentSummaryState.student_id.in_(student_ids), StudentSummaryState.scope_key == scope_key)
+        .all()
+    )
+    return {state.student_id: state for state in states}
+
+
+def upsert(
+    db: Session,
+    *,
+    student_id: int,
+    scope_key: str,
+    last_report_id: int,
+    last_report_date,
+    report_count: int,
+    section_notes: Dict[str, Any],
+    analysis: Dict[str, Any],
+) -> StudentSummaryState:
+    db_obj = get(db, student_id=student_id, scope_key=scope_key)
+    if db_obj is None:
+        db_obj = StudentSummaryState(student_id=student_id, scope_key=scope_key)
+        db.add(db_obj)
+    db_obj.last_report_id = last_report_id
+    db_obj.last_report_date = last_report_date
+    db_obj.report_count = report_count
+    db_obj.section_notes = section_notes
+    db_obj.analysis = analysis
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
@@ -1,6 +1,8 @@
-from typing import List
+from typing import Dict, List, Optional, Tuple
+from datetime import date
 import json
 from sqlalchemy.orm import Session
+from app.crud import progress_stats
 from app.models.therapy_report import TherapyReport
 from app.schemas.therapy_report import TherapyReportCreate
 
@@ -21,6 +23,9 @@ def create(db: Session, *, obj_in: TherapyReportCreate) -> TherapyReport:
         progress_level=obj_in.progress_level,
     )
     db.add(db_obj)
+    db.flush()
+    # Keep the student's running progress statistics in the same transaction.
+    progress_stats.record_report(db, db_obj)
     db.commit()
     db.refresh(db_obj)
     return db_obj
@@ -28,3 +33,81 @@ def create(db: Session, *, obj_in: TherapyReportCreate) -> TherapyReport:
 
 def get_by_student(db: Session, student_id: int) -> List[TherapyReport]:
     return db.query(TherapyReport).filter(TherapyReport.student_id == student_id).order_by(TherapyReport.report_date.desc()).all()
+
+
+def get_by_student_filtered(
+    db: Session,
+    student_id: int,
+    *,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    therapy_type: Optional[str] = None,
+) -> List[TherapyReport]:
+    """Reports for a student within an optional date window / therapy type, oldest first."""
+    query = db.query(TherapyReport).filter(TherapyReport.student_id == student_id)
+    if from_date:
+        query = query.filter(TherapyReport.report_date >= from_date)
+    if to_date:
+        query = query.filter(TherapyReport.report_date <= to_date)
+    if therapy_type:
+        query = query.filter(TherapyReport.therapy_type == therapy_type)
+    return query.order_by(TherapyReport.report_date.asc(), TherapyReport.id.asc()).all()
+
+
+def get_by_students_filtered(
+    db: Session,
+    student_ids: List[int],
+    *,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    therapy_type: Optional[str] = None,
+) -> Dict[int, List[TherapyReport]]:
+    """Filtered reports of several students in one query, grouped by student id, oldest first."""
+    if not student_ids:
+        return {}
+    query = db.query(TherapyReport).filter(TherapyReport.student_id.in_(student_ids))
+    if from_date:
+        query = query.filter(TherapyReport.report_date >= from_date)
+    if to_date:
+        query = query.filter(TherapyReport.report_date <= to_date)
+    if therapy_type:
+        query = query.filter(TherapyReport.therapy_type == therapy_type)
+    grouped: Dict[int, List[TherapyReport]] = {}
+    for report in query.order_by(
+        TherapyReport.student_id.asc(), TherapyReport.report_date.asc(), TherapyReport.id.asc()
+    ):
+        grouped.setdefault(report.student_id, []).append(report)
+    return grouped
+
+
+def get_metric_columns(
+    db: Session,
+    student_ids: List[int],
+    *,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    therapy_type: Optional[str] = None,
+) -> List[Tuple]:
+    """(student_id, report_date, progress_level, therapy_type) of the filtered reports of several
+    students, ordered by student then date; no report objects (or goal JSON) are loaded."""
+    if not student_ids:
+        return []
+    query = db.query(
+        TherapyReport.student_id,
+        TherapyReport.report_date,
+        TherapyReport.progress_level,
+        TherapyReport.therapy_type,
+    ).filter(TherapyReport.student_id.in_(student_ids))
+    if from_date:
+        query = query.filter(TherapyReport.report_date >= from_date)
+    if to_date:
+        query = query.filter(TherapyReport.report_date <= to_date)
+    if therapy_type:
+        query = query.filter(TherapyReport.therapy_type == therapy_type)
+    return query.order_by(
+        TherapyReport.student_id.asc(), TherapyReport.report_date.asc(), TherapyReport.id.asc()
+    ).all()
+
+
+def has_reports(db: Session, student_id: int) -> bool:
+    return db.query(TherapyReport.id).filter(TherapyReport.student_id == student_id).first() is not None
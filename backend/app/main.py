@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 import os
 
@@ -7,7 +8,13 @@ import os
 load_dotenv()
 
 from app.api.api import api_router
+from app.api.endpoints.therapy_reports import fail_orphaned_summary_jobs
+from app.api.endpoints.translation import start_translation_preload
 from app.core.config import settings
+from app.utils.hf_client import init_hf_client, close_hf_client, router_health
+from app.utils.job_queue import shutdown_job_backend
+from app.utils.timing import render_metrics
+from app.utils.translation_executor import shutdown_translation_executor
 
 app = FastAPI(
     title="Special School Management System",
@@ -37,6 +44,47 @@ app.add_middleware(
 # Include API router with the v1 prefix
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.on_event("startup")
+def startup_hf_client():
+    # One pooled keep-alive client for all Hugging Face router calls
+    init_hf_client()
+
+@app.on_event("startup")
+def preload_translation_models():
+    # Loads (and if needed converts) the translation models without delaying startup
+    start_translation_preload()
+
+@app.on_event("startup")
+def sweep_summary_jobs():
+    # Jobs queued or running when the previous process stopped will never finish
+    fail_orphaned_summary_jobs()
+
+@app.on_event("shutdown")
+def shutdown_hf_client():
+    close_hf_client()
+
+@app.on_event("shutdown")
+def shutdown_summary_jobs():
+    shutdown_job_backend()
+
+@app.on_event("shutdown")
+def shutdown_translations():
+    shutdown_translation_executor()
+
+@app.get("/health")
+def health():
+    # "degraded" while the model router circuit is open: AI summaries use data-driven fallbacks
+    hf_router = router_health()
+    return {
+        "status": "ok" if hf_router["circuit"]["state"] != "open" else "degraded",
+        "hf_router": hf_router,
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # AI summary stage/request latency and token usage histograms, Prometheus text format
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 @app.head("/")
 async def root():
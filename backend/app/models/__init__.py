@@ -2,4 +2,8 @@ from app.models.student import Student
 from app.models.teacher import Teacher
 from app.models.therapist import Therapist
 from app.models.user import User
-from app.models.notification import Notification 
\ No newline at end of file
+from app.models.notification import Notification
+from app.models.summary_state import StudentSummaryState
+from app.models.summary_job import SummaryJob
+from app.models.progress_stats import StudentProgressStats
+from app.models.translation_memory import TranslationMemoryEntry
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, Float, Text, ForeignKey, Date, DateTime, JSON
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+
+class StudentProgressStats(Base):
+    """Running aggregates of a student's therapy reports, updated as reports are created.
+
+    Lets the improvement metrics be read without loading the reports (see
+    app/crud/progress_stats.py for how each field is maintained).
+    """
+    __tablename__ = "student_progress_stats"
+
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
+
+    # First and last report in (report_date, id) order
+    report_count = Column(Integer, nullable=False, default=0)
+    first_report_id = Column(Integer, nullable=True)
+    first_report_date = Column(Date, nullable=True)
+    last_report_id = Column(Integer, nullable=True)
+    last_report_date = Column(Date, nullable=True)
+
+    # Days between consecutive sessions: count, mean and sum of squared deviations (Welford)
+    interval_count = Column(Integer, nullable=False, default=0)
+    interval_mean = Column(Float, nullable=False, default=0.0)
+    interval_m2 = Column(Float, nullable=False, default=0.0)
+
+    # {value: [count, first report date (ISO), first report id]} for progress levels and therapy types
+    level_counts = Column(JSON, nullable=False, default=dict)
+    therapy_type_counts = Column(JSON, nullable=False, default=dict)
+    # Scored progress levels in report order, one digit per report (see LEVEL_SCORES)
+    level_scores = Column(Text, nullable=False, default="")
+    # Progress levels of the most recent reports, oldest first
+    recent_levels = Column(JSON, nullable=False, default=list)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
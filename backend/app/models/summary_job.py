@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+
+class SummaryJob(Base):
+    """AI summary generated in the background; clients poll it by id."""
+    __tablename__ = "summary_jobs"
+
+    # uuid4 hex, returned to the client when the job is queued
+    id = Column(String(32), primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False, index=True)
+    requested_by_user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    # queued -> running -> succeeded | failed
+    status = Column(String, nullable=False, default="queued", index=True)
+    # TherapyAISummaryRequest payload the job was created with
+    request = Column(JSON, nullable=False)
+    # {"completed_sections": [...], "total_sections": n}
+    progress = Column(JSON, nullable=True)
+    # TherapyAISummaryResponse payload once succeeded
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime, JSON, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+
+class StudentSummaryState(Base):
+    """Last AI analysis generated for a student, so later requests only process new reports."""
+    __tablename__ = "student_summary_states"
+    __table_args__ = (
+        UniqueConstraint("student_id", "scope_key", name="uq_student_summary_states_student_scope"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Request scope the state belongs to: therapy type, start date and model
+    scope_key = Column(String, nullable=False)
+
+    # Last report covered by the stored analysis, ordered by (report_date, id)
+    last_report_id = Column(Integer, nullable=True)
+    last_report_date = Column(Date, nullable=True)
+    report_count = Column(Integer, nullable=False, default=0)
+
+    # Latest notes per section label and the full TherapyAISummaryResponse payload
+    section_notes = Column(JSON, nullable=True)
+    analysis = Column(JSON, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
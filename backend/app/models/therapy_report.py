@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Text, DateTime, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, Text, DateTime, JSON, Index
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
 
 class TherapyReport(Base):
     __tablename__ = "therapy_reports"
+    __table_args__ = (
+        # Summary queries filter by student and date window, optionally by therapy type
+        Index("ix_therapy_reports_student_id_report_date", "student_id", "report_date"),
+        Index("ix_therapy_reports_student_id_therapy_type_report_date", "student_id", "therapy_type", "report_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+
+class TranslationMemoryEntry(Base):
+    """A translated source line, reused by later translations of the same line
+    (see app/utils/translation_memory.py)."""
+    __tablename__ = "translation_memory"
+
+    # sha256 of (model, target language, normalized source line, glossary version)
+    key = Column(String(64), primary_key=True)
+    model = Column(String(200), nullable=False)
+    target_language = Column(String(20), nullable=False)
+    glossary_version = Column(String(16), nullable=False, default="")
+    source_text = Column(Text, nullable=False)
+    translated_text = Column(Text, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,57 @@
+"""
+Thread pool with a limit on running plus waiting tasks.
+
+`concurrent.futures.ThreadPoolExecutor` queues without bound, so a burst of slow
+work (summary jobs, translations) would pile up in memory and wait indefinitely.
+`BoundedExecutor` lets `max_workers` tasks run and `max_pending` more wait; beyond
+that `submit` raises the configured "queue full" error so the endpoint can answer
+503 instead.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Type
+
+
+class BoundedExecutor:
+    """Thread pool that rejects work once `max_workers + max_pending` tasks are in flight."""
+
+    def __init__(self, *, max_workers: int, max_pending: int, thread_name_prefix: str, full_error: Type[Exception]):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(0, max_pending)
+        self.full_error = full_error
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Schedule `fn(*args, **kwargs)`. Raises `full_error` when saturated."""
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_pending:
+                self._rejected += 1
+                raise self.full_error(f"{self._in_flight} tasks already queued or running")
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except RuntimeError:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self) -> None:
+        # Cancelled futures still run their done callbacks, so the in-flight count stays right.
+        self._executor.shutdown(wait=False, cancel_futures=True)
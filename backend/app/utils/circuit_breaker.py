@@ -0,0 +1,218 @@
+"""
+Circuit breaker for calls to an external service.
+
+The breaker keeps the outcomes of the last `window_size` calls. Once at least
+`min_calls` are recorded and the share of bad ones (failed, or slower than
+`slow_call_seconds`) reaches `failure_ratio`, it opens: calls are rejected with
+`CircuitOpenError` right away so callers can use their fallbacks instead of
+waiting for timeouts. After `open_seconds` it goes half-open and lets
+`half_open_max_calls` probe calls through; a good probe closes it again and a bad
+one re-opens it.
+
+Streamed calls are guarded with `stream_call`, which records the outcome at the
+first chunk: the time to first chunk is how fast the service answers, while the
+length of the stream only reflects how much text was generated.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def _percentile(sorted_values, fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return round(sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))], 3)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a call while the circuit is open."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        *,
+        window_size: int = 20,
+        min_calls: int = 5,
+        failure_ratio: float = 0.5,
+        slow_call_seconds: Optional[float] = None,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+        enabled: bool = True,
+    ):
+        self.name = name
+        self.enabled = enabled
+        self.min_calls = max(1, min_calls)
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self._outcomes: "deque[tuple]" = deque(maxlen=max(self.min_calls, window_size))  # (ok, latency)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._times_opened = 0
+        self._rejected = 0
+        self._last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    # ---- state ------------------------------------------------------------
+
+    def _current_state(self, now: float) -> str:
+        # Called with the lock held.
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+            logger.info(f"Circuit '{self.name}' half-open: probing")
+        return self._state
+
+    def _open(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self._times_opened += 1
+        logger.warning(f"Circuit '{self.name}' opened for {self.open_seconds:.0f}s (last error: {self._last_error})")
+
+    def allows_calls(self) -> bool:
+        """Whether a call would currently be let through (does not take a probe slot)."""
+        if not self.enabled:
+            return True
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            return state == CLOSED or (state == HALF_OPEN and self._probes_in_flight < self.half_open_max_calls)
+
+    def before_call(self) -> None:
+        """Admit one call or raise CircuitOpenError. Admitted calls must be finished with `after_call`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+                self._probes_in_flight += 1
+                return
+            self._rejected += 1
+        raise CircuitOpenError(f"Circuit '{self.name}' is open; skipping call")
+
+    def after_call(self, ok: Optional[bool], latency: float, error: Optional[BaseException] = None) -> None:
+        """Record an admitted call. `ok=None` releases it without counting an outcome."""
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if ok is None:
+                return
+            slow = self.slow_call_seconds is not None and latency >= self.slow_call_seconds
+            good = ok and not slow
+            if error is not None:
+                self._last_error = f"{type(error).__name__}: {error}"
+            elif slow:
+                self._last_error = f"slow call ({latency:.1f}s)"
+
+            if state == HALF_OPEN:
+                if good:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                    logger.info(f"Circuit '{self.name}' closed after a successful probe")
+                else:
+                    self._open(now)
+                return
+            if state == OPEN:
+                return  # finished after another call opened the circuit
+
+            self._outcomes.append((good, latency))
+            bad = sum(1 for outcome_ok, _ in self._outcomes if not outcome_ok)
+            if len(self._outcomes) >= self.min_calls and bad / len(self._outcomes) >= self.failure_ratio:
+                self._open(now)
+
+    @contextmanager
+    def call(self, is_failure: Callable[[BaseException], bool] = lambda e: True):
+        """Guard one call: `with breaker.call(): ...`.
+
+        Exceptions for which `is_failure` is false (e.g. a 400 response) count as
+        successful round trips; leaving the block through GeneratorExit (a consumer
+        that stopped reading a stream) records nothing.
+        """
+        self.before_call()
+        start = time.monotonic()
+        outcome: Optional[bool] = None
+        error: Optional[BaseException] = None
+        try:
+            yield
+            outcome = True
+        except Exception as e:
+            outcome = not is_failure(e)
+            error = None if outcome else e
+            raise
+        finally:
+            self.after_call(outcome, time.monotonic() - start, error)
+
+    @contextmanager
+    def stream_call(self, is_failure: Callable[[BaseException], bool] = lambda e: True):
+        """Guard a streamed call, timed to its first chunk rather than the whole stream.
+
+        Yields a function to call when the first chunk arrives; the outcome (a good
+        call with the time to first chunk as latency) is recorded then, so a long but
+        healthy generation is never counted as slow. Errors before the first chunk
+        are recorded like in `call`; errors after it are left to the caller.
+        """
+        self.before_call()
+        start = time.monotonic()
+        recorded = False
+
+        def first_chunk() -> None:
+            nonlocal recorded
+            if not recorded:
+                recorded = True
+                self.after_call(True, time.monotonic() - start)
+
+        outcome: Optional[bool] = None
+        error: Optional[BaseException] = None
+        try:
+            yield first_chunk
+            outcome = True
+        except Exception as e:
+            outcome = not is_failure(e)
+            error = None if outcome else e
+            raise
+        finally:
+            if not recorded:
+                recorded = True
+                self.after_call(outcome, time.monotonic() - start, error)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now) if self.enabled else CLOSED
+            latencies = sorted(latency for _, latency in self._outcomes)
+            bad = sum(1 for ok, _ in self._outcomes if not ok)
+            return {
+                "name": self.name,
+                "enabled": self.enabled,
+                "state": state,
+                "recent_calls": len(self._outcomes),
+                "recent_failures": bad,
+                "failure_rate": round(bad / len(self._outcomes), 3) if self._outcomes else 0.0,
+                "latency_p50_seconds": _percentile(latencies, 0.5),
+                "latency_p95_seconds": _percentile(latencies, 0.95),
+                "retry_in_seconds": round(max(0.0, self.open_seconds - (now - self._opened_at)), 1)
+                if state == OPEN
+                else 0.0,
+                "times_opened": self._times_opened,
+                "rejected_calls": self._rejected,
+                "last_error": self._last_error,
+            }
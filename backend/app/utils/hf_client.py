@@ -0,0 +1,232 @@
+"""
+Shared HTTP client for the Hugging Face router (OpenAI-compatible chat completions).
+
+A single pooled `httpx.Client` is created at application startup and closed at
+shutdown, so every model call reuses warm keep-alive (optionally HTTP/2)
+connections instead of paying a new TCP + TLS handshake per prompt.
+
+`call_slot()` bounds router calls process-wide: at most HF_MAX_CONCURRENT_REQUESTS
+in flight and, if HF_REQUESTS_PER_MINUTE is set, no more than that many started
+per minute, so batch runs cannot flood the router.
+
+`router_breaker` trips when recent router calls keep failing (429/5xx, connection
+errors, timeouts) or get slow; while it is open, calls fail fast with
+CircuitOpenError and the summary endpoints serve their data-driven fallbacks.
+`post_chat_completion` retries 429/5xx and connection failures with jittered
+exponential backoff, honouring Retry-After.
+"""
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import httpx
+
+from app.core.config import settings
+from app.utils.circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+
+
+class _RateLimiter:
+    """Token bucket refilled continuously at `per_minute` tokens per minute."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_call_semaphore = (
+    threading.BoundedSemaphore(settings.HF_MAX_CONCURRENT_REQUESTS) if settings.HF_MAX_CONCURRENT_REQUESTS > 0 else None
+)
+_rate_limiter = _RateLimiter(settings.HF_REQUESTS_PER_MINUTE) if settings.HF_REQUESTS_PER_MINUTE > 0 else None
+
+router_breaker = CircuitBreaker(
+    "hf-router",
+    window_size=settings.HF_BREAKER_WINDOW,
+    min_calls=settings.HF_BREAKER_MIN_CALLS,
+    failure_ratio=settings.HF_BREAKER_FAILURE_RATIO,
+    slow_call_seconds=settings.HF_BREAKER_SLOW_CALL_SECONDS or None,
+    open_seconds=settings.HF_BREAKER_OPEN_SECONDS,
+    enabled=settings.HF_BREAKER_ENABLED,
+)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client() -> httpx.Client:
+    http2 = settings.HF_HTTP2
+    if http2 and not _http2_available():
+        logger.warning("HF_HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1 keep-alive")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=settings.HF_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HF_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.HF_POOL_KEEPALIVE_EXPIRY,
+    )
+    logger.info(
+        f"Creating Hugging Face router client (http2={http2}, "
+        f"max_connections={limits.max_connections}, max_keepalive={limits.max_keepalive_connections})"
+    )
+    return httpx.Client(
+        limits=limits,
+        timeout=completion_timeout(),
+        http2=http2,
+        headers={"Content-Type": "application/json"},
+    )
+
+
+def init_hf_client() -> httpx.Client:
+    """Create the shared client if it does not exist yet (called at app startup)."""
+    global _client
+    with _client_lock:
+        if _client is None or _client.is_closed:
+            _client = _build_client()
+        return _client
+
+
+def get_hf_client() -> httpx.Client:
+    """Return the shared client, creating it lazily for scripts that skip app startup."""
+    client = _client
+    if client is None or client.is_closed:
+        client = init_hf_client()
+    return client
+
+
+def close_hf_client() -> None:
+    """Close the shared client and release pooled connections (called at app shutdown)."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+            logger.info("Hugging Face router client closed")
+
+
+@contextmanager
+def call_slot():
+    """Hold a router request slot for the duration of one completion (streaming or not)."""
+    if _rate_limiter is not None:
+        _rate_limiter.acquire()
+    if _call_semaphore is None:
+        yield
+        return
+    _call_semaphore.acquire()
+    try:
+        yield
+    finally:
+        _call_semaphore.release()
+
+
+def completion_timeout() -> httpx.Timeout:
+    """Timeout for regular (non-streaming) chat completions."""
+    return httpx.Timeout(settings.HF_COMPLETION_TIMEOUT, connect=settings.HF_CONNECT_TIMEOUT)
+
+
+def stream_timeout() -> httpx.Timeout:
+    """Timeout for streaming completions: bounded wait between chunks, not for the whole body."""
+    return httpx.Timeout(settings.HF_STREAM_READ_TIMEOUT, connect=settings.HF_CONNECT_TIMEOUT)
+
+
+def chat_completions_url() -> str:
+    """Resolve the `/v1/chat/completions` URL from HUGGINGFACE_BASE_URL."""
+    base = getattr(settings, "HUGGINGFACE_BASE_URL", "https://router.huggingface.co") or "https://router.huggingface.co"
+    base = base.rstrip("/")
+    if base.endswith("/v1"):
+        v1_base = base
+    else:
+        v1_base = f"{base}/v1"
+    return f"{v1_base}/chat/completions"
+
+
+def auth_headers() -> dict:
+    return {"Authorization": f"Bearer {settings.HUGGINGFACE_API_TOKEN}"}
+
+
+def is_router_failure(error: BaseException) -> bool:
+    """Errors that say the router is unhealthy (as opposed to a bad request)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        code = error.response.status_code
+        return code == 429 or code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+def _is_retryable(error: BaseException) -> bool:
+    # Read timeouts are not retried: another full timeout is what the breaker avoids.
+    if isinstance(error, httpx.HTTPStatusError):
+        return is_router_failure(error)
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError))
+
+
+def _retry_delay(attempt: int, error: BaseException) -> float:
+    """Full-jitter exponential backoff; a Retry-After header sets the minimum."""
+    cap = settings.HF_RETRY_BACKOFF_MAX
+    delay = random.uniform(0, min(cap, settings.HF_RETRY_BACKOFF_BASE * (2 ** attempt)))
+    if isinstance(error, httpx.HTTPStatusError):
+        retry_after = error.response.headers.get("Retry-After")
+        if retry_after and retry_after.strip().isdigit():
+            delay = max(delay, min(cap, float(retry_after)))
+    return delay
+
+
+def post_chat_completion(body: dict) -> dict:
+    """POST a non-streaming chat completion through the breaker, with retries.
+
+    Raises CircuitOpenError without calling the router while the breaker is open.
+    """
+    attempts = 1 + max(0, settings.HF_RETRY_ATTEMPTS)
+    for attempt in range(attempts):
+        try:
+            # Time spent waiting for a slot is not router latency, so the slot is taken first.
+            with call_slot(), router_breaker.call(is_router_failure):
+                resp = get_hf_client().post(
+                    chat_completions_url(),
+                    headers=auth_headers(),
+                    json=body,
+                    timeout=completion_timeout(),
+                )
+                resp.raise_for_status()
+            return resp.json()
+        except Exception as e:
+            if attempt + 1 >= attempts or not _is_retryable(e):
+                raise
+            delay = _retry_delay(attempt, e)
+            logger.warning(f"Router call failed ({e}); retry {attempt + 1}/{attempts - 1} in {delay:.2f}s")
+            time.sleep(delay)
+
+
+def router_health() -> dict:
+    """Breaker state and limits of the router client, for health checks."""
+    return {
+        "circuit": router_breaker.stats(),
+        "max_concurrent_requests": settings.HF_MAX_CONCURRENT_REQUESTS,
+        "requests_per_minute": settings.HF_REQUESTS_PER_MINUTE,
+        "retry_attempts": settings.HF_RETRY_ATTEMPTS,
+    }
@@ -0,0 +1,215 @@
+"""
+Improvement metrics computed over a column projection of therapy reports.
+
+The metrics only need four columns per report (student_id, report_date,
+progress_level, therapy_type), so callers pass those rows instead of full ORM
+objects, e.g. straight from `crud.therapy_report.get_metric_columns`. The numeric
+parts (session frequency, attendance consistency, progress trend) are computed
+for every student in one pass with NumPy: one diff over the date column for the
+session intervals and `bincount` sums per student instead of a Python loop per
+report.
+
+`improvement_metrics_by_student(rows)` returns the same dict that the summary
+pipeline has always used, per student; `improvement_metrics(rows)` is the
+single-student form. `progress_stats_metrics(stats)` reads that dict from a
+student's `student_progress_stats` row instead of their reports.
+"""
+from collections import Counter
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+# Progress levels scored for the trend; other values are ignored.
+LEVEL_SCORES = {
+    "Poor": 1, "Below Average": 2, "Average": 3,
+    "Good": 4, "Very Good": 5, "Excellent": 6,
+}
+
+
+class MetricRow(NamedTuple):
+    student_id: int
+    report_date: Any  # datetime.date
+    progress_level: Optional[str]
+    therapy_type: Optional[str]
+
+
+def metric_rows(reports: Iterable) -> List[MetricRow]:
+    """Project report objects onto the columns the metrics use."""
+    return [
+        MetricRow(report.student_id, report.report_date, report.progress_level, report.therapy_type)
+        for report in reports
+    ]
+
+
+def _trend_label(improvement: float) -> str:
+    if improvement > 1.5:
+        return "Significant improvement demonstrated"
+    elif improvement > 0.5:
+        return "Moderate improvement shown"
+    elif improvement > 0:
+        return "Slight improvement noted"
+    elif improvement == 0:
+        return "Stable performance maintained"
+    else:
+        return "Performance decline noted - needs attention"
+
+
+def _consistency_label(std_dev: float) -> str:
+    if std_dev <= 3:
+        return "Highly consistent attendance"
+    elif std_dev <= 7:
+        return "Moderately consistent attendance"
+    else:
+        return "Variable attendance pattern"
+
+
+def improvement_metrics_by_student(rows: Iterable) -> Dict[int, Dict[str, Any]]:
+    """Improvement metrics of every student in `rows`, keyed by student id.
+
+    Rows are (student_id, report_date, progress_level, therapy_type) in report order
+    (oldest first) within each student; students may be interleaved.
+    """
+    rows = list(rows)
+    if not rows:
+        return {}
+
+    owners = np.array([row[0] for row in rows])
+    # Group by student, keeping the report order within each student.
+    order = np.argsort(owners, kind="stable")
+    rows = [rows[i] for i in order]
+    owners = owners[order]
+    student_ids, starts, counts = np.unique(owners, return_index=True, return_counts=True)
+    group = np.repeat(np.arange(len(student_ids)), counts)
+    ends = starts + counts - 1
+
+    days = np.array([row[1].toordinal() for row in rows], dtype=np.int64)
+    # Span from the first to the last report as given.
+    span_days = days[ends] - days[starts]
+
+    # Session intervals use the dates sorted within each student.
+    by_date = np.lexsort((days, group))
+    sorted_days = days[by_date]
+    sorted_group = group[by_date]
+    first_day = sorted_days[starts]
+    last_day = sorted_days[ends]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_frequency = (last_day - first_day) / (counts - 1)
+
+    same_student = sorted_group[1:] == sorted_group[:-1]
+    intervals = np.diff(sorted_days)[same_student].astype(float)
+    interval_group = sorted_group[1:][same_student]
+    interval_counts = np.bincount(interval_group, minlength=len(student_ids))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        interval_mean = np.bincount(interval_group, intervals, minlength=len(student_ids)) / interval_counts
+        squared = (intervals - interval_mean[interval_group]) ** 2
+        interval_std = np.sqrt(np.bincount(interval_group, squared, minlength=len(student_ids)) / interval_counts)
+
+    # Trend: mean score of the first third of scored reports against the last third
+    # (first against last score when fewer than three are scored).
+    scores = np.array([LEVEL_SCORES.get(row[2], 0) for row in rows], dtype=float)
+    scored = scores > 0
+    scored_group = group[scored]
+    scored_values = scores[scored]
+    scored_counts = np.bincount(scored_group, minlength=len(student_ids))
+    scored_starts = np.concatenate(([0], np.cumsum(scored_counts)[:-1]))
+    position = np.arange(len(scored_values)) - scored_starts[scored_group]
+    start_n = np.where(scored_counts >= 3, scored_counts // 3, 1)
+    end_n = np.where(scored_counts >= 3, -(-scored_counts // 3), 1)
+    in_start = position < start_n[scored_group]
+    in_end = position >= (scored_counts - end_n)[scored_group]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        start_avg = np.bincount(scored_group, scored_values * in_start, minlength=len(student_ids)) / start_n
+        end_avg = np.bincount(scored_group, scored_values * in_end, minlength=len(student_ids)) / end_n
+    improvement = end_avg - start_avg
+
+    results = {}
+    for g, student_id in enumerate(student_ids.tolist()):
+        student_rows = rows[starts[g]:ends[g] + 1]
+        total = int(counts[g])
+        progress_counter = Counter(row[2] for row in student_rows if row[2])
+        therapy_counter = Counter(row[3] for row in student_rows if row[3])
+
+        if total < 2:
+            trend = "Insufficient data for trend analysis"
+        elif scored_counts[g] < 2:
+            trend = "No progress levels available for comparison"
+        else:
+            trend = _trend_label(float(improvement[g]))
+
+        if total < 3:
+            consistency = "Need more sessions for consistency analysis"
+        else:
+            consistency = _consistency_label(float(interval_std[g]))
+
+        results[student_id] = {
+            "total_sessions": total,
+            "therapy_types_count": len(therapy_counter),
+            "most_common_therapy": therapy_counter.most_common(1)[0] if therapy_counter else ("None", 0),
+            "progress_distribution": dict(progress_counter),
+            "session_frequency": (
+                f"{float(avg_frequency[g]):.1f} days between sessions" if total > 1 else "Single session only"
+            ),
+            "consistency_score": consistency,
+            "improvement_trend": trend,
+            "date_span_days": int(span_days[g]) if total > 1 else 0,
+        }
+    return results
+
+
+def improvement_metrics(rows: Iterable) -> Dict[str, Any]:
+    """Improvement metrics of one student's report rows."""
+    rows = list(rows)
+    if not rows:
+        return {"error": "No reports available for analysis"}
+    # The rows belong to one student; group them under a single key.
+    return improvement_metrics_by_student([(0,) + tuple(row[1:]) for row in rows])[0]
+
+
+def _first_seen_order(counts: Dict[str, list]) -> List[tuple]:
+    # counts: {value: [count, first report date (ISO), first report id]}
+    return sorted(((value, entry[0]) for value, entry in counts.items()), key=lambda item: counts[item[0]][1:])
+
+
+def progress_stats_metrics(stats) -> Dict[str, Any]:
+    """Improvement metrics read from a student's running aggregates (a StudentProgressStats row).
+
+    Gives the same dict as `improvement_metrics` over all of the student's reports
+    without reading them; only the trend walks the stored level digits.
+    """
+    total = stats.report_count or 0
+    if not total:
+        return {"error": "No reports available for analysis"}
+    levels = _first_seen_order(stats.level_counts or {})
+    therapy_types = _first_seen_order(stats.therapy_type_counts or {})
+    span_days = (stats.last_report_date - stats.first_report_date).days if total > 1 else 0
+
+    scores = [int(digit) for digit in stats.level_scores or ""]
+    if total < 2:
+        trend = "Insufficient data for trend analysis"
+    elif len(scores) < 2:
+        trend = "No progress levels available for comparison"
+    else:
+        start = scores[:len(scores) // 3] if len(scores) >= 3 else scores[:1]
+        end = scores[-len(scores) // 3:] if len(scores) >= 3 else scores[-1:]
+        trend = _trend_label(sum(end) / len(end) - sum(start) / len(start))
+
+    if total < 3:
+        consistency = "Need more sessions for consistency analysis"
+    else:
+        # Rounded so Welford's floating-point drift cannot cross a threshold.
+        variance = max(0.0, round(stats.interval_m2 / stats.interval_count, 9)) if stats.interval_count else 0.0
+        consistency = _consistency_label(variance ** 0.5)
+
+    return {
+        "total_sessions": total,
+        "therapy_types_count": len(therapy_types),
+        # max() keeps the first of equal counts, like Counter.most_common
+        "most_common_therapy": max(therapy_types, key=lambda item: item[1]) if therapy_types else ("None", 0),
+        "progress_distribution": dict(levels),
+        "session_frequency": (
+            f"{span_days / (total - 1):.1f} days between sessions" if total > 1 else "Single session only"
+        ),
+        "consistency_score": consistency,
+        "improvement_trend": trend,
+        "date_span_days": span_days,
+    }
@@ -0,0 +1,109 @@
+"""
+In-process background job execution for long-running AI work.
+
+Endpoints create a persisted job row, hand the job function to `submit_job` and
+return immediately; a worker runs it while the client polls. The executor is
+pluggable: SUMMARY_JOB_BACKEND names a backend registered with
+`register_job_backend` ("thread" by default), so a process-pool or external queue
+backend can be dropped in without touching the endpoints.
+"""
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional
+
+from app.core.config import settings
+from app.utils.bounded_executor import BoundedExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while every worker and queue slot is taken."""
+
+
+class JobBackend(ABC):
+    """Interface for job executors."""
+
+    @abstractmethod
+    def submit(self, fn: Callable, *args, **kwargs) -> None:
+        """Run `fn(*args, **kwargs)` in the background. Raises JobQueueFull when saturated."""
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+    def shutdown(self) -> None:
+        pass
+
+
+class ThreadPoolJobBackend(JobBackend):
+    """Bounded thread pool: `max_workers` jobs run at once, up to `max_pending` more wait."""
+
+    def __init__(self, *, max_workers: int, max_pending: int):
+        self._pool = BoundedExecutor(
+            max_workers=max_workers,
+            max_pending=max_pending,
+            thread_name_prefix="summary-job",
+            full_error=JobQueueFull,
+        )
+
+    def submit(self, fn: Callable, *args, **kwargs) -> None:
+        self._pool.submit(fn, *args, **kwargs).add_done_callback(self._on_done)
+
+    @staticmethod
+    def _on_done(future) -> None:
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Background job raised: {error}")
+
+    def stats(self) -> Dict[str, int]:
+        return self._pool.stats()
+
+    def shutdown(self) -> None:
+        self._pool.shutdown()
+
+
+def _thread_backend() -> JobBackend:
+    return ThreadPoolJobBackend(
+        max_workers=settings.SUMMARY_JOB_MAX_WORKERS,
+        max_pending=settings.SUMMARY_JOB_MAX_PENDING,
+    )
+
+
+_backend_factories: Dict[str, Callable[[], JobBackend]] = {"thread": _thread_backend}
+_backend: Optional[JobBackend] = None
+_backend_lock = threading.Lock()
+
+
+def register_job_backend(name: str, factory: Callable[[], JobBackend]) -> None:
+    """Make a backend selectable through SUMMARY_JOB_BACKEND."""
+    _backend_factories[name] = factory
+
+
+def get_job_backend() -> JobBackend:
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = settings.SUMMARY_JOB_BACKEND
+            factory = _backend_factories.get(name)
+            if factory is None:
+                logger.warning(f"Unknown SUMMARY_JOB_BACKEND '{name}'; using the thread backend")
+                factory = _thread_backend
+            _backend = factory()
+        return _backend
+
+
+def submit_job(fn: Callable, *args, **kwargs) -> None:
+    """Run `fn(*args, **kwargs)` in the background. Raises JobQueueFull when saturated."""
+    get_job_backend().submit(fn, *args, **kwargs)
+
+
+def shutdown_job_backend() -> None:
+    """Stop accepting jobs and drop queued ones (called at app shutdown)."""
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            _backend.shutdown()
+            _backend = None
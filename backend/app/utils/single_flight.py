@@ -0,0 +1,137 @@
+"""
+Request coalescing ("single-flight") for expensive, idempotent work.
+
+Concurrent callers that present the same key share one execution: the first
+caller (the leader) runs the work and the others wait for its result. For
+server-sent event streams, the events of the one producer are buffered and
+replayed to every subscriber, so a follower that attaches late still receives
+the whole stream. Keys are dropped when the work finishes; later callers start
+a fresh execution.
+"""
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class EventBroadcast:
+    """Events of one in-flight stream, replayed in order to each subscriber."""
+
+    def __init__(self):
+        self._events: List[str] = []
+        self._finished = False
+        self._cond = threading.Condition()
+
+    def publish(self, event: str) -> None:
+        with self._cond:
+            self._events.append(event)
+            self._cond.notify_all()
+
+    def finish(self) -> None:
+        with self._cond:
+            self._finished = True
+            self._cond.notify_all()
+
+    def subscribe(self) -> Iterator[str]:
+        position = 0
+        while True:
+            with self._cond:
+                while position >= len(self._events) and not self._finished:
+                    self._cond.wait()
+                pending = self._events[position:]
+                if not pending and self._finished:
+                    return
+            position += len(pending)
+            yield from pending
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, EventBroadcast] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Return `fn()`, or the result of the identical call already in flight.
+
+        Exceptions raised by the leader's `fn` are raised in every waiting caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            logger.info(f"{self.name}: joining in-flight call {key[:24]}")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stream(self, key: str, produce: Callable[[], Iterable[str]]) -> Iterator[str]:
+        """Subscribe to the event stream for `key`, starting `produce()` if none is in flight.
+
+        The producer runs in its own thread, so it finishes (and can persist its
+        result) even if the client that started it disconnects.
+        """
+        with self._lock:
+            broadcast = self._streams.get(key)
+            leader = broadcast is None
+            if leader:
+                broadcast = self._streams[key] = EventBroadcast()
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if leader:
+            def _run():
+                try:
+                    for event in produce():
+                        broadcast.publish(event)
+                except Exception:
+                    logger.exception(f"{self.name}: stream producer failed")
+                finally:
+                    with self._lock:
+                        self._streams.pop(key, None)
+                    broadcast.finish()
+
+            threading.Thread(target=_run, name=f"{self.name}-stream", daemon=True).start()
+        else:
+            logger.info(f"{self.name}: attaching to in-flight stream {key[:24]}")
+        return broadcast.subscribe()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls) + len(self._streams),
+                "executions": self.executions,
+                "shared": self.shared,
+            }
@@ -0,0 +1,80 @@
+"""
+Report chunking for map-reduce summaries of long therapy histories.
+
+Reports are grouped into chunks (calendar months, or runs of N sessions counted
+from the first report) that are summarized independently and then reduced into
+one progress summary. Chunk boundaries only depend on the reports before them,
+so adding sessions changes the newest chunk only; older chunks keep the same
+report ids and their cached summaries stay valid.
+"""
+import hashlib
+import json
+from typing import List, Optional, Sequence
+
+# Bump when the chunk summary prompt changes so stale cached summaries are ignored.
+CHUNK_PROMPT_VERSION = 1
+
+CHUNK_BY_MONTH = "month"
+CHUNK_BY_SESSIONS = "sessions"
+
+
+class ReportChunk:
+    """Consecutive reports summarized by one map call."""
+
+    __slots__ = ("label", "reports")
+
+    def __init__(self, label: str, reports: Sequence):
+        self.label = label
+        self.reports = list(reports)
+
+
+def _session_chunks(reports: Sequence, size: int) -> List[ReportChunk]:
+    chunks = []
+    for start in range(0, len(reports), size):
+        part = reports[start:start + size]
+        first, last = start + 1, start + len(part)
+        label = f"Sessions {first}-{last}" if last > first else f"Session {first}"
+        chunks.append(ReportChunk(f"{label} ({part[0].report_date} to {part[-1].report_date})", part))
+    return chunks
+
+
+def chunk_reports(reports: Sequence, by: str = CHUNK_BY_MONTH, size: int = 20) -> List[ReportChunk]:
+    """Split date-ordered `reports` into chunks by calendar month or by `size` sessions.
+
+    Months holding more than `size` sessions are split further so no single map
+    prompt grows without bound.
+    """
+    size = max(1, size)
+    if by != CHUNK_BY_MONTH:
+        return _session_chunks(reports, size)
+
+    chunks = []
+    month_start = 0
+    for i in range(1, len(reports) + 1):
+        if i < len(reports) and (
+            (reports[i].report_date.year, reports[i].report_date.month)
+            == (reports[month_start].report_date.year, reports[month_start].report_date.month)
+        ):
+            continue
+        month = reports[month_start:i]
+        month_label = month[0].report_date.strftime("%B %Y")
+        if len(month) <= size:
+            chunks.append(ReportChunk(month_label, month))
+        else:
+            for part_no, start in enumerate(range(0, len(month), size), 1):
+                chunks.append(ReportChunk(f"{month_label}, part {part_no}", month[start:start + size]))
+        month_start = i
+    return chunks
+
+
+def chunk_cache_key(model: str, chunk: ReportChunk, therapy_type: Optional[str] = None) -> str:
+    """Cache key of a chunk summary: its report ids and their last edit times.
+
+    Including `updated_at` means an edited report invalidates only its own chunk.
+    """
+    reports = [
+        [getattr(report, "id", None), str(getattr(report, "updated_at", None) or "")]
+        for report in chunk.reports
+    ]
+    raw = json.dumps(["chunk-summary", CHUNK_PROMPT_VERSION, model, therapy_type, reports])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
@@ -0,0 +1,419 @@
+"""
+Parsed view of therapy report `goals_achieved` data.
+
+`goals_achieved` is stored either as a dict / JSON string of
+`{key: {"label": ..., "notes": ..., "checked": ...}}` entries or, for old
+reports, as free text. `SectionIndex` parses every report of a request once
+so prompt builders and fallbacks can look up labels, notes and
+section-matched notes without re-running json.loads per call.
+
+`SectionMatcher` maps goal keys/labels onto the canonical section titles of a
+therapy type. The per-therapy matchers are built once at import time.
+"""
+import json
+import logging
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Section heading pattern used by old free-text reports ("Expressive Language: ...")
+_RAW_SECTION_TITLE_RE = re.compile(
+    r'^([A-Z][A-Za-z\s&(),]+(?:\s+and\s+[A-Z]+)?[A-Za-z\s]*):', re.MULTILINE
+)
+_RAW_SECTION_LOOKAHEAD = r"(?=\n[A-Z][A-Za-z\s&(),]+(?:\s+and\s+[A-Z]+)?[A-Za-z\s]*:|$)"
+
+_NON_ALPHANUMERIC_RE = re.compile(r'[^a-z0-9\s]')
+_STOP_WORDS = frozenset({'and', 'the', 'of', 'for', 'in', 'skills', 'a', ''})
+
+# Exact 5 sections for each therapy type (matching frontend)
+THERAPY_SECTIONS: Dict[str, List[str]] = {
+    "Speech Therapy": [
+        "Receptive Language Skills (Comprehension)",
+        "Expressive Language Skills",
+        "Oral Motor & Oral Placement Therapy (OPT) Goals",
+        "Pragmatic Language Skills (Social Communication)",
+        "Narrative Skills",
+    ],
+    "Behavioral Therapy": [
+        "Behavior Regulation & Self-Control",
+        "Attention, Compliance & Task Engagement",
+        "Emotional Regulation Skills",
+        "Social Behavior & Interaction Skills",
+        "Adaptive Behavior & Functional Skills",
+    ],
+    "Cognitive Therapy": [
+        "Attention & Concentration Skills",
+        "Memory & Recall Skills",
+        "Problem Solving & Reasoning Skills",
+        "Executive Functioning Skills",
+        "Cognitive Flexibility & Processing Skills",
+    ],
+    "Occupational Therapy": [
+        "Fine Motor Skills",
+        "Sensory Processing & Integration",
+        "Visual-Motor Integration Skills",
+        "Activities of Daily Living (ADL)",
+        "Handwriting & Pre-Academic Skills",
+    ],
+    "Physical Therapy": [
+        "Gross Motor Skills",
+        "Balance & Postural Control",
+        "Strength & Endurance",
+        "Coordination & Motor Planning",
+        "Functional Mobility Skills",
+    ],
+}
+
+# Old/alternate labels (reports saved with getGoalsForTherapyType()) -> standard section
+LABEL_ALIASES: Dict[str, str] = {
+    # Behavioral Therapy aliases (getGoalsForTherapyType used different labels)
+    "Behavioral Management": "Behavior Regulation & Self-Control",
+    "Emotional Regulation": "Emotional Regulation Skills",
+    "Social Skills": "Social Behavior & Interaction Skills",
+    "Coping Strategies": "Adaptive Behavior & Functional Skills",
+    # Occupational Therapy aliases
+    "Fine Motor Skills": "Fine Motor Skills",
+    "Gross Motor Skills": "Gross Motor Skills",
+    "Daily Living Activities": "Activities of Daily Living (ADL)",
+    "Sensory Integration": "Sensory Processing & Integration",
+    # Physical Therapy aliases
+    "Strength & Endurance": "Strength & Endurance",
+    "Flexibility & Range of Motion": "Coordination & Motor Planning",
+    "Balance & Coordination": "Balance & Postural Control",
+    "Mobility & Gait": "Functional Mobility Skills",
+}
+
+# JSON keys -> standard section
+KEY_ALIASES: Dict[str, str] = {
+    # Behavioral Therapy keys
+    "behavior_regulation": "Behavior Regulation & Self-Control",
+    "behavioral_management": "Behavior Regulation & Self-Control",
+    "attention_compliance": "Attention, Compliance & Task Engagement",
+    "emotional_regulation": "Emotional Regulation Skills",
+    "social_behavior": "Social Behavior & Interaction Skills",
+    "social_skills": "Social Behavior & Interaction Skills",
+    "adaptive_behavior": "Adaptive Behavior & Functional Skills",
+    "coping_strategies": "Adaptive Behavior & Functional Skills",
+}
+
+
+def section_keywords(text: str) -> frozenset:
+    """Significant lowercase words of a section title, label or key (punctuation and stop words dropped)."""
+    return frozenset(_NON_ALPHANUMERIC_RE.sub(' ', text.lower()).split()) - _STOP_WORDS
+
+
+def parse_goals_achieved(goals_achieved):
+    """Parse goals_achieved field which may be a JSON string, dict, or None.
+    Returns a dict or None."""
+    if goals_achieved is None:
+        return None
+    if isinstance(goals_achieved, dict):
+        return goals_achieved
+    if isinstance(goals_achieved, str):
+        try:
+            parsed = json.loads(goals_achieved)
+            if isinstance(parsed, dict):
+                return parsed
+        except (json.JSONDecodeError, TypeError):
+            logger.warning(f"Could not parse goals_achieved JSON string: {goals_achieved[:100]}")
+    return None
+
+
+class GoalEntry:
+    """One `goals_achieved` item: a `{label, notes}` dict or a plain string value."""
+    __slots__ = ("key", "is_dict", "label", "notes", "raw_value")
+
+    def __init__(self, key, value):
+        self.key = key
+        self.is_dict = isinstance(value, dict)
+        self.raw_value = value
+        if self.is_dict:
+            label = value.get('label')
+            self.label = label.strip() if isinstance(label, str) else ""
+            notes = value.get('notes')
+            self.notes = notes.strip() if isinstance(notes, str) else ""
+        else:
+            self.label = ""
+            self.notes = value.strip() if isinstance(value, str) else ""
+
+    @property
+    def title(self):
+        """Section title shown for this entry: its label, or the key when there is none."""
+        return self.label or self.key
+
+
+class ReportGoals:
+    """`goals_achieved` of a single report, parsed once."""
+    __slots__ = ("parsed", "entries", "raw_text")
+
+    def __init__(self, goals_achieved):
+        self.parsed = parse_goals_achieved(goals_achieved)
+        self.entries: List[GoalEntry] = (
+            [GoalEntry(key, value) for key, value in self.parsed.items()] if self.parsed is not None else []
+        )
+        self.raw_text = goals_achieved if self.parsed is None and isinstance(goals_achieved, str) else None
+
+    def readable_text(self, max_length=500):
+        """'Label: notes; Label: notes' text for prompts instead of raw dict/JSON."""
+        if self.parsed is None:
+            if self.raw_text and self.raw_text.strip():
+                return self.raw_text.strip()[:max_length]
+            return ""
+        parts = []
+        for entry in self.entries:
+            if not entry.notes:
+                continue
+            if entry.is_dict:
+                parts.append(f"{entry.title}: {entry.notes}")
+            elif isinstance(entry.raw_value, str):
+                parts.append(f"{entry.key}: {entry.notes}")
+        return "; ".join(parts)[:max_length] if parts else ""
+
+    def section_titles(self):
+        if self.parsed is not None:
+            return [entry.title for entry in self.entries]
+        if self.raw_text:
+            return [m.strip() for m in _RAW_SECTION_TITLE_RE.findall(self.raw_text) if m.strip()]
+        return []
+
+    def section_content(self, section_name):
+        """Notes for exactly `section_name` (matched by label or key), capped at 300 chars."""
+        if self.parsed is not None:
+            for entry in self.entries:
+                if not entry.notes:
+                    continue
+                if entry.is_dict and (entry.label == section_name or entry.key == section_name):
+                    return entry.notes[:300]
+                if not entry.is_dict and isinstance(entry.raw_value, str) and entry.key == section_name:
+                    return entry.notes[:300]
+            return ""
+        if self.raw_text:
+            pattern = rf"^{re.escape(section_name)}:\s*(.*?){_RAW_SECTION_LOOKAHEAD}"
+            match = re.search(pattern, self.raw_text, re.DOTALL | re.MULTILINE)
+            if match:
+                return match.group(1).strip()[:300]
+        return ""
+
+
+class _SectionSpec:
+    """Match data of one section title, derived once."""
+    __slots__ = ("title", "title_lower", "aliases", "key_aliases", "keywords", "alias_keywords", "underscored")
+
+    def __init__(self, title, aliases, key_aliases):
+        self.title = title
+        self.title_lower = title.lower().strip()
+        self.aliases = frozenset(aliases)
+        self.key_aliases = frozenset(key_aliases)
+        self.keywords = section_keywords(self.title_lower)
+        self.alias_keywords = tuple(
+            keywords for keywords in {section_keywords(alias) for alias in self.aliases} if keywords
+        )
+        self.underscored = title.lower().replace(' ', '_')
+
+
+def _keywords_match(words, keywords):
+    return len(words & keywords) >= 2 or (len(words) == 1 and words <= keywords)
+
+
+class SectionMatcher:
+    """Resolves a goal entry (key + label) to the section titles it belongs to.
+
+    Alias, key-alias and keyword data of every title is prepared in the constructor,
+    together with an inverted index keyword -> titles. Resolving an entry only checks
+    the titles the index points at, and results are memoized per (key, label), so a
+    repeated goal key costs a dict lookup.
+
+    Matching is not exclusive: an entry whose key/label fits several titles adds its
+    notes to each of them.
+    """
+
+    _MAX_RESOLVED = 4096
+
+    def __init__(
+        self,
+        titles: Sequence[str],
+        label_aliases: Optional[Dict[str, str]] = None,
+        key_aliases: Optional[Dict[str, str]] = None,
+    ):
+        self.titles: Tuple[str, ...] = tuple(titles)
+        label_aliases = label_aliases or {}
+        key_aliases = key_aliases or {}
+        self._specs: Dict[str, _SectionSpec] = {}
+        self._by_alias: Dict[str, List[str]] = {}
+        self._by_title_lower: Dict[str, List[str]] = {}
+        self._by_key_alias: Dict[str, List[str]] = {}
+        self._by_keyword: Dict[str, List[str]] = {}
+        for title in self.titles:
+            aliases = {title, title.lower()}
+            for old_label, mapped_section in label_aliases.items():
+                if mapped_section == title:
+                    aliases.update((old_label, old_label.lower()))
+            title_key_aliases = set()
+            for key, mapped_section in key_aliases.items():
+                if mapped_section == title:
+                    title_key_aliases.update((key, key.lower()))
+            spec = _SectionSpec(title, aliases, title_key_aliases)
+            self._specs[title] = spec
+
+            for alias in spec.aliases:
+                self._by_alias.setdefault(alias, []).append(title)
+            self._by_title_lower.setdefault(spec.title_lower, []).append(title)
+            for key in spec.key_aliases:
+                self._by_key_alias.setdefault(key, []).append(title)
+            for word in spec.keywords.union(*spec.alias_keywords):
+                self._by_keyword.setdefault(word, []).append(title)
+        self._resolved: Dict[Tuple[bool, str, str], Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+
+    def has_alias(self, label: str) -> bool:
+        """True if `label` is one of the titles or a known alias of one."""
+        return label in self._by_alias
+
+    def matches(self, title: str, key: str, label: str = "", is_dict: bool = True) -> bool:
+        """Apply the full matching rules for one title (no index, no memo)."""
+        spec = self._specs[title]
+        if not is_dict:
+            # Legacy `{key: "notes"}` format: the key is a prefix of the title.
+            return spec.underscored.startswith(key.lower().replace(' ', '_')[:10])
+        if label == title or label in spec.aliases or label.lower() in spec.aliases:
+            return True
+        if label and label.lower() == spec.title_lower:
+            return True
+        if key.lower().strip() in spec.key_aliases:
+            return True
+        key_words = section_keywords(key.replace('_', ' '))
+        if key_words:
+            if _keywords_match(key_words, spec.keywords):
+                return True
+            if any(_keywords_match(key_words, keywords) for keywords in spec.alias_keywords):
+                return True
+        if label:
+            label_words = section_keywords(label)
+            if label_words and spec.keywords:
+                overlap = label_words & spec.keywords
+                required_matches = max(2, int(0.8 * min(len(label_words), len(spec.keywords))))
+                if len(overlap) >= required_matches:
+                    return True
+        return False
+
+    def _candidates(self, key: str, label: str) -> set:
+        candidates = set()
+        for lookup, value in (
+            (self._by_alias, label),
+            (self._by_alias, label.lower()),
+            (self._by_title_lower, label.lower()),
+            (self._by_key_alias, key.lower().strip()),
+        ):
+            candidates.update(lookup.get(value, ()))
+        for word in section_keywords(key.replace('_', ' ')) | section_keywords(label):
+            candidates.update(self._by_keyword.get(word, ()))
+        return candidates
+
+    def resolve(self, key: str, label: str = "", is_dict: bool = True) -> Tuple[str, ...]:
+        """Titles (in section order) that a goal entry with this key/label belongs to."""
+        cache_key = (is_dict, key, label)
+        titles = self._resolved.get(cache_key)
+        if titles is not None:
+            return titles
+        if is_dict:
+            candidates = self._candidates(key, label)
+            titles = tuple(t for t in self.titles if t in candidates and self.matches(t, key, label))
+        else:
+            titles = tuple(t for t in self.titles if self.matches(t, key, is_dict=False))
+        logger.debug(f"Goal key={key!r} label={label!r} -> sections {titles}")
+        with self._lock:
+            if len(self._resolved) >= self._MAX_RESOLVED:
+                self._resolved.clear()
+            self._resolved[cache_key] = titles
+        return titles
+
+    def resolve_entry(self, entry: GoalEntry) -> Tuple[str, ...]:
+        return self.resolve(entry.key, entry.label, entry.is_dict)
+
+
+class SectionIndex:
+    """Per-request index of report -> parsed goals, built in one pass over the reports.
+
+    Reports are keyed by object identity, so subsets of the same report list
+    (first/last sessions) share the parsed data.
+    """
+
+    def __init__(self, reports: Iterable = ()):
+        self._goals: Dict[int, ReportGoals] = {}
+        for report in reports:
+            self.goals(report)
+
+    def goals(self, report) -> ReportGoals:
+        key = id(report)
+        goals = self._goals.get(key)
+        if goals is None:
+            goals = ReportGoals(getattr(report, "goals_achieved", None))
+            self._goals[key] = goals
+        return goals
+
+    def readable_text(self, report, max_length=500):
+        return self.goals(report).readable_text(max_length)
+
+    def section_content(self, report, section_name):
+        return self.goals(report).section_content(section_name)
+
+    def section_titles(self, reports):
+        """Unique section titles across `reports`, sorted."""
+        titles = set()
+        for report in reports:
+            titles.update(self.goals(report).section_titles())
+        return sorted(titles)
+
+    def labels_and_keys(self, reports) -> Tuple[set, set]:
+        labels, keys = set(), set()
+        for report in reports:
+            for entry in self.goals(report).entries:
+                keys.add(entry.key)
+                if entry.is_dict and entry.label:
+                    labels.add(entry.label)
+        return labels, keys
+
+    def has_any_notes(self, reports):
+        return any(
+            entry.is_dict and entry.notes
+            for report in reports
+            for entry in self.goals(report).entries
+        )
+
+    def notes_by_section(self, reports, matcher: SectionMatcher) -> Dict[str, List[str]]:
+        """Group every entry's notes under the section titles `matcher` resolves it to.
+
+        All reports are walked a single time. Notes keep report order per section.
+        """
+        section_notes: Dict[str, List[str]] = {title: [] for title in matcher.titles}
+        for report in reports:
+            goals = self.goals(report)
+            if goals.parsed is None:
+                logger.warning(
+                    f"Report ID={getattr(report, 'id', None)}: goals_achieved could not be parsed "
+                    f"(type={type(getattr(report, 'goals_achieved', None))})"
+                )
+                continue
+            for entry in goals.entries:
+                if not entry.notes:
+                    continue
+                if not entry.is_dict and not isinstance(entry.raw_value, str):
+                    continue
+                note = entry.notes if entry.is_dict else entry.raw_value
+                for title in matcher.resolve_entry(entry):
+                    section_notes[title].append(note)
+        return section_notes
+
+
+def ensure_section_index(section_index: Optional[SectionIndex], reports) -> SectionIndex:
+    """Return `section_index`, or build one for callers (scripts, legacy paths) that have none."""
+    return section_index if section_index is not None else SectionIndex(reports)
+
+
+# Built once at import time; shared by all requests.
+SECTION_MATCHERS: Dict[str, SectionMatcher] = {
+    therapy_type: SectionMatcher(titles, LABEL_ALIASES, KEY_ALIASES)
+    for therapy_type, titles in THERAPY_SECTIONS.items()
+}
@@ -0,0 +1,273 @@
+"""
+Per-stage timing spans for the AI summary pipeline, plus process-wide histograms.
+
+`track_request()` starts a `RequestTimings` for the current context (`activate()`
+re-enters an existing one, e.g. on the thread that produces a stream). Inside it,
+`span(stage)` (or the `@timed(stage)` decorator) records how long a stage took,
+both on that request and in the histogram of the stage; outside a request only
+the histogram is updated. Model calls also record the prompt/completion token
+counts from the router's `usage` field with `record_usage`.
+
+Analysis sections and chunk summaries run on worker threads. Tasks are submitted
+with `contextvars.copy_context().run`, so their spans are recorded on the request
+that started them and tagged with the section set by `section_scope`.
+
+The histograms are rendered in Prometheus text format by `render_metrics()`
+(served at GET /metrics).
+"""
+import contextvars
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+def _label_text(names: Sequence[str], values: Tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value).replace(chr(34), "")}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, like a Prometheus histogram."""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(label_names)
+        self._series: Dict[Tuple, List] = {}  # labels -> [bucket counts..., count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                le_names = self.label_names + ("le",)
+                lines.append(f"{self.name}_bucket{_label_text(le_names, key + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_label_text(self.label_names + ('le',), key + ('+Inf',))} {values[-2]}")
+            lines.append(f"{self.name}_count{_label_text(self.label_names, key)} {values[-2]}")
+            lines.append(f"{self.name}_sum{_label_text(self.label_names, key)} {round(values[-1], 6)}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_label_text(self.label_names, key)} {value}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "ai_summary_stage_seconds", "Duration of AI summary pipeline stages.", SECONDS_BUCKETS, ("stage",)
+)
+REQUEST_SECONDS = Histogram(
+    "ai_summary_request_seconds", "Duration of AI summary requests.", SECONDS_BUCKETS, ("endpoint",)
+)
+PROMPT_TOKENS = Histogram(
+    "ai_model_prompt_tokens", "Prompt tokens per model call (router usage).", TOKEN_BUCKETS, ("model",)
+)
+COMPLETION_TOKENS = Histogram(
+    "ai_model_completion_tokens", "Completion tokens per model call (router usage).", TOKEN_BUCKETS, ("model",)
+)
+FALLBACKS = Counter("ai_summary_fallbacks_total", "Sections served from data-driven fallbacks.", ("section",))
+
+METRICS = (STAGE_SECONDS, REQUEST_SECONDS, PROMPT_TOKENS, COMPLETION_TOKENS, FALLBACKS)
+
+
+class RequestTimings:
+    """Spans and token usage recorded while serving one request."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.total_seconds: Optional[float] = None
+        self.spans: List[Dict[str, Any]] = []
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def finish(self) -> None:
+        """Fix the total duration and add it to the request histogram (once)."""
+        with self._lock:
+            if self.total_seconds is not None:
+                return
+            self.total_seconds = time.perf_counter() - self.started
+        REQUEST_SECONDS.observe(self.total_seconds, endpoint=self.endpoint)
+
+    def add(self, stage: str, seconds: float, **attrs) -> None:
+        # `start` is the offset from the beginning of the request.
+        start = time.perf_counter() - self.started - seconds
+        span = {"stage": stage, "start": round(max(0.0, start), 4), "seconds": round(seconds, 4)}
+        span.update({key: value for key, value in attrs.items() if value is not None})
+        with self._lock:
+            self.spans.append(span)
+
+    def add_tokens(self, prompt_tokens: int, completion_tokens: int) -> None:
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def stages(self) -> Dict[str, Dict[str, float]]:
+        """Count and summed seconds per stage (parallel spans can add up to more than the total)."""
+        totals: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            entry = totals.setdefault(span["stage"], {"count": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] = round(entry["seconds"] + span["seconds"], 4)
+        return totals
+
+    def summary(self) -> Dict[str, Any]:
+        total = self.total_seconds if self.total_seconds is not None else time.perf_counter() - self.started
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start"])
+        return {
+            "total_seconds": round(total, 4),
+            "stages": self.stages(),
+            "tokens": {"prompt": self.prompt_tokens, "completion": self.completion_tokens},
+            "spans": spans,
+        }
+
+    def server_timing(self) -> str:
+        """`Server-Timing` header value: summed milliseconds per stage, then the total."""
+        entries = [
+            f'{stage};dur={entry["seconds"] * 1000:.1f};desc="{entry["count"]}x"'
+            for stage, entry in self.stages().items()
+        ]
+        total = self.total_seconds if self.total_seconds is not None else time.perf_counter() - self.started
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current_request: contextvars.ContextVar = contextvars.ContextVar("ai_request_timings", default=None)
+_current_section: contextvars.ContextVar = contextvars.ContextVar("ai_section", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current_request.get()
+
+
+@contextmanager
+def activate(timings: RequestTimings):
+    """Record the spans of everything run in this context on `timings`."""
+    token = _current_request.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_request.reset(token)
+
+
+@contextmanager
+def track_request(endpoint: str) -> Iterator[RequestTimings]:
+    """Time one request: activate a new RequestTimings and finish it when the block exits."""
+    timings = RequestTimings(endpoint)
+    try:
+        with activate(timings):
+            yield timings
+    finally:
+        timings.finish()
+
+
+@contextmanager
+def section_scope(section: str):
+    """Tag the spans recorded in this context with the analysis section they belong to."""
+    token = _current_section.set(section)
+    try:
+        yield
+    finally:
+        _current_section.reset(token)
+
+
+def record(stage: str, seconds: float, **attrs) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _current_request.get()
+    if timings is not None:
+        attrs.setdefault("section", _current_section.get())
+        timings.add(stage, seconds, **attrs)
+
+
+@contextmanager
+def span(stage: str, **attrs):
+    """Time the block as `stage`; the span is recorded even if the block raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start, **attrs)
+
+
+def timed(stage: str):
+    """Decorator form of `span`; the span is tagged with the function name."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage, step=fn.__name__.lstrip("_")):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_usage(model: str, usage: Optional[Dict[str, Any]]) -> None:
+    """Record the token counts of a router response's `usage` field (ignored when absent)."""
+    if not isinstance(usage, dict):
+        return
+    prompt_tokens = int(usage.get("prompt_tokens") or 0)
+    completion_tokens = int(usage.get("completion_tokens") or 0)
+    PROMPT_TOKENS.observe(prompt_tokens, model=model)
+    COMPLETION_TOKENS.observe(completion_tokens, model=model)
+    timings = _current_request.get()
+    if timings is not None:
+        timings.add_tokens(prompt_tokens, completion_tokens)
+
+
+def record_fallback(section: str) -> None:
+    FALLBACKS.inc(section=section)
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,140 @@
+"""
+Token budgets for AI summary prompts.
+
+Every prompt builder gets a `PromptBudget` for the request's model. Builders
+measure their fixed instructions, split the remaining tokens across the sections
+(or sessions) they render, and use `select_notes` / `clip` to keep the most
+recent and most informative notes that fit. Anything dropped or shortened sets
+`budget.truncated`, which is reported in `TherapyAISummaryResponse.truncated`.
+
+Token counts come from a Hugging Face tokenizer when AI_PROMPT_TOKENIZER names
+one that can be loaded, and from a characters-per-token estimate otherwise.
+"""
+import logging
+import math
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# English clinical notes average roughly four characters per Llama/GPT token.
+CHARS_PER_TOKEN = 4.0
+
+_WORD_RE = re.compile(r"[a-z]{3,}")
+
+
+@lru_cache(maxsize=1)
+def _load_tokenizer():
+    name = settings.AI_PROMPT_TOKENIZER
+    if not name:
+        return None
+    try:
+        from transformers import AutoTokenizer
+    except ImportError:
+        logger.warning("AI_PROMPT_TOKENIZER is set but transformers is not installed; estimating token counts")
+        return None
+    try:
+        return AutoTokenizer.from_pretrained(name)
+    except Exception as e:
+        logger.warning(f"Could not load prompt tokenizer '{name}' ({e}); estimating token counts")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    tokenizer = _load_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, add_special_tokens=False))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def prompt_token_budget(model: Optional[str]) -> int:
+    """Prompt token budget for `model`: its AI_PROMPT_TOKEN_BUDGETS entry or the default."""
+    return settings.AI_PROMPT_TOKEN_BUDGETS.get(model or "", settings.AI_PROMPT_TOKEN_BUDGET)
+
+
+def prompt_token_budgets() -> Dict[str, int]:
+    return {"default": settings.AI_PROMPT_TOKEN_BUDGET, **settings.AI_PROMPT_TOKEN_BUDGETS}
+
+
+def token_counter() -> str:
+    """Name of the tokenizer used for counting, or "estimate"."""
+    return settings.AI_PROMPT_TOKENIZER if _load_tokenizer() is not None else "estimate"
+
+
+def _informativeness(text: str) -> float:
+    """Share of distinct content words, saturating at 40 words."""
+    return min(1.0, len(set(_WORD_RE.findall(text.lower()))) / 40.0)
+
+
+class PromptBudget:
+    """Prompt token budget of one request, shared by all of its prompt builders."""
+
+    def __init__(self, model: Optional[str] = None, total_tokens: Optional[int] = None):
+        self.model = model
+        self.total_tokens = total_tokens if total_tokens is not None else prompt_token_budget(model)
+        self.truncated = False
+        self._lock = threading.Lock()
+
+    def mark_truncated(self, reason: str) -> None:
+        with self._lock:
+            if not self.truncated:
+                logger.info(f"Prompt truncated to fit {self.total_tokens} tokens ({self.model}): {reason}")
+            self.truncated = True
+
+    def available(self, *fixed_parts: str) -> int:
+        """Tokens left for data after the fixed instruction text of a prompt."""
+        return max(0, self.total_tokens - sum(count_tokens(part) for part in fixed_parts))
+
+    def clip(self, text: str, max_tokens: int) -> str:
+        """Shorten `text` to about `max_tokens` tokens, cutting at a word boundary."""
+        if count_tokens(text) <= max_tokens:
+            return text
+        self.mark_truncated("note shortened")
+        max_chars = max(0, int(max_tokens * CHARS_PER_TOKEN) - 3)
+        clipped = text[:max_chars].rsplit(" ", 1)[0] if " " in text[:max_chars] else text[:max_chars]
+        return f"{clipped}..." if clipped else ""
+
+    def select_notes(self, notes: Sequence[str], max_tokens: int, keep_first: bool = False) -> List[int]:
+        """Indexes (chronological) of the notes to keep within `max_tokens`.
+
+        All notes are kept when they fit. Otherwise the latest note is always kept
+        (and the first one with `keep_first`, as the baseline); the rest are ranked by
+        recency and by how much distinct content they carry, and added while they
+        fit. Duplicate notes are skipped.
+        """
+        if not notes:
+            return []
+        costs = [count_tokens(note) for note in notes]
+        if sum(costs) <= max_tokens:
+            return list(range(len(notes)))
+        last = len(notes) - 1
+        required = [last] + ([0] if keep_first and last > 0 else [])
+        chosen = set(required)
+        used = sum(costs[i] for i in chosen)
+        seen = {notes[i].strip().lower() for i in chosen}
+
+        def _score(i):
+            recency = i / last if last else 1.0
+            return 0.6 * recency + 0.4 * _informativeness(notes[i])
+
+        dropped = 0
+        for i in sorted((i for i in range(len(notes)) if i not in chosen), key=_score, reverse=True):
+            key = notes[i].strip().lower()
+            if key in seen:
+                continue
+            cost = costs[i]
+            if used + cost > max_tokens:
+                dropped += 1
+                continue
+            chosen.add(i)
+            seen.add(key)
+            used += cost
+        if dropped:
+            self.mark_truncated(f"dropped {dropped} of {len(notes)} notes")
+        return sorted(chosen)
@@ -0,0 +1,108 @@
+"""
+Cross-request micro-batching for CTranslate2 translation.
+
+Each /translate request tokenizes its own lines and calls `MicroBatcher.translate`.
+A single dispatcher thread takes the first waiting request, keeps collecting the
+lines of requests that arrive within `max_wait` seconds (until `max_tokens`
+source tokens are gathered) and runs them through one `run_batch` call, e.g. one
+`translate_batch(batch_type="tokens")`. The hypotheses are then split back per
+request. Under concurrency the model sees a few large batches instead of many
+small ones, which is where CTranslate2 gets its throughput on CPU; a lone request
+only waits `max_wait` longer.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class _Request(NamedTuple):
+    sources: List[List[str]]
+    tokens: int
+    future: Future
+
+
+class MicroBatcher:
+    """Merges the lines of concurrent requests into shared `run_batch(sources)` calls.
+
+    `run_batch` takes a list of source token lists and returns one result per source,
+    in order; it always runs on the dispatcher thread.
+    """
+
+    def __init__(self, run_batch: Callable[[List[List[str]]], Sequence], *, max_wait: float, max_tokens: int, name: str):
+        self.run_batch = run_batch
+        self.max_wait = max(0.0, max_wait)
+        self.max_tokens = max(1, max_tokens)
+        self.name = name
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "batches": 0, "lines": 0, "max_batch_requests": 0}
+
+    def translate(self, sources: List[List[str]]) -> list:
+        """Results for `sources` (blocks until the batch holding them has run)."""
+        if not sources:
+            return []
+        future: Future = Future()
+        self._queue.put(_Request(sources, sum(len(source) for source in sources), future))
+        self._ensure_started()
+        return future.result()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._dispatch, name=f"{self.name}-batcher", daemon=True)
+                self._thread.start()
+
+    def _dispatch(self) -> None:
+        carry: Optional[_Request] = None
+        while True:
+            first = carry or self._queue.get()
+            carry = None
+            batch, tokens = [first], first.tokens
+            deadline = time.monotonic() + self.max_wait
+            while tokens < self.max_tokens:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if tokens + request.tokens > self.max_tokens:
+                    # Starts the next batch instead of overflowing this one.
+                    carry = request
+                    break
+                batch.append(request)
+                tokens += request.tokens
+            self._run(batch)
+
+    def _run(self, batch: List[_Request]) -> None:
+        sources = [source for request in batch for source in request.sources]
+        try:
+            results = list(self.run_batch(sources))
+        except Exception as e:
+            logger.error(f"{self.name} batch of {len(sources)} lines failed: {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        with self._lock:
+            self._stats["requests"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["lines"] += len(sources)
+            self._stats["max_batch_requests"] = max(self._stats["max_batch_requests"], len(batch))
+        offset = 0
+        for request in batch:
+            request.future.set_result(results[offset:offset + len(request.sources)])
+            offset += len(request.sources)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        stats["avg_batch_requests"] = round(stats["requests"] / stats["batches"], 2) if stats["batches"] else 0.0
+        return stats
@@ -0,0 +1,76 @@
+"""
+Bounded executor for translation inference.
+
+CTranslate2 `translate_batch`, the tokenizers and Marian `generate` are blocking
+calls; running them inside an `async def` route freezes the event loop for every
+other request. `run_translation` hands them to a dedicated thread pool and awaits
+the result instead. At most TRANSLATION_MAX_WORKERS translations run at once and
+TRANSLATION_MAX_PENDING more may wait; beyond that `TranslationQueueFull` is
+raised so the endpoint can answer 503 instead of queueing without bound.
+
+Threads rather than processes: the models are loaded once per process into
+module globals, and both CTranslate2 and torch release the GIL while they compute.
+"""
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from app.core.config import settings
+from app.utils.bounded_executor import BoundedExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationQueueFull(Exception):
+    """Raised when a translation is submitted while every worker and queue slot is taken."""
+
+
+class TranslationExecutor:
+    """Thread pool with a limit on running plus waiting translations."""
+
+    def __init__(self, *, max_workers: int, max_pending: int):
+        self._pool = BoundedExecutor(
+            max_workers=max_workers,
+            max_pending=max_pending,
+            thread_name_prefix="translation",
+            full_error=TranslationQueueFull,
+        )
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        return await asyncio.wrap_future(self._pool.submit(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, int]:
+        return self._pool.stats()
+
+    def shutdown(self) -> None:
+        self._pool.shutdown()
+
+
+_executor: Optional[TranslationExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_translation_executor() -> TranslationExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = TranslationExecutor(
+                max_workers=settings.TRANSLATION_MAX_WORKERS,
+                max_pending=settings.TRANSLATION_MAX_PENDING,
+            )
+        return _executor
+
+
+async def run_translation(fn: Callable, *args, **kwargs):
+    """Await `fn(*args, **kwargs)` on the translation pool. Raises TranslationQueueFull when saturated."""
+    return await get_translation_executor().run(fn, *args, **kwargs)
+
+
+def shutdown_translation_executor() -> None:
+    """Stop accepting translations and drop queued ones (called at app shutdown)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
@@ -0,0 +1,210 @@
+"""
+Segment-level translation memory.
+
+Summaries and parent reports repeat many lines verbatim: section headings, bullet
+templates, standard clinical sentences. Translated lines are kept under a hash of
+(model, target language, normalized source line, glossary version), so a line
+that was translated before is reused instead of going through the model again.
+The glossary version changes whenever the clinical term map is edited, so
+revising the glossary starts a fresh memory.
+
+An in-memory LRU sits in front of the `translation_memory` table, which survives
+restarts and is shared by all workers. `lookup` resolves a whole request's lines
+at once (one query for the LRU misses); `store` records the lines that had to be
+translated and how long they took, which gives the estimate of the seconds saved
+by hits.
+"""
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_line(line: str) -> str:
+    return " ".join(line.split())
+
+
+class TranslationMemory:
+    def __init__(self, *, max_entries: int, enabled: bool = True, persistent: bool = True):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.persistent = persistent
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.lines_translated = 0
+        self.translate_seconds = 0.0
+        self.saved_seconds = 0.0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()  # key -> translated line
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, target_language: str, line: str, glossary_version: str = "") -> str:
+        raw = json.dumps([model, target_language, normalize_line(line), glossary_version], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _line_seconds(self) -> float:
+        return self.translate_seconds / self.lines_translated if self.lines_translated else 0.0
+
+    # ---- database ---------------------------------------------------------
+
+    def _db_get(self, keys: List[str]) -> Dict[str, str]:
+        if not self.persistent or not keys:
+            return {}
+        from app.db.session import SessionLocal
+        from app.models.translation_memory import TranslationMemoryEntry
+
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(TranslationMemoryEntry.key, TranslationMemoryEntry.translated_text)
+                .filter(TranslationMemoryEntry.key.in_(keys))
+                .all()
+            )
+            return {row.key: row.translated_text for row in rows}
+        except Exception as e:
+            logger.warning(f"Translation memory read failed: {e}")
+            return {}
+        finally:
+            db.close()
+
+    def _db_set(self, entries: List[Dict[str, str]]) -> None:
+        if not self.persistent or not entries:
+            return
+        from app.db.session import SessionLocal
+        from app.models.translation_memory import TranslationMemoryEntry
+
+        db = SessionLocal()
+        try:
+            keys = [entry["key"] for entry in entries]
+            existing = {
+                row.key
+                for row in db.query(TranslationMemoryEntry.key).filter(TranslationMemoryEntry.key.in_(keys)).all()
+            }
+            db.add_all([TranslationMemoryEntry(**entry) for entry in entries if entry["key"] not in existing])
+            db.commit()
+        except Exception as e:
+            # Typically a concurrent insert of the same line; it is stored either way.
+            db.rollback()
+            logger.warning(f"Translation memory write failed: {e}")
+        finally:
+            db.close()
+
+    # ---- public API -------------------------------------------------------
+
+    def lookup(self, model: str, target_language: str, lines: Iterable[str], glossary_version: str = "") -> Dict[str, str]:
+        """Remembered translations of `lines`, keyed by source line (lines not found are left out)."""
+        if not self.enabled:
+            return {}
+        keys = {line: self.make_key(model, target_language, line, glossary_version) for line in dict.fromkeys(lines)}
+        found: Dict[str, str] = {}
+        with self._lock:
+            for line, key in keys.items():
+                translated = self._entries.get(key)
+                if translated is not None:
+                    self._entries.move_to_end(key)
+                    found[line] = translated
+        memory_hits = len(found)
+
+        stored = self._db_get([key for line, key in keys.items() if line not in found])
+        with self._lock:
+            for line, key in keys.items():
+                if line not in found and key in stored:
+                    found[line] = stored[key]
+                    self._remember(key, stored[key])
+            self.hits += len(found)
+            self.db_hits += len(found) - memory_hits
+            self.misses += len(keys) - len(found)
+            self.saved_seconds += len(found) * self._line_seconds()
+        return found
+
+    def store(
+        self,
+        model: str,
+        target_language: str,
+        translations: Dict[str, str],
+        *,
+        glossary_version: str = "",
+        seconds: float = 0.0,
+    ) -> None:
+        """Remember freshly translated lines; `seconds` is the time it took to translate them."""
+        if not self.enabled or not translations:
+            return
+        entries = []
+        with self._lock:
+            self.lines_translated += len(translations)
+            self.translate_seconds += seconds
+            for line, translated in translations.items():
+                if not translated:
+                    continue
+                key = self.make_key(model, target_language, line, glossary_version)
+                self._remember(key, translated)
+                entries.append({
+                    "key": key,
+                    "model": model,
+                    "target_language": target_language,
+                    "glossary_version": glossary_version,
+                    "source_text": normalize_line(line),
+                    "translated_text": translated,
+                })
+        self._db_set(entries)
+
+    def _remember(self, key: str, translated: str) -> None:
+        self._entries[key] = translated
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> int:
+        """Forget every remembered line, in memory and in the table; returns the rows deleted."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.db_hits = self.misses = 0
+            self.lines_translated = 0
+            self.translate_seconds = self.saved_seconds = 0.0
+        if not self.persistent:
+            return 0
+        from app.db.session import SessionLocal
+        from app.models.translation_memory import TranslationMemoryEntry
+
+        db = SessionLocal()
+        try:
+            deleted = db.query(TranslationMemoryEntry).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Translation memory clear failed: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "persistent": self.persistent,
+                "hits": self.hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "lines_translated": self.lines_translated,
+                "avg_line_seconds": round(self._line_seconds(), 4),
+                "saved_seconds": round(self.saved_seconds, 2),
+            }
+
+
+translation_memory = TranslationMemory(
+    max_entries=settings.TRANSLATION_MEMORY_MAX_ENTRIES,
+    enabled=settings.TRANSLATION_MEMORY_ENABLED,
+    persistent=settings.TRANSLATION_MEMORY_PERSIST,
+)
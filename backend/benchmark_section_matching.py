@@ -0,0 +1,131 @@
+"""
+Micro-benchmark for therapy section matching on a 500-report student.
+
+Compares the old per-section scan (parse every report's goals_achieved and test
+every key against the section for each of the 5 sections) with the section index
+plus the prebuilt SectionMatcher used by the summary prompt builder.
+
+Run from the backend directory:
+    python benchmark_section_matching.py [num_reports]
+"""
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.utils.therapy_sections import (  # noqa: E402
+    KEY_ALIASES,
+    LABEL_ALIASES,
+    SECTION_MATCHERS,
+    THERAPY_SECTIONS,
+    SectionIndex,
+    SectionMatcher,
+    parse_goals_achieved,
+)
+
+THERAPY_TYPE = "Behavioral Therapy"
+REPEATS = 5
+
+
+class MockReport:
+    def __init__(self, report_id, goals_achieved, report_date):
+        self.id = report_id
+        self.goals_achieved = goals_achieved
+        self.therapy_type = THERAPY_TYPE
+        self.report_date = report_date
+        self.progress_level = "good"
+        self.progress_notes = "Participated in all activities."
+
+
+class MockStudent:
+    name = "Benchmark Student"
+
+
+def make_reports(count):
+    """Reports mixing current labels, old labels and key-only entries, stored as JSON strings."""
+    random.seed(42)
+    goal_templates = [
+        ("behavior_regulation", "Behavior Regulation & Self-Control"),
+        ("behavioral_management", "Behavioral Management"),
+        ("attention_compliance", "Attention, Compliance & Task Engagement"),
+        ("emotional_regulation", "Emotional Regulation"),
+        ("social_skills", "Social Skills"),
+        ("adaptive_behavior", "Adaptive Behavior & Functional Skills"),
+        ("coping_strategies", "Coping Strategies"),
+        ("transitions", "Transitions Between Activities"),
+    ]
+    reports = []
+    for i in range(count):
+        goals = {}
+        for key, label in random.sample(goal_templates, 5):
+            goals[key] = {"label": label, "notes": f"Session {i}: observation for {label.lower()}.", "checked": True}
+        reports.append(MockReport(i + 1, json.dumps(goals), date(2024, 1, 1) + timedelta(days=i)))
+    return reports
+
+
+def per_section_scan(reports, matcher):
+    """Shape of the old matching: sections x reports x keys, re-parsing JSON each pass."""
+    section_notes = {}
+    for title in matcher.titles:
+        notes = []
+        for report in reports:
+            parsed = parse_goals_achieved(report.goals_achieved)
+            if not isinstance(parsed, dict):
+                continue
+            for key, value in parsed.items():
+                if isinstance(value, dict) and (value.get("notes") or "").strip():
+                    if matcher.matches(title, key, (value.get("label") or "").strip()):
+                        notes.append(value["notes"].strip())
+        section_notes[title] = notes
+    return section_notes
+
+
+def indexed_cold(reports):
+    # New matcher: no memoized resolutions yet.
+    matcher = SectionMatcher(THERAPY_SECTIONS[THERAPY_TYPE], LABEL_ALIASES, KEY_ALIASES)
+    return SectionIndex(reports).notes_by_section(reports, matcher)
+
+
+def indexed_warm(reports):
+    return SectionIndex(reports).notes_by_section(reports, SECTION_MATCHERS[THERAPY_TYPE])
+
+
+def build_prompt(reports):
+    from app.api.endpoints.therapy_reports import _build_main_summary_prompt_with_fewshot
+
+    return _build_main_summary_prompt_with_fewshot(reports, MockStudent())
+
+
+def timed(label, fn, reports):
+    best = None
+    result = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn(reports)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {label:<34} {best * 1000:8.2f} ms")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    reports = make_reports(count)
+    print(f"Section matching for {count} reports ({THERAPY_TYPE}), best of {REPEATS}:")
+
+    baseline = timed("per-section scan (old shape)", lambda r: per_section_scan(r, SECTION_MATCHERS[THERAPY_TYPE]), reports)
+    cold = timed("section index + new matcher", indexed_cold, reports)
+    warm = timed("section index + prebuilt matcher", indexed_warm, reports)
+    timed("full main summary prompt", build_prompt, reports)
+
+    assert baseline == cold == warm, "indexed matching must produce the same notes per section"
+    for title, notes in warm.items():
+        print(f"    {title}: {len(notes)} notes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+End-to-end latency benchmark for the AI summary, summary stream and translation endpoints.
+
+Start the mock router and a backend that points at it (see mock_llm_server.py), then
+run from the backend directory:
+    python benchmark_summary_pipeline.py --username admin --password admin123
+
+Three students (BENCH0010, BENCH0100, BENCH1000 with 10, 100 and 1000 therapy reports)
+are seeded directly in the configured database; existing ones are reused and
+--cleanup removes them. For every endpoint, history size and concurrency level the
+script sends --requests requests and prints p50/p95 latency and throughput (for the
+stream also the time to the first summary event).
+
+By default every request bypasses the LLM cache and stored summary state and uses a
+distinct payload, so each one runs the full pipeline instead of being coalesced with
+an identical request in flight; --warm and --coalesce measure those paths instead.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+BENCH_PREFIX = "BENCH"
+SPEECH_GOALS = [
+    ("receptive_language", "Receptive Language Skills (Comprehension)"),
+    ("expressive_language", "Expressive Language Skills"),
+    ("oral_motor_opt", "Oral Motor & Oral Placement Therapy (OPT) Goals"),
+    ("pragmatic_language", "Pragmatic Language Skills (Social Communication)"),
+    ("narrative_skills", "Narrative Skills"),
+]
+OBSERVATIONS = [
+    "followed two-step directions with visual cues",
+    "needed repeated prompts to stay on task",
+    "named familiar objects in short phrases",
+    "took turns during a board game with adult support",
+    "retold a three-picture story in sequence",
+    "showed improved lip closure during straw drinking",
+    "responses were inconsistent and required modelling",
+]
+TRANSLATION_TEXT = (
+    "Speech Therapy – Progress Summary\n\n"
+    "**Receptive Language Skills (Comprehension)**\n"
+    "• The student followed two-step directions with visual cues and responded to familiar questions.\n"
+    "• Comprehension of prepositions was emerging with moderate prompts.\n\n"
+    "**Expressive Language Skills**\n"
+    "• The student named familiar objects and used short phrases to request items during play.\n"
+)
+
+
+def _student_code(size: int) -> str:
+    return f"{BENCH_PREFIX}{size:04d}"
+
+
+def seed_students(sizes):
+    """Create the benchmark students and their reports if they do not exist yet."""
+    import app.models  # noqa: F401  (registers every mapper)
+    from app.db.session import SessionLocal
+    from app.models.student import Student
+    from app.models.therapy_report import TherapyReport  # not re-exported by app.models
+
+    random.seed(7)
+    db = SessionLocal()
+    try:
+        for size in sizes:
+            code = _student_code(size)
+            student = db.query(Student).filter(Student.student_id == code).first()
+            if student is not None:
+                count = db.query(TherapyReport).filter(TherapyReport.student_id == student.id).count()
+                print(f"  {code}: exists with {count} reports")
+                continue
+            student = Student(student_id=code, name=f"Benchmark {size}", class_name=BENCH_PREFIX)
+            db.add(student)
+            db.flush()
+            first_day = date.today() - timedelta(days=size * 3)
+            db.add_all([
+                TherapyReport(
+                    student_id=student.id,
+                    report_date=first_day + timedelta(days=i * 3),
+                    therapy_type="Speech Therapy",
+                    progress_level=random.choice(["poor", "fair", "good", "excellent"]),
+                    progress_notes=f"Session {i + 1}: {random.choice(OBSERVATIONS)}.",
+                    goals_achieved={
+                        key: {"label": label, "checked": True, "notes": f"{random.choice(OBSERVATIONS)} ({i + 1})"}
+                        for key, label in random.sample(SPEECH_GOALS, 3)
+                    },
+                )
+                for i in range(size)
+            ])
+            db.commit()
+            print(f"  {code}: created with {size} reports")
+    finally:
+        db.close()
+
+
+def cleanup_students():
+    import app.models  # noqa: F401
+    from app.db.session import SessionLocal
+    from app.models.progress_stats import StudentProgressStats
+    from app.models.student import Student
+    from app.models.summary_state import StudentSummaryState
+    from app.models.summary_job import SummaryJob
+    from app.models.therapy_report import TherapyReport
+
+    db = SessionLocal()
+    try:
+        ids = [s.id for s in db.query(Student).filter(Student.student_id.like(f"{BENCH_PREFIX}%")).all()]
+        if ids:
+            for model in (TherapyReport, StudentSummaryState, SummaryJob, StudentProgressStats):
+                db.query(model).filter(model.student_id.in_(ids)).delete(synchronize_session=False)
+            db.query(Student).filter(Student.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+        print(f"Removed {len(ids)} benchmark students")
+    finally:
+        db.close()
+
+
+def login(client: httpx.Client, username: str, password: str) -> str:
+    resp = client.post("/api/v1/auth/login", data={"username": username, "password": password})
+    resp.raise_for_status()
+    return resp.json()["access_token"]
+
+
+def _summary_payload(size: int, n: int, args) -> dict:
+    payload = {"student_id": _student_code(size), "bypass_cache": not args.warm, "incremental": args.warm}
+    if not args.coalesce:
+        # A distinct (far-future) end date keeps the report set but changes the request key.
+        payload["to_date"] = (date(2100, 1, 1) + timedelta(days=n)).isoformat()
+    return payload
+
+
+def call_summary(client, headers, size, n, args):
+    start = time.perf_counter()
+    resp = client.post("/api/v1/therapy-reports/summary/ai", json=_summary_payload(size, n, args), headers=headers)
+    resp.raise_for_status()
+    return time.perf_counter() - start, None
+
+
+def call_stream(client, headers, size, n, args):
+    start = time.perf_counter()
+    first_event = None
+    last_event = None
+    with client.stream(
+        "POST", "/api/v1/therapy-reports/summary/ai/stream", json=_summary_payload(size, n, args), headers=headers
+    ) as resp:
+        resp.raise_for_status()
+        for line in resp.iter_lines():
+            if line.startswith("event: summary") and first_event is None:
+                first_event = time.perf_counter() - start
+            elif line.startswith("event: "):
+                last_event = line[len("event: "):]
+    if last_event != "complete":
+        raise RuntimeError(f"stream ended with '{last_event}'")
+    return time.perf_counter() - start, first_event
+
+
+def call_translate(client, headers, size, n, args):
+    start = time.perf_counter()
+    resp = client.post(
+        "/api/v1/translate",
+        json={"text": TRANSLATION_TEXT, "target_language": args.translate_language},
+        headers=headers,
+    )
+    resp.raise_for_status()
+    return time.perf_counter() - start, None
+
+
+ENDPOINTS = {"summary": call_summary, "stream": call_stream, "translate": call_translate}
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_level(client, headers, endpoint, size, concurrency, args):
+    fn = ENDPOINTS[endpoint]
+    latencies, first_events, errors = [], [], []
+    lock = threading.Lock()
+
+    def one(n):
+        try:
+            latency, first_event = fn(client, headers, size, n, args)
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+            return
+        with lock:
+            latencies.append(latency)
+            if first_event is not None:
+                first_events.append(first_event)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(args.requests)))
+    wall = time.perf_counter() - start
+    return {
+        "endpoint": endpoint,
+        "reports": size,
+        "concurrency": concurrency,
+        "requests": args.requests,
+        "ok": len(latencies),
+        "errors": len(errors),
+        "p50": _percentile(latencies, 0.5),
+        "p95": _percentile(latencies, 0.95),
+        "first_event_p50": _percentile(first_events, 0.5),
+        "throughput": len(latencies) / wall if wall else 0.0,
+        "first_error": errors[0] if errors else None,
+    }
+
+
+def _fmt(seconds):
+    return f"{seconds:8.2f}" if seconds is not None else "       -"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--sizes", default="10,100,1000", help="report counts of the seeded students")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--requests", type=int, default=16, help="requests per endpoint/size/concurrency level")
+    parser.add_argument("--endpoints", default="summary,stream,translate")
+    parser.add_argument("--translate-language", default="mal_Mlym")
+    parser.add_argument("--warm", action="store_true", help="allow cached responses and stored summaries")
+    parser.add_argument("--coalesce", action="store_true", help="send identical payloads (single-flight path)")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    parser.add_argument("--seed-only", action="store_true")
+    parser.add_argument("--cleanup", action="store_true", help="remove the benchmark students and exit")
+    args = parser.parse_args()
+
+    if args.cleanup:
+        cleanup_students()
+        return
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+    endpoints = [e for e in args.endpoints.split(",") if e]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {sorted(unknown)}")
+
+    print("Seeding benchmark students:")
+    seed_students(sizes)
+    if args.seed_only:
+        return
+
+    results = []
+    with httpx.Client(base_url=args.base_url, timeout=600) as client:
+        headers = {"Authorization": f"Bearer {login(client, args.username, args.password)}"}
+        print(f"\n{'endpoint':<10} {'reports':>7} {'conc':>5} {'ok':>4} {'err':>4} "
+              f"{'p50 s':>8} {'p95 s':>8} {'1st ev':>8} {'req/s':>7}")
+        for endpoint in endpoints:
+            # Translation does not depend on the report history.
+            for size in (sizes if endpoint != "translate" else [0]):
+                for concurrency in levels:
+                    row = run_level(client, headers, endpoint, size, concurrency, args)
+                    results.append(row)
+                    print(f"{endpoint:<10} {size or '-':>7} {concurrency:>5} {row['ok']:>4} {row['errors']:>4} "
+                          f"{_fmt(row['p50'])} {_fmt(row['p95'])} {_fmt(row['first_event_p50'])} {row['throughput']:7.2f}")
+                    if row["first_error"]:
+                        print(f"    first error: {row['first_error'].splitlines()[0][:160]}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
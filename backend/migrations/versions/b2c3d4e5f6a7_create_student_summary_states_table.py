@@ -0,0 +1,43 @@
+"""create student_summary_states table
+
+Revision ID: b2c3d4e5f6a7
+Revises: 7ab58a691691
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2c3d4e5f6a7'
+down_revision: Union[str, None] = '7ab58a691691'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "student_summary_states",
+        sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("scope_key", sa.String(), nullable=False),
+        sa.Column("last_report_id", sa.Integer(), nullable=True),
+        sa.Column("last_report_date", sa.Date(), nullable=True),
+        sa.Column("report_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("section_notes", sa.JSON(), nullable=True),
+        sa.Column("analysis", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.UniqueConstraint("student_id", "scope_key", name="uq_student_summary_states_student_scope"),
+    )
+    op.create_index(op.f('ix_student_summary_states_id'), 'student_summary_states', ['id'], unique=False)
+    op.create_index(op.f('ix_student_summary_states_student_id'), 'student_summary_states', ['student_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_student_summary_states_student_id'), table_name='student_summary_states')
+    op.drop_index(op.f('ix_student_summary_states_id'), table_name='student_summary_states')
+    op.drop_table('student_summary_states')
@@ -0,0 +1,38 @@
+"""add therapy_reports summary indexes
+
+Revision ID: c3d4e5f6a7b8
+Revises: b2c3d4e5f6a7
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d4e5f6a7b8'
+down_revision: Union[str, None] = 'b2c3d4e5f6a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_therapy_reports_student_id_report_date',
+        'therapy_reports',
+        ['student_id', 'report_date'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_therapy_reports_student_id_therapy_type_report_date',
+        'therapy_reports',
+        ['student_id', 'therapy_type', 'report_date'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_therapy_reports_student_id_therapy_type_report_date', table_name='therapy_reports')
+    op.drop_index('ix_therapy_reports_student_id_report_date', table_name='therapy_reports')
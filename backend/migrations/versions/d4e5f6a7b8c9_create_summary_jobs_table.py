@@ -0,0 +1,45 @@
+"""create summary_jobs table
+
+Revision ID: d4e5f6a7b8c9
+Revises: c3d4e5f6a7b8
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e5f6a7b8c9'
+down_revision: Union[str, None] = 'c3d4e5f6a7b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "summary_jobs",
+        sa.Column("id", sa.String(length=32), primary_key=True, nullable=False),
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("requested_by_user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("status", sa.String(), nullable=False, server_default="queued"),
+        sa.Column("request", sa.JSON(), nullable=False),
+        sa.Column("progress", sa.JSON(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(op.f('ix_summary_jobs_id'), 'summary_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_summary_jobs_student_id'), 'summary_jobs', ['student_id'], unique=False)
+    op.create_index(op.f('ix_summary_jobs_status'), 'summary_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_summary_jobs_status'), table_name='summary_jobs')
+    op.drop_index(op.f('ix_summary_jobs_student_id'), table_name='summary_jobs')
+    op.drop_index(op.f('ix_summary_jobs_id'), table_name='summary_jobs')
+    op.drop_table('summary_jobs')
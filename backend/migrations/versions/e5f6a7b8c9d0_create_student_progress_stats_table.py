@@ -0,0 +1,43 @@
+"""create student_progress_stats table
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f6a7b8c9d0'
+down_revision: Union[str, None] = 'd4e5f6a7b8c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows are filled as reports are created, and rebuilt from the reports on first read.
+    op.create_table(
+        "student_progress_stats",
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("students.id", ondelete="CASCADE"), primary_key=True, nullable=False),
+        sa.Column("report_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("first_report_id", sa.Integer(), nullable=True),
+        sa.Column("first_report_date", sa.Date(), nullable=True),
+        sa.Column("last_report_id", sa.Integer(), nullable=True),
+        sa.Column("last_report_date", sa.Date(), nullable=True),
+        sa.Column("interval_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("interval_mean", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("interval_m2", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("level_counts", sa.JSON(), nullable=False),
+        sa.Column("therapy_type_counts", sa.JSON(), nullable=False),
+        sa.Column("level_scores", sa.Text(), nullable=False, server_default=""),
+        sa.Column("recent_levels", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('student_progress_stats')
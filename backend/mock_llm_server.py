@@ -0,0 +1,225 @@
+"""
+Local stand-in for the Hugging Face router's OpenAI-compatible chat API.
+
+Serves POST /v1/chat/completions (regular and `stream: true`) with canned but
+well-formed clinical text, so the summary pipeline can be load-tested without
+spending router quota. Latency, token rate and failures are configurable on the
+command line and can be changed while it runs with POST /mock/config.
+
+Run from the backend directory:
+    python mock_llm_server.py --port 8001 --latency 0.8 --tokens-per-second 60
+
+and start the backend against it:
+    HUGGINGFACE_BASE_URL=http://127.0.0.1:8001 HUGGINGFACE_API_TOKEN=mock uvicorn app.main:app
+
+Options:
+    --latency SECONDS          time to first token (default 0.5)
+    --jitter SECONDS           uniform random extra latency (default 0.2)
+    --tokens-per-second N      generation speed; 0 = instant (default 50)
+    --error-rate FRACTION      share of requests answered with --error-status (default 0)
+    --error-status CODE        status for injected errors (default 503)
+    --rate-limit-rate FRACTION share of requests answered 429 with Retry-After (default 0)
+    --stream-break-rate FRACTION share of streams cut off halfway (default 0)
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Mock LLM router")
+
+config = {
+    "latency": 0.5,
+    "jitter": 0.2,
+    "tokens_per_second": 50.0,
+    "error_rate": 0.0,
+    "error_status": 503,
+    "rate_limit_rate": 0.0,
+    "stream_break_rate": 0.0,
+}
+stats = {"requests": 0, "streams": 0, "errors": 0, "rate_limited": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+_WORD_RE = re.compile(r"\S+\s*")
+
+SECTION_SENTENCES = [
+    "{name} participated in the structured activities and responded to the prompts provided by the therapist.",
+    "Performance was consistent across the sessions, with occasional support needed to complete multi-step tasks.",
+    "{name} attempted the targeted skills with verbal cues and showed emerging independence in familiar routines.",
+    "Engagement varied with the activity, and shorter tasks were completed more reliably than longer ones.",
+]
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _student_name(prompt: str) -> str:
+    match = re.search(r"Student Name: ([^\n]+)", prompt) or re.search(r"report for ([A-Z][\w-]*)", prompt)
+    return match.group(1).strip() if match else "The student"
+
+
+def _section_titles(prompt: str):
+    titles = re.findall(r"^\d+\. (.+)$", prompt, flags=re.MULTILINE)
+    if not titles:
+        titles = re.findall(r"^  - (.+)$", prompt, flags=re.MULTILINE)
+    return titles[:6] or ["Receptive Language", "Expressive Language"]
+
+
+def _summary_text(prompt: str) -> str:
+    name = _student_name(prompt)
+    label = re.search(r"START YOUR RESPONSE WITH: '([^']+)'", prompt)
+    lines = [label.group(1) if label else "Therapy – Progress Summary", ""]
+    for title in _section_titles(prompt):
+        lines.append(f"**{title}**")
+        for sentence in random.sample(SECTION_SENTENCES, 2):
+            lines.append(f"• {sentence.format(name=name)} {random.choice(SECTION_SENTENCES).format(name=name)}")
+        lines.append("")
+    return "\n".join(lines).strip()
+
+
+def _paragraph(prompt: str) -> str:
+    name = _student_name(prompt)
+    return " ".join(sentence.format(name=name) for sentence in random.sample(SECTION_SENTENCES, 3))
+
+
+def _completion_text(prompt: str, max_tokens: int) -> str:
+    """Text shaped like what the prompt asks for (JSON object, progress summary or paragraph)."""
+    if "Return ONLY a JSON object" in prompt:
+        fields = re.findall(r'^- "(\w+)":', prompt, flags=re.MULTILINE)
+        return json.dumps({field: _summary_text(prompt) if field == "summary" else _paragraph(prompt) for field in fields})
+    if "Progress Summary" in prompt:
+        text = _summary_text(prompt)
+    else:
+        text = _paragraph(prompt)
+    return text[: max_tokens * 4]
+
+
+async def _first_token_delay() -> None:
+    await asyncio.sleep(config["latency"] + random.uniform(0, config["jitter"]))
+
+
+def _injected_error():
+    roll = random.random()
+    if roll < config["rate_limit_rate"]:
+        stats["rate_limited"] += 1
+        return JSONResponse({"error": "rate limited (mock)"}, status_code=429, headers={"Retry-After": "1"})
+    if roll < config["rate_limit_rate"] + config["error_rate"]:
+        stats["errors"] += 1
+        return JSONResponse({"error": "injected failure (mock)"}, status_code=config["error_status"])
+    return None
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+    prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+    max_tokens = int(body.get("max_tokens") or 512)
+    model = body.get("model", "mock-model")
+
+    error = _injected_error()
+    if error is not None:
+        await _first_token_delay()
+        return error
+
+    text = _completion_text(prompt, max_tokens)
+    prompt_tokens, completion_tokens = _estimate_tokens(prompt), _estimate_tokens(text)
+    stats["prompt_tokens"] += prompt_tokens
+    stats["completion_tokens"] += completion_tokens
+    usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    rate = config["tokens_per_second"]
+
+    if not body.get("stream"):
+        await _first_token_delay()
+        if rate > 0:
+            await asyncio.sleep(completion_tokens / rate)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    stats["streams"] += 1
+    pieces = _WORD_RE.findall(text)
+    break_at = len(pieces) // 2 if random.random() < config["stream_break_rate"] else None
+
+    async def events():
+        await _first_token_delay()
+        for i, piece in enumerate(pieces):
+            if break_at is not None and i == break_at:
+                yield f"data: {json.dumps({'error': 'stream interrupted (mock)'})}\n\n"
+                return
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            if rate > 0:
+                await asyncio.sleep(_estimate_tokens(piece) / rate)
+        final = {"id": completion_id, "object": "chat.completion.chunk", "model": model,
+                 "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/mock/config")
+async def get_config():
+    return {"config": config, "stats": stats}
+
+
+@app.post("/mock/config")
+async def update_config(request: Request):
+    """Change latency / error injection at runtime, e.g. {"error_rate": 0.5}."""
+    changes = await request.json()
+    unknown = sorted(set(changes) - set(config))
+    if unknown:
+        return JSONResponse({"error": f"unknown settings: {unknown}"}, status_code=400)
+    for key, value in changes.items():
+        config[key] = type(config[key])(value)
+    return {"config": config}
+
+
+@app.post("/mock/reset")
+async def reset_stats():
+    for key in stats:
+        stats[key] = 0
+    return {"stats": stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=config["latency"])
+    parser.add_argument("--jitter", type=float, default=config["jitter"])
+    parser.add_argument("--tokens-per-second", type=float, default=config["tokens_per_second"])
+    parser.add_argument("--error-rate", type=float, default=config["error_rate"])
+    parser.add_argument("--error-status", type=int, default=config["error_status"])
+    parser.add_argument("--rate-limit-rate", type=float, default=config["rate_limit_rate"])
+    parser.add_argument("--stream-break-rate", type=float, default=config["stream_break_rate"])
+    args = parser.parse_args()
+    for key in config:
+        config[key] = getattr(args, key)
+
+    print(f"Mock LLM router on http://{args.host}:{args.port}/v1/chat/completions")
+    print(f"Settings: {config}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()